@@ -0,0 +1,89 @@
+# admission.py
+# 准入控制
+# 按用户（JWT 的 sub 或 API Key 的客户端名）的令牌桶限制请求速率，并限制全局同时进行的预测数；
+# 交互式请求（前端页面）可使用为其预留的并发名额。超出限制时立即拒绝（429），不排队等待
+
+import threading
+import time
+from collections import OrderedDict
+
+# 通道：interactive 为前端交互式请求，batch 为脚本等其他请求
+LANES = ("interactive", "batch")
+
+class Rejected(Exception):
+    """请求未获准入；reason 为 rate_limited 或 overloaded，retry_after 为建议的重试等待秒数"""
+
+    def __init__(self, reason, retry_after, message):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    令牌桶 + 全局并发上限
+
+    每个用户一个令牌桶：每秒补充 rate 个令牌，最多积累 burst 个，每个请求消耗一个；
+    rate <= 0 表示不限速。同时进行的预测数达到 max_concurrent - interactive_reserve 后
+    只接受交互式请求，达到 max_concurrent 后全部拒绝；max_concurrent <= 0 表示不限并发。
+    令牌桶按最近使用保留 max_clients 个，淘汰的用户下次请求时从满桶开始。
+    """
+
+    def __init__(self, rate=20.0, burst=40, max_concurrent=8, interactive_reserve=2, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.interactive_reserve = min(interactive_reserve, max(max_concurrent - 1, 0))
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._in_flight = {lane: 0 for lane in LANES}
+        self._lock = threading.Lock()
+
+    def _take_token(self, client, now):
+        """从用户的令牌桶取一个令牌，成功返回 0，否则返回需要等待的秒数（调用方持有锁）"""
+        tokens, last = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def acquire(self, client, lane="batch"):
+        """
+        申请准入，成功后须调用 release(lane)
+
+        参数:
+            client: 用户标识
+            lane: interactive 或 batch
+
+        异常:
+            Rejected: 用户超出速率限制，或同时进行的预测数已达该通道的上限
+        """
+        now = time.monotonic()
+        with self._lock:
+            total = sum(self._in_flight.values())
+            if self.max_concurrent > 0:
+                limit = self.max_concurrent if lane == "interactive" else self.max_concurrent - self.interactive_reserve
+                if total >= limit:
+                    raise Rejected("overloaded", 1, f"服务繁忙，同时进行的预测已达上限 {limit}，请稍后重试")
+            if self.rate > 0:
+                wait = self._take_token(client, now)
+                if wait > 0:
+                    raise Rejected("rate_limited", wait,
+                                   f"请求过于频繁，每个用户每秒最多 {self.rate:g} 次（突发 {self.burst} 次）")
+            self._in_flight[lane] += 1
+
+    def release(self, lane="batch"):
+        with self._lock:
+            self._in_flight[lane] -= 1
+
+    def in_flight(self, lane):
+        return self._in_flight[lane]
+
+    def clients(self):
+        """当前保留令牌桶的用户数"""
+        return len(self._buckets)
@@ -0,0 +1,160 @@
+# auth_cache.py
+# 认证缓存
+# 缓存已验证的 JWT（以 token 摘要为键），避免同一 token 的连续请求重复做 HMAC 校验与声明解析；
+# 支持注销 token，以及供机器客户端使用的 API Key 认证
+
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+def token_digest(token):
+    """返回 token 的 SHA-256 摘要（缓存中不保存 token 原文）"""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+class TokenCache:
+    """
+    已验证 token 的 LRU 缓存
+
+    条目在 token 的 exp 到期或超过 ttl 秒后失效（取较早者）；
+    已注销的 token 记录到过期为止，缓存命中与重新验证都会拒绝它们。
+    注销记录按过期时间保存在堆中，注销与查询时清理已过期的记录；超过 max_revoked 条时
+    先淘汰最早过期的记录。
+    """
+
+    def __init__(self, max_size=1024, ttl=300.0, max_revoked=100000):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_revoked = max_revoked
+        self._entries = OrderedDict()
+        self._revoked = {}
+        self._revoked_heap = []
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        """
+        查找缓存
+
+        返回:
+            写入时的身份信息，未命中或已失效时返回 None
+        """
+        if self.max_size <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            identity, expires = entry
+            if expires <= now:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return identity
+
+    def put(self, digest, identity, exp=None):
+        """
+        写入缓存
+
+        参数:
+            digest: token 摘要
+            identity: 由 token 声明得到的身份信息（如用户名与准入通道）
+            exp: token 的过期时间（Unix 时间戳，None 表示仅受 ttl 限制）
+        """
+        if self.max_size <= 0:
+            return
+        expires = time.time() + self.ttl
+        if exp is not None:
+            expires = min(expires, float(exp))
+        with self._lock:
+            self._entries[digest] = (identity, expires)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def revoke(self, digest, exp=None):
+        """
+        注销 token
+
+        参数:
+            digest: token 摘要
+            exp: token 的过期时间，过期后注销记录自动清理
+        """
+        expires = float(exp) if exp is not None else float("inf")
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._revoked[digest] = expires
+            heapq.heappush(self._revoked_heap, (expires, digest))
+            self._purge_revoked(time.time())
+
+    def _purge_revoked(self, now):
+        """清理已过期的注销记录，并把记录数限制在 max_revoked 以内（调用方持有锁）"""
+        heap = self._revoked_heap
+        while heap and (heap[0][0] <= now or len(self._revoked) > self.max_revoked):
+            expires, digest = heapq.heappop(heap)
+            # 同一 token 重复注销时堆中会留下旧记录，只删除与当前记录一致的
+            if self._revoked.get(digest) == expires:
+                del self._revoked[digest]
+
+    def is_revoked(self, digest):
+        expires = self._revoked.get(digest)
+        if expires is None:
+            return False
+        now = time.time()
+        if expires <= now:
+            # 已过期的 token 在 JWT 校验时就会被拒绝，注销记录不再需要
+            with self._lock:
+                self._purge_revoked(now)
+            return False
+        return True
+
+    def revoked_count(self):
+        """当前保存的注销记录数"""
+        return len(self._revoked)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class ApiKeyStore:
+    """
+    API Key 存储
+
+    只保存 key 的 SHA-256 摘要，查找时按摘要做字典索引（O(1)）。
+    比较的是摘要而不是 key 原文，攻击者无法通过响应时间逐字节猜测 key。
+    """
+
+    def __init__(self, keys=None):
+        self._by_digest = {}
+        for name, key in (keys or {}).items():
+            self.add(name, key)
+
+    @classmethod
+    def from_string(cls, text):
+        """
+        从 "名称:key,名称2:key2" 格式的字符串创建（通常来自环境变量 API_KEYS）
+        """
+        keys = {}
+        for item in (text or "").split(","):
+            item = item.strip()
+            if not item:
+                continue
+            name, sep, key = item.partition(":")
+            if not sep or not key:
+                raise ValueError(f"API_KEYS 格式错误（应为 名称:key）: {item}")
+            keys[name.strip()] = key.strip()
+        return cls(keys)
+
+    def add(self, name, key):
+        self._by_digest[token_digest(key)] = name
+
+    def lookup(self, key):
+        """
+        返回:
+            key 对应的客户端名称，无效时返回 None
+        """
+        return self._by_digest.get(token_digest(key))
+
+    def __len__(self):
+        return len(self._by_digest)
@@ -2,22 +2,24 @@
 # FastAPI 后端主文件
 # 提供登录和预测接口
 
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+from fastapi import FastAPI, HTTPException, Depends, status, Request, UploadFile, File, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyHeader
 from pydantic import BaseModel
 import os
 import sys
-import pandas as pd
-import joblib
-from typing import Optional
-from jose import jwt
+from typing import List, Optional
+import io
 from datetime import datetime, timedelta
 import logging
+import math
+import threading
 import time
 
+# pandas、jose 在用到的函数内导入，sklearn 随模型在后台线程加载，服务启动后可以尽快开始监听
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -26,9 +28,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# 添加scripts目录到路径
+# 添加scripts目录和项目根目录到路径（直接运行 api/main.py 时也能导入 api 包）
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
-from predict import load_model, prepare_input_data
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from predict import (load_model, prepare_input_data, read_input_file, use_per_call_n_jobs, predict_with_threads,
+                     choose_n_jobs, predict_unique)
+from model_manifest import read_manifest, list_models
+from uncertainty import parse_quantiles, predict_uncertainty, quantile_label, uncertainty_columns, supports_uncertainty
+from model_compression import count_trees
+from api import metrics
+from api import request_logging
+from api import serialization
+from api.auth_cache import TokenCache, ApiKeyStore, token_digest
+from api.single_flight import SingleFlight
+from starlette.concurrency import run_in_threadpool
+from api.admission import AdmissionController, Rejected
+
+# 日志模式（环境变量 LOG_MODE=text|json，见 api/request_logging.py）
+request_logging.configure_from_env()
 
 app = FastAPI(title="预测平台API", version="1.0.0")
 
@@ -36,7 +53,11 @@ app = FastAPI(title="预测平台API", version="1.0.0")
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """记录所有HTTP请求的详细信息"""
+    if request_logging.structured:
+        return await log_requests_structured(request, call_next)
+    
     start_time = time.time()
+    perf_start = time.perf_counter()
     
     # 记录请求信息
     logger.info(f"[请求] {request.method} {request.url.path}")
@@ -47,13 +68,49 @@ async def log_requests(request: Request, call_next):
     try:
         response = await call_next(request)
         process_time = time.time() - start_time
+        record_request_metrics(request, response.status_code, time.perf_counter() - perf_start)
         logger.info(f"[响应] {request.method} {request.url.path} - 状态码: {response.status_code} - 耗时: {process_time:.3f}秒")
         return response
     except Exception as e:
         process_time = time.time() - start_time
+        record_request_metrics(request, 500, time.perf_counter() - perf_start)
         logger.error(f"[错误] {request.method} {request.url.path} - 异常: {str(e)} - 耗时: {process_time:.3f}秒")
         raise
 
+async def log_requests_structured(request: Request, call_next):
+    """json 日志模式：每个请求最多一条结构化日志，成功请求采样记录"""
+    perf_start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        elapsed = time.perf_counter() - perf_start
+        record_request_metrics(request, 500, elapsed)
+        logger.error("request failed", extra={"fields": {
+            "method": request.method,
+            "path": request.url.path,
+            "duration_ms": round(elapsed * 1000, 3),
+            "error": str(e),
+        }})
+        raise
+    elapsed = time.perf_counter() - perf_start
+    record_request_metrics(request, response.status_code, elapsed)
+    if request_logging.should_log_request(request.url.path, response.status_code):
+        logger.info("request", extra={"fields": {
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 3),
+            "client": request.client.host if request.client else None,
+        }})
+    return response
+
+def record_request_metrics(request: Request, status_code: int, elapsed: float):
+    """记录请求耗时与计数；接口标签使用路由模板，避免前端路径造成标签爆炸"""
+    route = request.scope.get("route")
+    endpoint = getattr(route, "path", "unmatched")
+    metrics.REQUEST_LATENCY.observe(elapsed, method=request.method, endpoint=endpoint)
+    metrics.REQUEST_COUNT.inc(method=request.method, endpoint=endpoint, status=status_code)
+
 # 配置CORS，允许前端访问（如果前后端分离部署）
 app.add_middleware(
     CORSMiddleware,
@@ -115,16 +172,85 @@ USERS = {
 SECRET_KEY = "your-secret-key-change-in-production"
 ALGORITHM = "HS256"
 
+# 已验证 token 的缓存（AUTH_CACHE_SIZE=0 关闭；AUTH_CACHE_TTL 为条目最长存活秒数；
+# AUTH_REVOKED_MAX 为注销记录条数上限）
+token_cache = TokenCache(
+    max_size=int(os.environ.get("AUTH_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("AUTH_CACHE_TTL", "300")),
+    max_revoked=int(os.environ.get("AUTH_REVOKED_MAX", "100000")),
+)
+
+# 机器客户端的 API Key（环境变量 API_KEYS="名称:key,名称2:key2"，请求头 X-API-Key）
+api_keys = ApiKeyStore.from_string(os.environ.get("API_KEYS", ""))
+
+# 准入控制（预测接口）：每个用户（JWT 的 sub / API Key 客户端名）的令牌桶每秒补充 ADMISSION_RATE 个、
+# 最多积累 ADMISSION_BURST 个；同时进行的预测达到 ADMISSION_MAX_CONCURRENT - ADMISSION_INTERACTIVE_RESERVE 后
+# 只接受交互式通道的请求，即前端页面登录（client="web"）签发的 token；其他 token 与 API Key 属于 batch 通道。
+# 超出限制立即返回 429。RATE 或 MAX_CONCURRENT 设为 0 表示不限制
+admission = AdmissionController(
+    rate=float(os.environ.get("ADMISSION_RATE", "20")),
+    burst=int(os.environ.get("ADMISSION_BURST", "40")),
+    max_concurrent=int(os.environ.get("ADMISSION_MAX_CONCURRENT", str(max(4, 2 * (os.cpu_count() or 1))))),
+    interactive_reserve=int(os.environ.get("ADMISSION_INTERACTIVE_RESERVE", "2")),
+)
+
+bearer_scheme = HTTPBearer(auto_error=False)
+api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
+
 # 模型路径
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "model.joblib")
 
 # 全局变量存储加载的模型
 model_data = None
 
+# 模型清单（启动时读取，模型加载完成前 /api/health 与 /api/model-info 用它回答）
+model_manifest = None
+
+# 模型文件与清单不一致时：默认记录错误并继续服务；MODEL_MANIFEST_STRICT=1 时拒绝加载（状态为 failed）
+MODEL_MANIFEST_STRICT = os.environ.get("MODEL_MANIFEST_STRICT", "0") == "1"
+
+# 模型状态：loading（加载中）→ warming（预热中）→ ready；模型不存在或加载失败为 failed
+model_state = "loading"
+warmup_seconds = None
+
+# 启动预热：用合成输入按这些批量大小走一遍完整预测路径（WARMUP_ROUNDS=0 关闭预热）
+WARMUP_BATCH_SIZES = [int(s) for s in os.environ.get("WARMUP_BATCH_SIZES", "1,10,100").split(",") if s.strip()]
+WARMUP_ROUNDS = int(os.environ.get("WARMUP_ROUNDS", "3"))
+
+# 预测并行策略：批量小于 PREDICT_PARALLEL_MIN_ROWS 行单线程预测，更大的批量最多使用
+# PREDICT_MAX_THREADS 个线程；PREDICT_MAX_THREADS=0 表示沿用模型保存时的 n_jobs（训练时为 -1，即全部核）
+PREDICT_MAX_THREADS = int(os.environ.get("PREDICT_MAX_THREADS", str(min(4, os.cpu_count() or 1))))
+PREDICT_PARALLEL_MIN_ROWS = int(os.environ.get("PREDICT_PARALLEL_MIN_ROWS", "1000"))
+
+# 响应面查表（仅两输入模型）：PREDICT_SURFACE=1 时优先用模型文件中的响应面，没有则启动时按
+# SURFACE_RESOLUTION 构建；插值误差上界超过 SURFACE_TOLERANCE（相对各输出取值范围）的行回退到完整模型
+PREDICT_SURFACE = os.environ.get("PREDICT_SURFACE", "0") == "1"
+SURFACE_TOLERANCE = float(os.environ.get("SURFACE_TOLERANCE", "0.01"))
+SURFACE_RESOLUTION = int(os.environ.get("SURFACE_RESOLUTION", "128"))
+surface = None
+
+# 蒸馏代理模型：模型文件含 "surrogate"（训练时加 --surrogate）时加载，请求带 fast=true 时使用
+surrogate = None
+FAST_HELP = "使用蒸馏代理模型预测（微秒级延迟，精度见 /api/model-info 中的保真度指标）"
+
+# 请求合并：PREDICT_COALESCE=1 时 /api/predict 的预测在线程池中执行，同一时刻模型版本、规范化输入与预测模式
+# 都相同的请求共享一次计算（不缓存结果，计算完成后到达的请求重新计算）
+PREDICT_COALESCE = os.environ.get("PREDICT_COALESCE", "1") == "1"
+inflight = SingleFlight()
+model_version = None
+
+# 输入行去重：PREDICT_DEDUP=1 时批量与文件预测只对不同的输入行调用模型，再按原顺序广播回全部行
+# （fast 模式的代理模型逐行计算已足够便宜，不去重）
+PREDICT_DEDUP = os.environ.get("PREDICT_DEDUP", "1") == "1"
+
+# 扫描接口单次请求的网格点数上限
+SWEEP_MAX_POINTS = int(os.environ.get("SWEEP_MAX_POINTS", "100000"))
+
 # 请求模型
 class LoginRequest(BaseModel):
     username: str
     password: str
+    client: Optional[str] = None  # 前端页面登录时为 "web"，签发的 token 使用交互式准入通道
 
 class PredictRequest(BaseModel):
     load: float  # 载荷
@@ -133,11 +259,37 @@ class PredictRequest(BaseModel):
 class PredictResponse(BaseModel):
     predictions: dict  # 预测结果字典
     input_data: dict  # 输入的载荷和频率
+    uncertainty: Optional[dict] = None  # 不确定性模式：{输出列: {"std": 标准差, "q5": 分位数, ...}}
+
+class BatchPredictRequest(BaseModel):
+    items: List[PredictRequest]  # 多组载荷和频率
 
-# 加载模型（启动时加载一次）
+class BatchPredictResponse(BaseModel):
+    count: int  # 预测条数
+    unique: int  # 实际预测的不同输入条数（其余为重复输入，复用结果）
+    predictions: List[dict]  # 每组输入的预测结果字典，顺序与请求一致
+    uncertainty: Optional[List[dict]] = None  # 不确定性模式：每组输入的 {输出列: {"std": ..., "q5": ...}}
+
+class SweepRange(BaseModel):
+    start: float  # 起点
+    stop: Optional[float] = None  # 终点（包含，默认等于起点，即固定取值）
+    step: Optional[float] = None  # 步长（与 count 二选一）
+    count: Optional[int] = None  # 点数（与 step 二选一，在起点和终点之间均匀取点）
+
+class SweepRequest(BaseModel):
+    load: SweepRange  # 载荷取值范围
+    frequency: SweepRange  # 频率取值范围
+
+class SweepResponse(BaseModel):
+    count: int  # 网格点数
+    shape: List[int]  # [载荷点数, 频率点数]
+    load: List[float]  # 载荷坐标轴
+    frequency: List[float]  # 频率坐标轴
+    outputs: dict  # {输出列: 按行优先（载荷在外层、频率在内层）展平的预测值}
+
+# 加载模型（启动时在后台线程加载一次，加载和预热完成前 /api/ready 返回 503）
 @app.on_event("startup")
 async def load_model_on_startup():
-    global model_data
     logger.info("=" * 60)
     logger.info("FastAPI 应用启动中...")
     logger.info("=" * 60)
@@ -145,49 +297,345 @@ async def load_model_on_startup():
     logger.info(f"Python 路径: {sys.path}")
     logger.info(f"模型文件路径: {MODEL_PATH}")
     logger.info(f"模型文件是否存在: {os.path.exists(MODEL_PATH)}")
+    load_manifest()
+    
+    threading.Thread(target=load_and_warmup, name="model-loader", daemon=True).start()
+    
+    logger.info("=" * 60)
+    logger.info("FastAPI 应用启动完成，模型在后台加载，/api/ready 就绪后开始接收预测流量")
+    logger.info("=" * 60)
+
+def load_manifest():
+    """读取模型清单（只读小体积 JSON，不加载模型）"""
+    global model_manifest
+    try:
+        model_manifest = read_manifest(MODEL_PATH)
+    except ValueError as e:
+        logger.warning(f"⚠ 模型清单无法解析: {str(e)}")
+        return
+    if model_manifest is None:
+        logger.info("  模型清单: 不存在（可用 scripts/model_manifest.py --write 补写）")
+        return
+    logger.info(f"  模型清单: 创建于 {model_manifest.get('created_at')}，树数 {model_manifest.get('n_trees')}")
+    metrics.MODEL_SIZE.set(model_manifest.get("file_size") or 0)
+    metrics.MODEL_TREES.set(model_manifest.get("n_trees") or 0)
+
+def load_and_warmup():
+    """加载模型并预热，完成后将状态置为 ready"""
+    global model_data, model_state, warmup_seconds, surface, surrogate, model_version
     
     try:
-        if os.path.exists(MODEL_PATH):
-            logger.info(f"开始加载模型: {MODEL_PATH}")
-            model_data = load_model(MODEL_PATH)
-            logger.info(f"✓ 模型加载成功: {MODEL_PATH}")
-            logger.info(f"  输入列: {model_data['inputs']}")
-            logger.info(f"  输出列: {model_data['outputs']}")
-            logger.info(f"  模型类型: {type(model_data['model'])}")
-        else:
+        if not os.path.exists(MODEL_PATH):
             logger.warning(f"⚠ 警告: 模型文件不存在: {MODEL_PATH}")
             logger.warning(f"  请确保模型文件存在于 models/ 目录下")
             logger.warning(f"  当前目录内容: {os.listdir(os.path.dirname(MODEL_PATH) if os.path.dirname(MODEL_PATH) else '.')}")
+            model_state = "failed"
+            return
+        
+        logger.info(f"开始加载模型: {MODEL_PATH}")
+        data = load_model(MODEL_PATH)
+        logger.info(f"✓ 模型加载成功: {MODEL_PATH}")
+        logger.info(f"  输入列: {data['inputs']}")
+        logger.info(f"  输出列: {data['outputs']}")
+        logger.info(f"  模型类型: {type(data['model'])}")
+        for problem in data['manifest_problems']:
+            logger.error(f"✗ 模型与清单不一致: {problem}")
+        if data['manifest_problems'] and MODEL_MANIFEST_STRICT:
+            logger.error("✗ MODEL_MANIFEST_STRICT=1，拒绝使用与清单不一致的模型")
+            model_state = "failed"
+            return
+        metrics.MODEL_SIZE.set(os.path.getsize(MODEL_PATH))
+        metrics.MODEL_TREES.set(count_trees(data['model']))
+        if PREDICT_MAX_THREADS > 0:
+            use_per_call_n_jobs(data['model'])
+            logger.info(f"  预测并行策略: < {PREDICT_PARALLEL_MIN_ROWS} 行单线程，否则最多 {PREDICT_MAX_THREADS} 个线程")
+        if PREDICT_SURFACE:
+            surface = load_surface(data)
+        surrogate = data.get('surrogate')
+        stat = os.stat(MODEL_PATH)
+        model_version = (data['manifest'] or {}).get("file_sha256") or f"{stat.st_size}-{stat.st_mtime_ns}"
+        if surrogate is not None:
+            r2 = surrogate.fidelity.get("r2", {})
+            logger.info(f"  代理模型: {surrogate.degree} 次多项式，{len(surrogate.exponents)} 项，"
+                        f"相对模型最低 R2 {min(r2.values(), default=float('nan')):.4f}（fast=true 时使用）")
+        model_data = data
     except Exception as e:
         logger.error(f"✗ 模型加载失败: {str(e)}")
         logger.exception(e)  # 打印完整的异常堆栈
+        model_state = "failed"
+        return
     
-    logger.info("=" * 60)
-    logger.info("FastAPI 应用启动完成，准备接收请求")
-    logger.info("=" * 60)
+    model_state = "warming"
+    start = time.perf_counter()
+    try:
+        warmup_model(model_data, WARMUP_BATCH_SIZES, WARMUP_ROUNDS)
+    except Exception as e:
+        # 预热失败不影响服务，只是首批请求会慢一些
+        logger.error(f"✗ 模型预热失败: {str(e)}")
+        logger.exception(e)
+    warmup_seconds = time.perf_counter() - start
+    metrics.WARMUP_SECONDS.set(warmup_seconds)
+    metrics.MODEL_READY.set(1)
+    model_state = "ready"
+    logger.info(f"✓ 模型预热完成，耗时 {warmup_seconds:.3f} 秒（批量大小 {WARMUP_BATCH_SIZES} × {WARMUP_ROUNDS} 轮），服务就绪")
+
+def load_surface(data):
+    """
+    取模型文件中的响应面，没有则现场构建；模型不是两输入或构建失败时返回 None（全部走模型预测）
+    """
+    from response_surface import ResponseSurface
+    
+    found = data.get('surface')
+    if found is not None and found.inputs == list(data['inputs']):
+        logger.info(f"  响应面: 使用模型文件中的 {found.shape[0]}×{found.shape[1]} 网格")
+    elif len(data['inputs']) != 2:
+        logger.warning(f"⚠ 响应面只支持两个输入的模型（当前 {len(data['inputs'])} 个），全部走模型预测")
+        return None
+    else:
+        start = time.perf_counter()
+        try:
+            found = ResponseSurface.build(data['model'], data['inputs'], SURFACE_RESOLUTION)
+        except Exception as e:
+            logger.error(f"✗ 响应面构建失败，全部走模型预测: {str(e)}")
+            return None
+        logger.info(f"  响应面: 构建 {SURFACE_RESOLUTION}×{SURFACE_RESOLUTION} 网格，"
+                    f"耗时 {time.perf_counter() - start:.2f} 秒")
+    logger.info(f"  响应面: {found.nbytes / 1024:.0f}KB，容差 {SURFACE_TOLERANCE:.2%} 下"
+                f"网格单元覆盖率 {found.coverage(SURFACE_TOLERANCE):.1%}")
+    return found
+
+def forest_predict(model, X):
+    """按并行策略执行模型预测"""
+    if PREDICT_MAX_THREADS <= 0:
+        return model.predict(X)
+    return predict_with_threads(model, X, PREDICT_MAX_THREADS, PREDICT_PARALLEL_MIN_ROWS)
+
+def run_predict(model, X, fast=False):
+    """执行预测：fast 时用代理模型；启用响应面时先查表，未命中的行回退到模型"""
+    if fast:
+        metrics.SURROGATE_ROWS.inc(len(X))
+        return surrogate.predict(X.to_numpy(dtype=float))
+    if surface is None:
+        return forest_predict(model, X)
+    predictions, hit = surface.predict(
+        X.to_numpy(dtype=float), lambda mask: forest_predict(model, X[mask]), SURFACE_TOLERANCE)
+    n_hit = int(hit.sum())
+    metrics.SURFACE_ROWS.inc(n_hit, result="hit")
+    metrics.SURFACE_ROWS.inc(len(hit) - n_hit, result="fallback")
+    return predictions
+
+async def coalesced(X, mode, fn):
+    """
+    合并进行中的相同预测：键为模型版本、预测模式与规范化后的输入矩阵（按模型输入列顺序的 float64 值，
+    -0.0 与 0.0 视为相同）；PREDICT_COALESCE=0 时直接在当前线程计算
+    """
+    if not PREDICT_COALESCE:
+        return fn()
+    values = X.to_numpy(dtype=float) + 0.0
+    key = (model_version, mode, values.shape, values.tobytes())
+    result, shared = await inflight.do(key, fn)
+    metrics.COALESCED_REQUESTS.inc(result="shared" if shared else "computed")
+    computed = metrics.COALESCED_REQUESTS.value(result="computed")
+    shared_total = metrics.COALESCED_REQUESTS.value(result="shared")
+    metrics.COALESCE_RATIO.set(shared_total / (computed + shared_total))
+    return result
+
+def dedup_predict(fn, X, fast=False):
+    """
+    按 PREDICT_DEDUP 去重后执行预测，记录不同输入行数与重复率（由批量与文件接口放到线程池中执行，
+    预测期间不阻塞事件循环）
+
+    参数:
+        fn: 预测函数，接受输入DataFrame
+        X: 输入DataFrame
+        fast: 是否为 fast 模式（不去重）
+
+    返回:
+        (预测结果, 不同输入行数)
+    """
+    if not PREDICT_DEDUP or fast:
+        return fn(X), len(X)
+    result, n_unique = predict_unique(fn, X)
+    metrics.DEDUP_ROWS.inc(n_unique, result="unique")
+    metrics.DEDUP_ROWS.inc(len(X) - n_unique, result="duplicate")
+    unique_total = metrics.DEDUP_ROWS.value(result="unique")
+    duplicate_total = metrics.DEDUP_ROWS.value(result="duplicate")
+    metrics.DEDUP_RATIO.set(duplicate_total / max(unique_total + duplicate_total, 1))
+    return result, n_unique
+
+def check_fast(fast: bool, quantiles=None):
+    """检查 fast 模式是否可用：模型文件须含代理模型，且不能与不确定性模式同时使用"""
+    if not fast:
+        return
+    if surrogate is None:
+        raise HTTPException(status_code=400, detail="当前模型没有代理模型，请训练时加 --surrogate")
+    if quantiles is not None:
+        raise HTTPException(status_code=400, detail="fast 模式不能与 uncertainty 同时使用")
+
+def resolve_quantiles(uncertainty: bool, quantiles: str):
+    """不确定性模式的分位数；未开启时返回 None"""
+    if not uncertainty:
+        return None
+    if not supports_uncertainty(model_data['model']):
+        raise HTTPException(status_code=400, detail="当前模型不支持不确定性模式（需要随机森林模型）")
+    try:
+        return parse_quantiles(quantiles)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def run_uncertainty(model, X, quantiles):
+    """
+    按并行策略计算均值、各树预测的标准差与分位数（始终使用完整模型，不经过响应面）
+    """
+    if PREDICT_MAX_THREADS <= 0:
+        return predict_uncertainty(model, X, quantiles)
+    import joblib
+    with joblib.parallel_config(n_jobs=choose_n_jobs(len(X), PREDICT_MAX_THREADS, PREDICT_PARALLEL_MIN_ROWS)):
+        return predict_uncertainty(model, X, quantiles)
+
+def uncertainty_records(outputs, result):
+    """将 predict_uncertainty 的结果转为 [{输出列: {"std": ..., "q5": ...}}, ...]"""
+    parts = [("std", result["std"].tolist())]
+    parts += [(quantile_label(q), values.tolist()) for q, values in result["quantiles"].items()]
+    return [
+        {name: {label: values[r][i] for label, values in parts} for i, name in enumerate(outputs)}
+        for r in range(len(result["std"]))
+    ]
+
+# format 查询参数说明（也可用 Accept 头选择）
+FORMAT_HELP = "响应格式：json（默认）/ columnar / msgpack / binary，优先于 Accept 头"
+
+def response_format(request: Request, fmt: Optional[str]):
+    """按 format 参数或 Accept 头确定响应格式，无法满足时返回 406"""
+    try:
+        return serialization.negotiate(request.headers.get("accept"), fmt)
+    except serialization.UnsupportedFormat as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+def result_table(outputs, predictions, spread=None, leading=None):
+    """
+    组装非默认格式的结果表：可选的前置列（如输入列）+ 输出列 + 不确定性列
+    
+    参数:
+        outputs: 输出列名列表
+        predictions: (样本数, 输出数) 的预测矩阵
+        spread: predict_uncertainty 的结果（可选）
+        leading: [(列名, 一维数组), ...]（可选）
+    
+    返回:
+        (列名列表, (样本数, 列数) 的矩阵)
+    """
+    import numpy as np
+    
+    predictions = np.asarray(predictions, dtype=float).reshape(len(predictions), -1)
+    names = [name for name, _ in leading or []] + list(outputs)
+    parts = [np.asarray(values, dtype=float).reshape(-1, 1) for _, values in leading or []] + [predictions]
+    if spread is not None:
+        extra = uncertainty_columns(outputs, spread)
+        names += list(extra)
+        parts += [values.reshape(-1, 1) for values in extra.values()]
+    return names, np.hstack(parts)
+
+def encoded_response(fmt, columns, matrix):
+    """按 columnar / msgpack / binary 编码结果表"""
+    body, media_type = serialization.encode(fmt, columns, matrix)
+    return Response(content=body, media_type=media_type)
+
+def prediction_records(outputs, predictions):
+    """将 (样本数, 输出数) 的预测矩阵转为 [{输出列: 值}, ...]"""
+    return [dict(zip(outputs, row)) for row in predictions.tolist()]
+
+def warmup_model(data, batch_sizes, rounds):
+    """
+    用合成输入执行预测，提前创建线程池、加载模型内存页并预热请求校验与序列化代码
+    
+    参数:
+        data: 模型字典（含 model、inputs、outputs）
+        batch_sizes: 预热使用的批量大小列表
+        rounds: 预热轮数
+    """
+    model = data['model']
+    inputs = data['inputs']
+    outputs = data['outputs']
+    for _ in range(rounds):
+        for size in batch_sizes:
+            # 与批量接口相同的路径：请求校验 → 组装输入 → 预测 → 序列化
+            batch = BatchPredictRequest(items=[
+                {"load": 0.5 + (i % 10) * 0.25, "frequency": 0.5 + (i % 7) * 0.25} for i in range(size)
+            ])
+            rows = [build_input_dict(inputs, item) for item in batch.items]
+            X = prepare_input_data(rows, inputs)
+            predictions = run_predict(model, X)
+            JSONResponse(content=prediction_records(outputs, predictions))
 
 # 生成JWT token
-def create_access_token(username: str):
+def create_access_token(username: str, lane: str = "batch"):
     expire = datetime.utcnow() + timedelta(hours=24)
     payload = {
         "sub": username,
+        "lane": lane,
         "exp": expire
     }
+    from jose import jwt
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
-# 验证JWT token
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer())):
-    try:
+# 认证 JWT token（或 API Key），返回 (用户名, 准入通道)
+# 准入通道由服务端签发的凭据决定，不信任客户端的请求头：前端页面登录签发的 token 带 lane=interactive 声明，
+# 其他 token（包括脚本登录）与 API Key 客户端为 batch
+def authenticate(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+                 api_key: Optional[str] = Depends(api_key_scheme)):
+    with metrics.STAGE_LATENCY.time(stage="auth"):
+        if credentials is None:
+            if api_key and len(api_keys):
+                client_name = api_keys.lookup(api_key)
+                if client_name is None:
+                    raise HTTPException(status_code=401, detail="无效的API Key")
+                return client_name, "batch"
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
+        digest = token_digest(token)
+        if token_cache.is_revoked(digest):
+            raise HTTPException(status_code=401, detail="Token已注销")
+        identity = token_cache.get(digest)
+        if identity is not None:
+            return identity
+        
+        from jose import jwt
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username = payload.get("sub")
+            if username is None:
+                raise HTTPException(status_code=401, detail="无效的token")
+            identity = (username, "interactive" if payload.get("lane") == "interactive" else "batch")
+            token_cache.put(digest, identity, payload.get("exp"))
+            return identity
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token已过期")
+        except jwt.JWTError:
             raise HTTPException(status_code=401, detail="无效的token")
-        return username
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token已过期")
-    except jwt.JWTError:
-        raise HTTPException(status_code=401, detail="无效的token")
+
+# 验证JWT token（或 API Key），返回用户名
+def verify_token(identity: tuple = Depends(authenticate)):
+    return identity[0]
+
+# 预测接口的准入控制：在认证之后按认证方式确定的通道申请名额，请求处理完毕后释放
+async def admit(identity: tuple = Depends(authenticate)):
+    username, lane = identity
+    try:
+        admission.acquire(username, lane)
+    except Rejected as e:
+        metrics.ADMISSION_DECISIONS.inc(lane=lane, result=e.reason)
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+    metrics.ADMISSION_DECISIONS.inc(lane=lane, result="admitted")
+    metrics.ADMISSION_IN_FLIGHT.set(admission.in_flight(lane), lane=lane)
+    metrics.ADMISSION_CLIENTS.set(admission.clients())
+    try:
+        yield username
+    finally:
+        admission.release(lane)
+        metrics.ADMISSION_IN_FLIGHT.set(admission.in_flight(lane), lane=lane)
 
 # 登录接口
 @app.post("/api/login")
@@ -197,8 +645,9 @@ async def login(login_data: LoginRequest):
     password = login_data.password
     
     if username in USERS and USERS[username] == password:
-        token = create_access_token(username)
-        logger.info(f"[登录] 登录成功: {username}")
+        lane = "interactive" if login_data.client == "web" else "batch"
+        token = create_access_token(username, lane)
+        logger.info(f"[登录] 登录成功: {username}（准入通道 {lane}）")
         return {
             "success": True,
             "token": token,
@@ -211,76 +660,307 @@ async def login(login_data: LoginRequest):
             detail="用户名或密码错误"
         )
 
+# 根据模型输入列组装输入数据
+def build_input_dict(inputs, predict_data: PredictRequest):
+    # 构建输入数据字典
+    return map_inputs(inputs, predict_data.load, predict_data.frequency)
+
+def map_inputs(inputs, load, frequency):
+    # 把载荷、频率（标量或数组）分配到模型输入列
+    # 需要匹配模型的输入列名（可能是"载荷"、"频率"或英文列名）
+    input_dict = {}
+    
+    # 尝试匹配输入列名（支持中英文）
+    for col in inputs:
+        col_lower = col.lower()
+        if any(keyword in col_lower for keyword in ['load', '载荷', '载重', 'payload']):
+            input_dict[col] = load
+        elif any(keyword in col_lower for keyword in ['freq', 'frequency', '频率', '倍数']):
+            input_dict[col] = frequency
+        else:
+            # 如果无法匹配，使用第一个输入列作为载荷，第二个作为频率
+            # 这是一个fallback策略
+            pass
+    
+    # 如果匹配失败，按顺序分配（假设第一个是载荷，第二个是频率）
+    if len(input_dict) < len(inputs):
+        for i, col in enumerate(inputs):
+            if col not in input_dict:
+                if i == 0:
+                    input_dict[col] = load
+                elif i == 1:
+                    input_dict[col] = frequency
+                else:
+                    input_dict[col] = 0  # 默认值
+    
+    return input_dict
+
+# 注销接口：使当前 token 立即失效
+@app.post("/api/logout")
+async def logout(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+                 username: str = Depends(verify_token)):
+    if credentials is None:
+        raise HTTPException(status_code=400, detail="API Key 不支持注销")
+    from jose import jwt
+    claims = jwt.get_unverified_claims(credentials.credentials)
+    token_cache.revoke(token_digest(credentials.credentials), claims.get("exp"))
+    logger.info(f"[注销] 用户已注销: {username}")
+    return {"success": True, "message": "已注销"}
+
 # 预测接口
 @app.post("/api/predict", response_model=PredictResponse)
-async def predict(predict_data: PredictRequest, username: str = Depends(verify_token)):
+async def predict(predict_data: PredictRequest, request: Request, username: str = Depends(admit),
+                  uncertainty: bool = Query(False, description="返回各树预测的标准差与分位数"),
+                  quantiles: str = Query("0.05,0.95", description="不确定性模式的分位数，逗号分隔"),
+                  fast: bool = Query(False, description=FAST_HELP),
+                  fmt: Optional[str] = Query(None, alias="format", description=FORMAT_HELP)):
     global model_data
     
     if model_data is None:
         raise HTTPException(status_code=500, detail="模型未加载，请检查模型文件")
+    qs = resolve_quantiles(uncertainty, quantiles)
+    check_fast(fast, qs)
+    fmt = response_format(request, fmt)
     
     try:
         model = model_data['model']
         inputs = model_data['inputs']
         outputs = model_data['outputs']
         
-        # 构建输入数据字典
-        # 需要匹配模型的输入列名（可能是"载荷"、"频率"或英文列名）
-        input_dict = {}
+        with metrics.STAGE_LATENCY.time(stage="input"):
+            input_dict = build_input_dict(inputs, predict_data)
+            # 准备输入数据
+            X = prepare_input_data(input_dict, inputs)
         
-        # 尝试匹配输入列名（支持中英文）
-        for col in inputs:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in ['load', '载荷', '载重', 'payload']):
-                input_dict[col] = predict_data.load
-            elif any(keyword in col_lower for keyword in ['freq', 'frequency', '频率', '倍数']):
-                input_dict[col] = predict_data.frequency
+        # 进行预测
+        with metrics.STAGE_LATENCY.time(stage="predict"):
+            if qs is None:
+                predictions = await coalesced(X, ("fast",) if fast else ("model",),
+                                              lambda: run_predict(model, X, fast))
             else:
-                # 如果无法匹配，使用第一个输入列作为载荷，第二个作为频率
-                # 这是一个fallback策略
-                pass
+                spread = await coalesced(X, ("uncertainty",) + qs, lambda: run_uncertainty(model, X, qs))
+                predictions = spread["mean"]
         
-        # 如果匹配失败，按顺序分配（假设第一个是载荷，第二个是频率）
-        if len(input_dict) < len(inputs):
-            for i, col in enumerate(inputs):
-                if col not in input_dict:
-                    if i == 0:
-                        input_dict[col] = predict_data.load
-                    elif i == 1:
-                        input_dict[col] = predict_data.frequency
-                    else:
-                        input_dict[col] = 0  # 默认值
+        # 构建结果字典并序列化（直接返回 JSONResponse，使序列化耗时可被统计）
+        with metrics.STAGE_LATENCY.time(stage="serialize"):
+            if fmt != "json":
+                return encoded_response(fmt, *result_table(outputs, predictions, spread if qs is not None else None))
+            result_dict = {}
+            for i, output_name in enumerate(outputs):
+                result_dict[output_name] = float(predictions[0][i])
+            
+            content = {
+                "predictions": result_dict,
+                "input_data": {
+                    "load": predict_data.load,
+                    "frequency": predict_data.frequency
+                }
+            }
+            if qs is not None:
+                content["uncertainty"] = uncertainty_records(outputs, spread)[0]
+            return JSONResponse(content=content)
         
-        # 准备输入数据
-        X = prepare_input_data(input_dict, inputs)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"预测失败: {str(e)}")
+
+# 批量预测接口：一次请求预测多组载荷和频率
+@app.post("/api/predict/batch", response_model=BatchPredictResponse)
+async def predict_batch(batch: BatchPredictRequest, request: Request, username: str = Depends(admit),
+                        uncertainty: bool = Query(False, description="返回各树预测的标准差与分位数"),
+                        quantiles: str = Query("0.05,0.95", description="不确定性模式的分位数，逗号分隔"),
+                        fast: bool = Query(False, description=FAST_HELP),
+                        fmt: Optional[str] = Query(None, alias="format", description=FORMAT_HELP)):
+    if model_data is None:
+        raise HTTPException(status_code=500, detail="模型未加载，请检查模型文件")
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="items 不能为空")
+    qs = resolve_quantiles(uncertainty, quantiles)
+    check_fast(fast, qs)
+    fmt = response_format(request, fmt)
+    
+    try:
+        model = model_data['model']
+        inputs = model_data['inputs']
+        outputs = model_data['outputs']
         
-        # 进行预测
-        predictions = model.predict(X)
+        with metrics.STAGE_LATENCY.time(stage="input"):
+            rows = [build_input_dict(inputs, item) for item in batch.items]
+            X = prepare_input_data(rows, inputs)
         
-        # 构建结果字典
-        result_dict = {}
-        for i, output_name in enumerate(outputs):
-            result_dict[output_name] = float(predictions[0][i])
+        with metrics.STAGE_LATENCY.time(stage="predict"):
+            if qs is None:
+                predictions, n_unique = await run_in_threadpool(
+                    dedup_predict, lambda rows: run_predict(model, rows, fast), X, fast)
+            else:
+                spread, n_unique = await run_in_threadpool(
+                    dedup_predict, lambda rows: run_uncertainty(model, rows, qs), X)
+                predictions = spread["mean"]
         
-        return PredictResponse(
-            predictions=result_dict,
-            input_data={
-                "load": predict_data.load,
-                "frequency": predict_data.frequency
-            }
-        )
+        with metrics.STAGE_LATENCY.time(stage="serialize"):
+            if fmt != "json":
+                return encoded_response(fmt, *result_table(outputs, predictions, spread if qs is not None else None))
+            result = prediction_records(outputs, predictions)
+            content = {"count": len(result), "unique": n_unique, "predictions": result}
+            if qs is not None:
+                content["uncertainty"] = uncertainty_records(outputs, spread)
+            return JSONResponse(content=content)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"预测失败: {str(e)}")
+
+def sweep_axis(name, r: SweepRange):
+    """
+    按起点、终点与步长或点数生成扫描坐标轴
+    
+    参数:
+        name: 输入名称（用于错误信息）
+        r: 取值范围
+    
+    返回:
+        坐标轴数组
+    """
+    import numpy as np
+    
+    stop = r.start if r.stop is None else r.stop
+    if r.step is not None and r.count is not None:
+        raise HTTPException(status_code=400, detail=f"{name}: step 与 count 只能指定一个")
+    if not all(math.isfinite(v) for v in (r.start, stop, 1.0 if r.step is None else r.step)):
+        raise HTTPException(status_code=400, detail=f"{name}: 起点、终点与步长必须是有限数值")
+    if r.count is not None:
+        if r.count < 1:
+            raise HTTPException(status_code=400, detail=f"{name}: count 必须大于0")
+        if r.count > SWEEP_MAX_POINTS:
+            raise HTTPException(status_code=400, detail=f"{name}: 点数 {r.count} 超过上限 {SWEEP_MAX_POINTS}")
+        return np.linspace(r.start, stop, r.count)
+    if r.step is None:
+        if stop != r.start:
+            raise HTTPException(status_code=400, detail=f"{name}: 起点与终点不同时需要指定 step 或 count")
+        return np.array([r.start])
+    if r.step == 0 or (stop - r.start) * r.step < 0:
+        raise HTTPException(status_code=400, detail=f"{name}: step 必须非零且方向与起点到终点一致")
+    # 终点在浮点误差范围内时包含终点（先按浮点数比较，避免极小步长时转换整数溢出）
+    n = np.floor((stop - r.start) / r.step + 1e-9) + 1
+    if not n <= SWEEP_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"{name}: 点数 {n:g} 超过上限 {SWEEP_MAX_POINTS}")
+    return r.start + r.step * np.arange(int(n))
+
+# 扫描预测接口：服务端按载荷×频率的笛卡尔网格一次性预测，按列返回，用于绘制预测曲线/曲面
+@app.post("/api/predict/sweep", response_model=SweepResponse)
+async def predict_sweep(sweep: SweepRequest, request: Request, username: str = Depends(admit),
+                        fast: bool = Query(False, description=FAST_HELP),
+                        fmt: Optional[str] = Query(None, alias="format", description=FORMAT_HELP)):
+    if model_data is None:
+        raise HTTPException(status_code=500, detail="模型未加载，请检查模型文件")
+    check_fast(fast)
+    fmt = response_format(request, fmt)
+    
+    import numpy as np
+    import pandas as pd
+    
+    with metrics.STAGE_LATENCY.time(stage="input"):
+        # 各坐标轴先单独校验点数，网格点数在生成网格前校验
+        load_axis = sweep_axis("load", sweep.load)
+        freq_axis = sweep_axis("frequency", sweep.frequency)
+        count = len(load_axis) * len(freq_axis)
+        if count > SWEEP_MAX_POINTS:
+            raise HTTPException(status_code=400, detail=f"网格点数 {count} 超过上限 {SWEEP_MAX_POINTS}")
+        try:
+            load_grid, freq_grid = np.meshgrid(load_axis, freq_axis, indexing="ij")
+            # 复用单点接口的列名匹配规则，把载荷、频率网格分配到模型输入列
+            columns = map_inputs(model_data['inputs'], load_grid.ravel(), freq_grid.ravel())
+            X = pd.DataFrame({col: np.broadcast_to(np.asarray(v, dtype=float), count)
+                              for col, v in columns.items()}, columns=model_data['inputs'])
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"无法生成扫描网格: {str(e)}")
+    
+    try:
+        with metrics.STAGE_LATENCY.time(stage="predict"):
+            predictions = await run_in_threadpool(run_predict, model_data['model'], X, fast)
+            predictions = np.asarray(predictions).reshape(count, -1)
         
+        with metrics.STAGE_LATENCY.time(stage="serialize"):
+            if fmt != "json":
+                return encoded_response(fmt, *result_table(
+                    model_data['outputs'], predictions,
+                    leading=[("load", load_grid.ravel()), ("frequency", freq_grid.ravel())]))
+            return JSONResponse(content={
+                "count": count,
+                "shape": [len(load_axis), len(freq_axis)],
+                "load": load_axis.tolist(),
+                "frequency": freq_axis.tolist(),
+                "outputs": {name: predictions[:, i].tolist() for i, name in enumerate(model_data['outputs'])},
+            })
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"预测失败: {str(e)}")
 
-# 健康检查接口
+# 文件预测接口：上传 CSV/Excel，列名需包含模型的输入列
+@app.post("/api/predict/file")
+async def predict_file(request: Request, file: UploadFile = File(...), username: str = Depends(admit),
+                       uncertainty: bool = Query(False, description="每行额外返回各树预测的标准差与分位数列"),
+                       quantiles: str = Query("0.05,0.95", description="不确定性模式的分位数，逗号分隔"),
+                       fast: bool = Query(False, description=FAST_HELP),
+                       fmt: Optional[str] = Query(None, alias="format", description=FORMAT_HELP)):
+    if model_data is None:
+        raise HTTPException(status_code=500, detail="模型未加载，请检查模型文件")
+    qs = resolve_quantiles(uncertainty, quantiles)
+    check_fast(fast, qs)
+    fmt = response_format(request, fmt)
+    
+    import pandas as pd
+    
+    with metrics.STAGE_LATENCY.time(stage="input"):
+        content = await file.read()
+        try:
+            input_df = read_input_file(io.BytesIO(content), file.filename)
+            X = prepare_input_data(input_df, model_data['inputs'])
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"无法读取输入文件: {str(e)}")
+    
+    try:
+        with metrics.STAGE_LATENCY.time(stage="predict"):
+            extra = {}
+            model = model_data['model']
+            if qs is None:
+                predictions, n_unique = await run_in_threadpool(
+                    dedup_predict, lambda rows: run_predict(model, rows, fast), X, fast)
+            else:
+                spread, n_unique = await run_in_threadpool(
+                    dedup_predict, lambda rows: run_uncertainty(model, rows, qs), X)
+                predictions = spread["mean"]
+                extra = uncertainty_columns(model_data['outputs'], spread)
+        
+        with metrics.STAGE_LATENCY.time(stage="serialize"):
+            if fmt != "json":
+                return encoded_response(fmt, *result_table(
+                    model_data['outputs'], predictions, spread if qs is not None else None,
+                    leading=[(col, X[col].to_numpy()) for col in model_data['inputs']]))
+            result_df = pd.DataFrame(predictions, columns=model_data['outputs'], index=X.index)
+            if extra:
+                result_df = pd.concat([result_df, pd.DataFrame(extra, index=X.index)], axis=1)
+            full_result = pd.concat([X, result_df], axis=1)
+            return JSONResponse(content={
+                "count": len(full_result),
+                "unique": n_unique,
+                "inputs": model_data['inputs'],
+                "outputs": model_data['outputs'],
+                "rows": full_result.to_dict(orient="records"),
+            })
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"预测失败: {str(e)}")
+
+# 健康检查接口（存活探针：服务进程可响应即返回 200，status 反映模型状态）
 @app.get("/api/health")
 async def health_check():
     """健康检查端点，用于验证服务是否正常运行"""
-    logger.info("[健康检查] 收到健康检查请求")
+    if not request_logging.structured:
+        logger.info("[健康检查] 收到健康检查请求")
     result = {
-        "status": "ok",
+        "status": "ok" if model_state == "ready" else model_state,
         "model_loaded": model_data is not None,
+        "ready": model_state == "ready",
+        "warmup_seconds": warmup_seconds,
         "timestamp": datetime.now().isoformat()
     }
     if model_data is not None:
@@ -288,18 +968,64 @@ async def health_check():
             "inputs": model_data['inputs'],
             "outputs": model_data['outputs']
         }
-    logger.info(f"[健康检查] 返回结果: {result}")
+        result["manifest_ok"] = None if model_data['manifest'] is None else not model_data['manifest_problems']
+    elif model_manifest is not None:
+        # 模型还在加载，先用清单回答
+        result["model_info"] = {
+            "inputs": model_manifest.get('inputs'),
+            "outputs": model_manifest.get('outputs')
+        }
+    if not request_logging.structured:
+        logger.info(f"[健康检查] 返回结果: {result}")
     return result
 
+# 就绪检查接口（就绪探针：模型加载并预热完成后返回 200，否则 503）
+@app.get("/api/ready")
+async def readiness_check():
+    if model_state != "ready":
+        return JSONResponse(status_code=503, content={"ready": False, "status": model_state})
+    return {"ready": True, "status": model_state, "warmup_seconds": warmup_seconds}
+
+# 指标接口（Prometheus 文本格式）
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 # 获取模型信息接口
 @app.get("/api/model-info")
 async def get_model_info(username: str = Depends(verify_token)):
-    if model_data is None:
+    manifest = model_data['manifest'] if model_data is not None else model_manifest
+    if model_data is None and manifest is None:
         raise HTTPException(status_code=500, detail="模型未加载")
     
+    source = model_data if model_data is not None else manifest
+    info = {
+        "inputs": source['inputs'],
+        "outputs": source['outputs']
+    }
+    if manifest is not None:
+        info["manifest"] = {key: manifest.get(key) for key in (
+            "created_at", "model_type", "backend", "n_trees", "file_size", "compression", "surface",
+            "surrogate", "data", "metrics")}
+    if surrogate is not None:
+        info["fast"] = surrogate.summary()
+    return info
+
+# 模型列表接口：只读取模型目录下的清单，不加载模型
+@app.get("/api/models")
+async def get_models(username: str = Depends(verify_token)):
+    entries = list_models(os.path.dirname(MODEL_PATH))
     return {
-        "inputs": model_data['inputs'],
-        "outputs": model_data['outputs']
+        "active": os.path.basename(MODEL_PATH),
+        "models": [
+            {
+                "file": os.path.basename(e["path"]),
+                "ok": not e["problems"],
+                "problems": e["problems"],
+                "manifest": e["manifest"],
+            }
+            for e in entries
+        ],
     }
 
 # 为 React Router 提供支持：所有非 API 路径返回 index.html
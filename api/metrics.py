@@ -0,0 +1,198 @@
+# metrics.py
+# Prometheus 格式的指标
+# 提供计数器、仪表盘和直方图，以文本格式输出供 /metrics 接口使用（不依赖 prometheus_client）
+
+import threading
+import time
+from contextlib import contextmanager
+
+# 延迟直方图的默认分桶（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """指标基类：按标签值组合分别保存数据"""
+
+    type_name = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """可任意设置的瞬时值"""
+
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+class Histogram(_Metric):
+    """累积分桶直方图"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """记录 with 代码块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """输出 Prometheus 文本格式"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# 全局注册表
+REGISTRY = Registry()
+
+# Prometheus 文本格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "predictflow_request_duration_seconds", "端到端请求耗时", ("method", "endpoint"))
+REQUEST_COUNT = REGISTRY.counter(
+    "predictflow_requests_total", "请求数（按接口与状态码）", ("method", "endpoint", "status"))
+STAGE_LATENCY = REGISTRY.histogram(
+    "predictflow_stage_duration_seconds", "预测请求各阶段耗时（auth/input/predict/serialize）", ("stage",))
+MODEL_SIZE = REGISTRY.gauge("predictflow_model_size_bytes", "已加载模型文件大小（字节）")
+MODEL_TREES = REGISTRY.gauge("predictflow_model_trees", "已加载模型中树的总数")
+MODEL_READY = REGISTRY.gauge("predictflow_model_ready", "模型已加载并完成预热时为 1")
+WARMUP_SECONDS = REGISTRY.gauge("predictflow_warmup_seconds", "启动预热耗时（秒）")
+SURFACE_ROWS = REGISTRY.counter(
+    "predictflow_surface_rows_total", "响应面查表的预测行数（hit 为查表命中，fallback 为回退到模型）", ("result",))
+SURROGATE_ROWS = REGISTRY.counter(
+    "predictflow_surrogate_rows_total", "fast 模式下由蒸馏代理模型预测的行数")
+COALESCED_REQUESTS = REGISTRY.counter(
+    "predictflow_coalesced_requests_total",
+    "启用请求合并时 /api/predict 的预测次数（computed 为实际计算，shared 为共享进行中的相同计算）", ("result",))
+COALESCE_RATIO = REGISTRY.gauge(
+    "predictflow_coalesce_ratio", "启动以来共享进行中相同计算的预测请求比例")
+DEDUP_ROWS = REGISTRY.counter(
+    "predictflow_dedup_rows_total",
+    "批量与文件预测启用去重时的输入行数（unique 为实际预测的不同输入，duplicate 为复用结果的重复行）", ("result",))
+DEDUP_RATIO = REGISTRY.gauge(
+    "predictflow_dedup_ratio", "启动以来批量与文件预测中重复输入行的比例")
+ADMISSION_DECISIONS = REGISTRY.counter(
+    "predictflow_admission_total",
+    "预测接口准入结果（admitted 接受，rate_limited 超出用户速率，overloaded 超出并发上限）", ("lane", "result"))
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "predictflow_admission_in_flight", "各通道同时进行的预测请求数", ("lane",))
+ADMISSION_CLIENTS = REGISTRY.gauge(
+    "predictflow_admission_clients", "保留令牌桶的用户数")
@@ -0,0 +1,132 @@
+# request_logging.py
+# 请求日志模式
+# text 模式保持原有的逐行文本日志；json 模式将日志通过队列交给后台线程输出为 JSON，
+# 成功请求按比例采样，健康检查日志限频，降低高频探活时同步写日志的开销
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+# 健康检查与就绪检查接口路径（限频记录）
+HEALTH_PATHS = ("/api/health", "/api/ready")
+
+# 当前配置（由 configure 设置）
+mode = "text"
+sample_rate = 1.0
+structured = False
+health_limiter = None
+
+_listener = None
+_saved_handlers = None
+
+class JsonFormatter(logging.Formatter):
+    """将日志记录格式化为单行 JSON，extra={"fields": {...}} 中的字段合并到输出"""
+
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            data.update(fields)
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class RateLimiter:
+    """限频器：每个时间间隔内最多放行一次"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next:
+                self._next = now + self.interval
+                return True
+            return False
+
+def configure(log_mode="text", rate=0.01, health_interval=60.0, stream=None):
+    """
+    配置日志模式
+
+    参数:
+        log_mode: "text"（原有同步文本日志）或 "json"（队列 + 后台线程输出 JSON）
+        rate: json 模式下成功请求的采样比例（0~1），错误请求总是记录
+        health_interval: json 模式下健康检查日志的最小间隔（秒）
+        stream: 日志输出流（默认 stderr）
+    """
+    global mode, sample_rate, structured, health_limiter, _listener, _saved_handlers
+    if log_mode not in ("text", "json"):
+        raise ValueError(f"不支持的日志模式: {log_mode}")
+    mode = log_mode
+    sample_rate = max(0.0, min(1.0, float(rate)))
+    structured = log_mode == "json"
+    health_limiter = RateLimiter(health_interval)
+
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _saved_handlers is not None:
+        # 恢复切换到 json 模式之前的处理器
+        for h in list(root.handlers):
+            root.removeHandler(h)
+        for h in _saved_handlers:
+            root.addHandler(h)
+        _saved_handlers = None
+    if not structured:
+        return
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+    _listener.start()
+
+    _saved_handlers = list(root.handlers)
+    for h in _saved_handlers:
+        root.removeHandler(h)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+def configure_from_env():
+    """根据环境变量 LOG_MODE、LOG_SAMPLE_RATE、HEALTH_LOG_INTERVAL 配置日志模式"""
+    configure(
+        os.environ.get("LOG_MODE", "text"),
+        float(os.environ.get("LOG_SAMPLE_RATE", "0.01")),
+        float(os.environ.get("HEALTH_LOG_INTERVAL", "60")),
+    )
+
+def should_log_request(path, status_code):
+    """
+    json 模式下判断是否记录该请求
+
+    错误请求（状态码 >= 400）总是记录；健康/就绪检查按时间限频；其他成功请求按比例采样。
+    """
+    if status_code >= 400:
+        return True
+    if path in HEALTH_PATHS:
+        return health_limiter.allow()
+    return sample_rate >= 1.0 or random.random() < sample_rate
+
+def shutdown():
+    """停止后台日志线程并输出队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(shutdown)
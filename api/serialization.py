@@ -0,0 +1,175 @@
+# serialization.py
+# 预测结果序列化
+# 按请求的 Accept 头（或 format 查询参数）选择预测结果的编码：
+#   - json：默认，保持各接口原有的逐行字典格式
+#   - columnar：按列的 JSON，安装了 orjson 时直接序列化 NumPy 数组，否则用标准库 json
+#   - msgpack：与 columnar 相同的结构，用 msgpack 编码（需要安装 msgpack）
+#   - binary：小端 float64 原始数组，前面带 JSON 头
+
+import json
+import struct
+
+import numpy as np
+
+# format 参数取值 -> 响应的 Content-Type
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/vnd.predictflow.columnar+json",
+    "msgpack": "application/msgpack",
+    "binary": "application/vnd.predictflow.f64",
+}
+
+# Accept 头中可识别的媒体类型 -> format
+ACCEPT_FORMATS = {
+    "application/json": "json",
+    "*/*": "json",
+    "application/*": "json",
+    "application/vnd.predictflow.columnar+json": "columnar",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.predictflow.f64": "binary",
+    "application/octet-stream": "binary",
+}
+
+# binary 格式：4 字节魔数 + 小端 uint32 头长度 + UTF-8 JSON 头 + 行优先的小端 float64 矩阵
+BINARY_MAGIC = b"PFB1"
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+class UnsupportedFormat(ValueError):
+    """请求的格式无法识别或所需的库未安装"""
+
+def available_formats():
+    """返回当前环境可用的 format 列表"""
+    return [f for f in MEDIA_TYPES if f != "msgpack" or msgpack is not None]
+
+def negotiate(accept=None, fmt=None):
+    """
+    确定响应格式
+
+    参数:
+        accept: 请求的 Accept 头
+        fmt: format 查询参数（优先于 Accept 头）
+
+    返回:
+        format 名称
+
+    异常:
+        UnsupportedFormat: format 参数无法识别或所需的库未安装
+    """
+    if fmt:
+        fmt = fmt.strip().lower()
+        if fmt not in MEDIA_TYPES:
+            raise UnsupportedFormat(f"不支持的格式: {fmt}，可选: {', '.join(available_formats())}")
+    else:
+        if not accept:
+            return "json"
+        # 按 q 值从高到低取第一个可识别的类型（q 相同时保持原顺序）
+        candidates = []
+        for i, item in enumerate(accept.split(",")):
+            parts = [p.strip() for p in item.split(";")]
+            q = 1.0
+            for param in parts[1:]:
+                if param.startswith("q="):
+                    try:
+                        q = float(param[2:])
+                    except ValueError:
+                        q = 0.0
+            if q > 0 and parts[0].lower() in ACCEPT_FORMATS:
+                candidates.append((-q, i, ACCEPT_FORMATS[parts[0].lower()]))
+        # 没有可识别的类型时使用默认 JSON，不因 Accept 头拒绝已有客户端
+        fmt = min(candidates)[2] if candidates else "json"
+    if fmt == "msgpack" and msgpack is None:
+        raise UnsupportedFormat("服务端未安装 msgpack，请改用 columnar 或 binary")
+    return fmt
+
+def columnar(columns, matrix):
+    """
+    按列组织的结果字典
+
+    参数:
+        columns: 列名列表
+        matrix: (行数, 列数) 的矩阵
+
+    返回:
+        {"count": 行数, "columns": 列名列表, "data": {列名: 一维数组}}
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    return {
+        "count": len(matrix),
+        "columns": list(columns),
+        "data": {name: matrix[:, i] for i, name in enumerate(columns)},
+    }
+
+def encode_columnar_json(columns, matrix, use_orjson=True):
+    """columnar 格式：有 orjson 时直接序列化 NumPy 数组，否则（或 use_orjson=False）转为列表后用标准库 json"""
+    body = columnar(columns, matrix)
+    if use_orjson and orjson is not None:
+        body["data"] = {k: np.ascontiguousarray(v) for k, v in body["data"].items()}
+        return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+    body["data"] = {k: v.tolist() for k, v in body["data"].items()}
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+def encode_msgpack(columns, matrix):
+    """msgpack 格式：结构与 columnar 相同，每列为 float64 数组"""
+    body = columnar(columns, matrix)
+    body["data"] = {k: v.tolist() for k, v in body["data"].items()}
+    return msgpack.packb(body, use_single_float=False)
+
+def encode_binary(columns, matrix):
+    """
+    binary 格式
+
+    布局：b"PFB1" + 小端 uint32 头长度 + JSON 头 {"count", "columns", "dtype": "<f8", "shape"}
+    + 行优先的小端 float64 矩阵（count × len(columns)）
+    """
+    matrix = np.ascontiguousarray(matrix, dtype="<f8").reshape(-1, len(columns))
+    header = json.dumps({
+        "count": len(matrix),
+        "columns": list(columns),
+        "dtype": "<f8",
+        "shape": list(matrix.shape),
+    }, ensure_ascii=False).encode("utf-8")
+    return BINARY_MAGIC + struct.pack("<I", len(header)) + header + matrix.tobytes()
+
+def decode_binary(payload):
+    """
+    解析 binary 格式（供客户端与基准脚本使用）
+
+    返回:
+        (列名列表, (行数, 列数) 的 float64 矩阵)
+    """
+    if payload[:4] != BINARY_MAGIC:
+        raise ValueError("不是 binary 格式的预测结果")
+    (length,) = struct.unpack("<I", payload[4:8])
+    header = json.loads(payload[8:8 + length].decode("utf-8"))
+    matrix = np.frombuffer(payload, dtype=header["dtype"], offset=8 + length).reshape(header["shape"])
+    return header["columns"], matrix
+
+ENCODERS = {
+    "columnar": encode_columnar_json,
+    "msgpack": encode_msgpack,
+    "binary": encode_binary,
+}
+
+def encode(fmt, columns, matrix):
+    """
+    按非默认格式编码
+
+    参数:
+        fmt: columnar / msgpack / binary
+        columns: 列名列表
+        matrix: (行数, 列数) 的矩阵
+
+    返回:
+        (响应体字节串, Content-Type)
+    """
+    return ENCODERS[fmt](columns, matrix), MEDIA_TYPES[fmt]
@@ -0,0 +1,48 @@
+# single_flight.py
+# 并发请求合并（single-flight）
+# 同一时刻到达的相同预测请求（相同的模型版本与规范化后的输入）只计算一次：
+# 第一个请求在线程池中执行计算，其余请求等待并共享同一结果；计算完成后立即移除，不保留结果
+
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+
+class SingleFlight:
+    """
+    按键合并进行中的计算
+
+    计算放在独立的任务中执行，发起请求被取消（如客户端断开）时不影响正在等待的其他请求；
+    计算抛出的异常同样传给所有等待者。
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, fn):
+        """
+        执行或加入键对应的计算
+
+        参数:
+            key: 可哈希的键
+            fn: 无参数的同步函数，在线程池中执行
+
+        返回:
+            (结果, 是否与进行中的相同计算共享)
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(run_in_threadpool(fn))
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task), shared
+
+    def _done(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # 所有等待者都已取消时，避免 asyncio 报告未读取的异常
+            task.exception()
@@ -59,6 +59,9 @@ def main() -> None:
   
   # 使用环境变量（优先级低于命令行参数）
   PORT=8080 python3 predictflow-api.shiv
+  
+  # 高频健康检查场景使用 JSON 异步日志
+  python3 predictflow-api.shiv --log-mode json
         """
     )
     parser.add_argument(
@@ -74,8 +77,19 @@ def main() -> None:
         help="指定监听地址（默认: 0.0.0.0 或环境变量 HOST）"
     )
     
+    parser.add_argument(
+        "--log-mode",
+        choices=["text", "json"],
+        default=None,
+        help="日志模式：text 逐行文本；json 异步队列输出 JSON，成功请求采样、健康检查限频（默认: text 或环境变量 LOG_MODE）"
+    )
+    
     args = parser.parse_args()
     
+    # api.main 导入时读取 LOG_MODE
+    if args.log_mode is not None:
+        os.environ["LOG_MODE"] = args.log_mode
+    
     # 优先级：命令行参数 > 环境变量 > 默认值
     host = args.host if args.host is not None else os.environ.get("HOST", "0.0.0.0")
     port = args.port if args.port is not None else int(os.environ.get("PORT", "8000"))
@@ -96,6 +110,7 @@ def main() -> None:
     if local_ip != "unknown":
         logger.info(f"网络访问: http://{local_ip}:{port}")
     logger.info(f"健康检查: http://{host}:{port}/api/health")
+    logger.info(f"就绪检查: http://{host}:{port}/api/ready")
     logger.info(f"API 文档: http://{host}:{port}/docs")
     logger.info("=" * 60)
     
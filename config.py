@@ -5,6 +5,12 @@
 # 模型配置
 # =============================================
 
+# 模型后端（inspect_and_train.py --backend 的默认值，环境变量 MODEL_BACKEND 优先）：
+#   rf        随机森林（每个输出一个）
+#   hgb       直方图梯度提升（每个输出一个），训练快、模型小
+#   hgb-chain 直方图梯度提升回归链，后面的输出以前面输出的预测值作为额外输入
+MODEL_BACKEND = "rf"
+
 # 随机森林参数
 RF_N_ESTIMATORS = 200      # 树的数量
 RF_MAX_DEPTH = None        # 树的最大深度（None表示不限制）
@@ -14,6 +20,10 @@ RF_MAX_FEATURES = "auto"   # 寻找最佳分割时考虑的特征数量
 RF_N_JOBS = -1             # 并行作业数（-1表示使用所有CPU核心）
 RF_RANDOM_STATE = 42       # 随机种子
 
+# 直方图梯度提升参数（hgb / hgb-chain 后端，同名环境变量优先）
+HGB_MAX_ITER = 200         # 每个输出的提升轮数（样本数超过 1 万时自动早停）
+HGB_LEARNING_RATE = 0.1    # 学习率
+
 # =============================================
 # 数据处理配置
 # =============================================
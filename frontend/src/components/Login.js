@@ -40,9 +40,11 @@ function Login() {
     setLoading(true);
 
     try {
+      // client: 'web' 使签发的 token 使用交互式准入通道
       const response = await axios.post(`${API_BASE_URL}/api/login`, {
         username,
-        password
+        password,
+        client: 'web'
       });
 
       if (response.data.success) {
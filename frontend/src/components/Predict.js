@@ -91,6 +91,8 @@ function Predict() {
         // token过期，跳转到登录页
         localStorage.removeItem('token');
         navigate('/login');
+      } else if (err.response?.status === 429) {
+        setError(err.response.data?.detail || '请求过于频繁，请稍后重试');
       } else {
         setError(err.response?.data?.detail || '预测失败，请检查输入数据');
       }
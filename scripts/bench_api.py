@@ -0,0 +1,312 @@
+# bench_api.py
+# API 压测与延迟基准
+# 功能：在进程内启动服务（或连接已运行的服务），登录后以指定并发驱动单条、批量、文件预测，
+#       输出 p50/p95/p99 延迟、吞吐量和每请求 CPU 时间，并将结果保存为 JSON，便于对比不同模型与服务配置
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SCENARIOS = ("single", "batch", "file")
+
+def free_port():
+    """获取一个空闲的本地端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_in_process_server(port):
+    """
+    在后台线程中启动 uvicorn 服务
+
+    返回:
+        uvicorn.Server（调用 should_exit = True 停止）
+    """
+    import uvicorn
+    # 压测用同一用户发出大量并发请求，进程内启动时默认关闭准入控制（可用环境变量覆盖）
+    os.environ.setdefault("ADMISSION_RATE", "0")
+    os.environ.setdefault("ADMISSION_MAX_CONCURRENT", "0")
+    from api.main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 60
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("服务启动失败")
+        time.sleep(0.05)
+    return server
+
+def process_cpu_seconds(pid):
+    """
+    读取进程累计 CPU 时间（用户态+内核态），仅支持 Linux
+
+    返回:
+        秒数，无法读取时返回 None
+    """
+    if pid is None:
+        return time.process_time()
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = os.sysconf("SC_CLK_TCK")
+        return (int(fields[11]) + int(fields[12])) / ticks
+    except (OSError, IndexError, ValueError):
+        return None
+
+class ApiClient:
+    """基于 http.client 的简单客户端，每个线程一个长连接"""
+
+    def __init__(self, base_url, token=None):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.token = token
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+        return conn
+
+    def request(self, method, path, body=None, content_type="application/json"):
+        """
+        发送请求
+
+        返回:
+            (状态码, 响应字节)
+        """
+        headers = {"Content-Type": content_type}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        conn = self._conn()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        except (http.client.HTTPException, OSError):
+            # 连接被服务端关闭时重建一次
+            conn.close()
+            self._local.conn = None
+            conn = self._conn()
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+
+    def login(self, username, password):
+        status, body = self.request("POST", "/api/login",
+                                    json.dumps({"username": username, "password": password}))
+        if status != 200:
+            raise RuntimeError(f"登录失败: {status} {body[:200]!r}")
+        self.token = json.loads(body)["token"]
+
+def wait_until_ready(client, timeout=300):
+    """轮询 /api/ready，直到模型加载并预热完成"""
+    deadline = time.time() + timeout
+    while True:
+        status, body = client.request("GET", "/api/ready")
+        if status == 200:
+            return json.loads(body)
+        if status != 503 or time.time() > deadline:
+            raise RuntimeError(f"服务未就绪: {status} {body[:200]!r}")
+        time.sleep(0.2)
+
+def random_point(rng):
+    return {"load": round(rng.uniform(0.1, 3.0), 3), "frequency": round(rng.uniform(0.1, 3.0), 3)}
+
+def build_requests(scenario, n, batch_size, file_rows, inputs, seed=0):
+    """
+    预先生成请求体，避免压测时在客户端构造请求
+
+    返回:
+        [(路径, 请求体, Content-Type), ...]
+    """
+    rng = random.Random(seed)
+    result = []
+    for _ in range(n):
+        if scenario == "single":
+            result.append(("/api/predict", json.dumps(random_point(rng)), "application/json"))
+        elif scenario == "batch":
+            items = [random_point(rng) for _ in range(batch_size)]
+            result.append(("/api/predict/batch", json.dumps({"items": items}), "application/json"))
+        else:
+            lines = [",".join(inputs)]
+            for _ in range(file_rows):
+                lines.append(",".join(f"{rng.uniform(0.1, 3.0):.3f}" for _ in inputs))
+            boundary = uuid.uuid4().hex
+            body = (
+                f"--{boundary}\r\n"
+                'Content-Disposition: form-data; name="file"; filename="bench.csv"\r\n'
+                "Content-Type: text/csv\r\n\r\n"
+                + "\n".join(lines) + "\n"
+                f"\r\n--{boundary}--\r\n"
+            ).encode("utf-8")
+            result.append(("/api/predict/file", body, f"multipart/form-data; boundary={boundary}"))
+    return result
+
+def run_scenario(client, scenario, n_requests, concurrency, batch_size, file_rows, inputs, server_pid):
+    """
+    以指定并发执行一个场景
+
+    返回:
+        结果字典（延迟分位数、吞吐量、每请求 CPU 时间、错误数）
+    """
+    import numpy as np
+
+    requests = build_requests(scenario, n_requests, batch_size, file_rows, inputs)
+    # 预热：每个并发连接先发一个请求
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(lambda r: client.request("POST", r[0], r[1], r[2]), requests[:concurrency]))
+
+    latencies = [0.0] * n_requests
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(i):
+        path, body, content_type = requests[i]
+        start = time.perf_counter()
+        status, _ = client.request("POST", path, body, content_type)
+        latencies[i] = time.perf_counter() - start
+        if status != 200:
+            with lock:
+                errors[0] += 1
+
+    cpu_start = process_cpu_seconds(server_pid)
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(worker, range(n_requests)))
+    wall = time.perf_counter() - wall_start
+    cpu_end = process_cpu_seconds(server_pid)
+
+    lat_ms = np.array(latencies) * 1000
+    rows_per_request = {"single": 1, "batch": batch_size, "file": file_rows}[scenario]
+    return {
+        "scenario": scenario,
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "rows_per_request": rows_per_request,
+        "errors": errors[0],
+        "rps": n_requests / wall,
+        "rows_per_s": n_requests * rows_per_request / wall,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "mean_ms": float(lat_ms.mean()),
+        "cpu_ms_per_request": None if cpu_start is None or cpu_end is None
+        else (cpu_end - cpu_start) / n_requests * 1000,
+    }
+
+def print_results(results):
+    print(f"\n{'场景':8s} {'并发':>4s} {'行/请求':>7s} {'请求/s':>9s} {'p50ms':>8s} {'p95ms':>8s} "
+          f"{'p99ms':>8s} {'CPUms/请求':>10s} {'错误':>5s}")
+    for r in results:
+        cpu = "-" if r["cpu_ms_per_request"] is None else f"{r['cpu_ms_per_request']:.2f}"
+        print(f"{r['scenario']:8s} {r['concurrency']:4d} {r['rows_per_request']:7d} {r['rps']:9.1f} "
+              f"{r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {cpu:>10s} {r['errors']:5d}")
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="PredictFlow API 压测与延迟基准",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  1. 进程内启动服务并压测全部场景：
+     python scripts/bench_api.py
+
+  2. 压测已运行的服务（提供服务进程号以统计服务端 CPU）：
+     python scripts/bench_api.py --url http://127.0.0.1:8000 --server-pid 12345
+
+  3. 指定场景与并发：
+     python scripts/bench_api.py --scenarios single,batch --concurrency 1,8,32 --requests 500
+        """
+    )
+    ap.add_argument("--url", default=None, help="已运行服务的地址（默认在进程内启动服务）")
+    ap.add_argument("--server-pid", type=int, default=None,
+                    help="--url 模式下服务进程号，用于统计服务端 CPU 时间（仅 Linux）")
+    ap.add_argument("--username", default="admin", help="登录用户名")
+    ap.add_argument("--password", default="admin123", help="登录密码")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS), help="逗号分隔的场景：single,batch,file")
+    ap.add_argument("--concurrency", default="1,8", help="逗号分隔的并发数列表")
+    ap.add_argument("--requests", type=int, default=200, help="每个场景/并发组合的请求数")
+    ap.add_argument("--batch-size", type=int, default=100, help="batch 场景每个请求的行数")
+    ap.add_argument("--file-rows", type=int, default=1000, help="file 场景每个文件的行数")
+    ap.add_argument("--json-out", default=None,
+                    help="结果 JSON 路径（默认 output/bench/api-<时间>.json）")
+    args = ap.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        print(f"错误：未知场景: {unknown}")
+        sys.exit(1)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    server = None
+    server_pid = args.server_pid
+    if args.url:
+        base_url = args.url.rstrip("/")
+        if server_pid is None:
+            print("提示：未指定 --server-pid，不统计服务端 CPU 时间")
+    else:
+        port = free_port()
+        print(f"在进程内启动服务: 127.0.0.1:{port}（CPU 时间包含压测客户端线程）")
+        server = start_in_process_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        client = ApiClient(base_url)
+        ready = wait_until_ready(client)
+        print(f"服务已就绪（预热耗时 {ready.get('warmup_seconds') or 0:.3f} 秒）")
+        client.login(args.username, args.password)
+        status, body = client.request("GET", "/api/model-info")
+        if status != 200:
+            print(f"错误：无法获取模型信息（{status}），请确认模型已加载")
+            sys.exit(1)
+        model_info = json.loads(body)
+
+        results = []
+        for scenario in scenarios:
+            for concurrency in levels:
+                print(f"运行场景 {scenario}，并发 {concurrency}，请求数 {args.requests} ...")
+                results.append(run_scenario(
+                    client, scenario, args.requests, concurrency,
+                    args.batch_size, args.file_rows, model_info["inputs"],
+                    server_pid if args.url else None,
+                ))
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    print_results(results)
+
+    out_path = args.json_out or os.path.join(
+        "output", "bench", f"api-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "url": base_url,
+            "in_process": server is not None,
+            "model": model_info,
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到: {out_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# bench_auth.py
+# 认证开销基准
+# 功能：直接调用 verify_token，对比完整 JWT 校验、缓存命中与 API Key 三种方式的每次认证耗时
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+BENCH_API_KEY = "bench-key"
+
+def time_calls(fn, n):
+    """调用 fn n 次，返回每次平均耗时（微秒）"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="认证开销基准（JWT 完整校验 / 缓存命中 / API Key）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/bench_auth.py --calls 20000
+        """
+    )
+    ap.add_argument("--calls", type=int, default=20000, help="每种方式的调用次数")
+    ap.add_argument("--json-out", default=None, help="结果保存为 JSON 文件（可选）")
+    args = ap.parse_args()
+
+    from fastapi.security import HTTPAuthorizationCredentials
+    from api import main as api_main
+
+    api_main.api_keys.add("bench", BENCH_API_KEY)
+
+    token = api_main.create_access_token("admin")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def jwt_uncached():
+        api_main.token_cache.clear()
+        api_main.verify_token(credentials, None)
+
+    def jwt_cached():
+        api_main.verify_token(credentials, None)
+
+    def api_key():
+        api_main.verify_token(None, BENCH_API_KEY)
+
+    results = {
+        "jwt_decode_us": time_calls(jwt_uncached, args.calls),
+        "jwt_cached_us": time_calls(jwt_cached, args.calls),
+        "api_key_us": time_calls(api_key, args.calls),
+    }
+
+    print(f"\n=== 每次认证耗时（{args.calls} 次调用） ===")
+    print(f"JWT 完整校验: {results['jwt_decode_us']:8.2f} us")
+    print(f"JWT 缓存命中: {results['jwt_cached_us']:8.2f} us  "
+          f"({results['jwt_decode_us'] / results['jwt_cached_us']:.1f}x)")
+    print(f"API Key:      {results['api_key_us']:8.2f} us")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n结果已保存到: {args.json_out}")
+
+if __name__ == "__main__":
+    main()
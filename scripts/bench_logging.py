@@ -0,0 +1,91 @@
+# bench_logging.py
+# 请求日志开销基准
+# 功能：在进程内驱动 API，对比 text（原中间件）、json（队列+采样）与关闭日志时的每请求耗时和 CPU 时间
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def run_mode(client, mode, paths, n_requests, headers, devnull, sample_rate=0.01):
+    """
+    在指定日志模式下发送请求并计时
+
+    返回:
+        {"mode", "wall_us", "cpu_us"}（每请求平均值）
+    """
+    from api import request_logging
+
+    logging.disable(logging.NOTSET)
+    if mode == "off":
+        request_logging.configure("text")
+        logging.disable(logging.CRITICAL)
+    elif mode == "json":
+        request_logging.configure("json", sample_rate, stream=devnull)
+    else:
+        request_logging.configure("text")
+        for h in logging.getLogger().handlers:
+            if isinstance(h, logging.StreamHandler):
+                h.setStream(devnull)
+
+    for path in paths:
+        client.get(path, headers=headers)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i in range(n_requests):
+        client.get(paths[i % len(paths)], headers=headers)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    request_logging.configure("text")
+    logging.disable(logging.NOTSET)
+    return {"mode": mode, "wall_us": wall / n_requests * 1e6, "cpu_us": cpu / n_requests * 1e6}
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="请求日志开销基准（text / json / off）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/bench_logging.py --requests 2000
+        """
+    )
+    ap.add_argument("--requests", type=int, default=2000, help="每种模式的请求数")
+    ap.add_argument("--sample-rate", type=float, default=0.01, help="json 模式的成功请求采样比例")
+    ap.add_argument("--json-out", default=None, help="结果保存为 JSON 文件（可选）")
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from api.main import app, create_access_token
+
+    # 测试客户端（httpx）自身的请求日志不属于服务端开销
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    headers = {"Authorization": f"Bearer {create_access_token('admin')}"}
+    paths = ["/api/health", "/api/model-info"]
+    results = []
+    with open(os.devnull, "w") as devnull, TestClient(app) as client:
+        # 等待模型在后台加载并预热完成
+        while client.get("/api/ready").status_code == 503:
+            time.sleep(0.2)
+        for mode in ("off", "text", "json"):
+            results.append(run_mode(client, mode, paths, args.requests, headers, devnull, args.sample_rate))
+
+    base = results[0]
+    print(f"\n=== 请求日志开销（{args.requests} 次请求，路径 {paths}） ===")
+    print(f"{'模式':8s} {'耗时us/请求':>12s} {'CPU us/请求':>12s} {'日志开销us':>12s}")
+    for r in results:
+        print(f"{r['mode']:8s} {r['wall_us']:12.1f} {r['cpu_us']:12.1f} {r['cpu_us'] - base['cpu_us']:12.1f}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.json_out}")
+
+if __name__ == "__main__":
+    main()
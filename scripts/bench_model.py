@@ -0,0 +1,204 @@
+# bench_model.py
+# 离线模型基准
+# 功能：逐个加载 models/*.joblib 模型包，测量加载时间、首次预测（预热）开销、
+#       不同批量大小与 n_jobs 设置下的预测延迟和吞吐量，以及每个模型的内存占用，并输出对比表
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from perf_utils import current_rss_mb, format_mb, peak_rss_mb
+
+DEFAULT_MODEL_GLOB = "models/*.joblib"
+DEFAULT_BATCH_SIZES = "1,10,100,1000,10000,100000,1000000"
+DEFAULT_N_JOBS = "1,4,-1"
+
+def make_inputs(n_rows, n_features, data_file=None, seed=0):
+    """
+    生成基准输入
+
+    参数:
+        n_rows: 行数
+        n_features: 特征数
+        data_file: 真实输入文件（可选），有放回地抽取行；默认在 [0.1, 3.0] 内均匀采样
+        seed: 随机种子
+
+    返回:
+        (n_rows, n_features) 的 float64 矩阵
+    """
+    rng = np.random.default_rng(seed)
+    if data_file is None:
+        return rng.uniform(0.1, 3.0, size=(n_rows, n_features))
+    return data_file[rng.integers(0, len(data_file), size=n_rows)]
+
+def time_predict(model, X, time_budget, max_repeat):
+    """
+    重复预测直到用完时间预算（至少一次）
+
+    返回:
+        每次预测耗时列表（秒）
+    """
+    times = []
+    deadline = time.perf_counter() + time_budget
+    while len(times) < max_repeat:
+        start = time.perf_counter()
+        model.predict(X)
+        times.append(time.perf_counter() - start)
+        if time.perf_counter() >= deadline:
+            break
+    return times
+
+def bench_bundle(model_path, batch_sizes, n_jobs_list, time_budget, max_repeat, data_path=None):
+    """
+    在独立进程中测量一个模型包（保证加载时间与内存占用互不影响）
+
+    返回:
+        结果字典
+    """
+    import joblib
+    import pandas as pd
+    from predict import prepare_input_data, read_input_file, set_predict_n_jobs
+    from model_compression import count_trees
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    bundle = joblib.load(model_path)
+    load_s = time.perf_counter() - start
+    rss_loaded = current_rss_mb()
+
+    model = bundle["model"]
+    inputs = bundle["inputs"]
+    data = None
+    if data_path:
+        data = prepare_input_data(read_input_file(data_path), inputs).to_numpy(dtype=np.float64)
+    # 与服务一致，用带列名的 DataFrame 做输入（避免 sklearn 的特征名警告）
+    to_frame = lambda X: pd.DataFrame(X, columns=inputs)
+
+    X1 = to_frame(make_inputs(1, len(inputs), data))
+    start = time.perf_counter()
+    model.predict(X1)
+    warmup_ms = (time.perf_counter() - start) * 1000
+
+    cells = []
+    supports_n_jobs = set_predict_n_jobs(model, n_jobs_list[0])
+    for n_jobs in (n_jobs_list if supports_n_jobs else [None]):
+        if n_jobs is not None:
+            set_predict_n_jobs(model, n_jobs)
+        for size in batch_sizes:
+            X = to_frame(make_inputs(size, len(inputs), data, seed=size))
+            model.predict(X.iloc[:1])
+            times = np.array(time_predict(model, X, time_budget, max_repeat))
+            cells.append({
+                "n_jobs": n_jobs,
+                "batch_size": size,
+                "repeat": len(times),
+                "p50_ms": float(np.percentile(times, 50) * 1000),
+                "p95_ms": float(np.percentile(times, 95) * 1000),
+                "rows_per_s": float(size / np.median(times)),
+            })
+
+    return {
+        "model": model_path,
+        "file_mb": os.path.getsize(model_path) / 1024 / 1024,
+        "model_type": type(model).__name__,
+        "trees": count_trees(model),
+        "compression": bundle.get("compression"),
+        "load_s": load_s,
+        "warmup_ms": warmup_ms,
+        "rss_model_mb": None if rss_before is None else rss_loaded - rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+        "cells": cells,
+    }
+
+def print_bundle(result):
+    """打印单个模型包的批量大小 × n_jobs 表"""
+    print(f"\n=== {result['model']}（{result['model_type']}，{result['trees']} 棵树） ===")
+    print(f"文件 {result['file_mb']:.1f}MB  加载 {result['load_s']:.3f}秒  "
+          f"首次预测 {result['warmup_ms']:.1f}ms  模型内存 {format_mb(result['rss_model_mb'])}  "
+          f"峰值内存 {format_mb(result['peak_rss_mb'])}")
+    print(f"{'n_jobs':>6s} {'批量':>9s} {'次数':>5s} {'p50ms':>10s} {'p95ms':>10s} {'行/秒':>12s}")
+    for c in result["cells"]:
+        n_jobs = "-" if c["n_jobs"] is None else str(c["n_jobs"])
+        print(f"{n_jobs:>6s} {c['batch_size']:9d} {c['repeat']:5d} {c['p50_ms']:10.2f} "
+              f"{c['p95_ms']:10.2f} {c['rows_per_s']:12.0f}")
+
+def print_comparison(results):
+    """打印模型包对比表：单行最低延迟与最高吞吐量"""
+    print("\n=== 模型对比 ===")
+    print(f"{'模型':30s} {'树':>5s} {'文件MB':>7s} {'加载秒':>7s} {'预热ms':>8s} {'内存MB':>8s} "
+          f"{'单行p50ms':>10s} {'最高行/秒':>12s}")
+    for r in results:
+        single = [c for c in r["cells"] if c["batch_size"] == 1]
+        best_single = min((c["p50_ms"] for c in single), default=float("nan"))
+        best_rate = max((c["rows_per_s"] for c in r["cells"]), default=float("nan"))
+        rss = "-" if r["rss_model_mb"] is None else f"{r['rss_model_mb']:.1f}"
+        print(f"{os.path.basename(r['model']):30s} {r['trees']:5d} {r['file_mb']:7.1f} {r['load_s']:7.3f} "
+              f"{r['warmup_ms']:8.1f} {rss:>8s} {best_single:10.2f} {best_rate:12.0f}")
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="离线模型基准：加载时间、预热开销、批量大小 × n_jobs 的延迟与吞吐量、内存占用",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  1. 测量 models/ 下的全部模型包：
+     python scripts/bench_model.py
+
+  2. 指定模型、批量大小与 n_jobs：
+     python scripts/bench_model.py models/model.joblib models/model_small.joblib \\
+         --batch-sizes 1,100,10000 --n-jobs 1,-1
+
+  3. 用真实输入文件中的行作为基准数据：
+     python scripts/bench_model.py --data data/new_data.csv
+        """
+    )
+    ap.add_argument("models", nargs="*", help=f"模型文件（默认 {DEFAULT_MODEL_GLOB}）")
+    ap.add_argument("--batch-sizes", default=DEFAULT_BATCH_SIZES, help="逗号分隔的批量大小")
+    ap.add_argument("--n-jobs", default=DEFAULT_N_JOBS, help="逗号分隔的预测 n_jobs 设置")
+    ap.add_argument("--time-budget", type=float, default=2.0,
+                    help="每个批量大小/n_jobs 组合的测量时间（秒，至少预测一次）")
+    ap.add_argument("--max-repeat", type=int, default=200, help="每个组合的最多预测次数")
+    ap.add_argument("--data", default=None, help="基准输入文件（CSV/Excel，默认随机生成）")
+    ap.add_argument("--json-out", default=None,
+                    help="结果 JSON 路径（默认 output/bench/model-<时间>.json）")
+    args = ap.parse_args()
+
+    model_paths = args.models or sorted(glob.glob(DEFAULT_MODEL_GLOB))
+    if not model_paths:
+        print(f"错误：未找到模型文件（{DEFAULT_MODEL_GLOB}）")
+        sys.exit(1)
+    batch_sizes = [int(float(s)) for s in args.batch_sizes.split(",") if s.strip()]
+    n_jobs_list = [int(s) for s in args.n_jobs.split(",") if s.strip()]
+
+    results = []
+    for path in model_paths:
+        print(f"正在测量: {path} ...")
+        # 每个模型包用一个新进程，加载时间与内存互不干扰
+        with ProcessPoolExecutor(max_workers=1) as ex:
+            result = ex.submit(bench_bundle, path, batch_sizes, n_jobs_list,
+                               args.time_budget, args.max_repeat, args.data).result()
+        print_bundle(result)
+        results.append(result)
+
+    if len(results) > 1:
+        print_comparison(results)
+
+    out_path = args.json_out or os.path.join(
+        "output", "bench", f"model-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "results": results},
+                  f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到: {out_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# bench_serialization.py
+# 预测结果序列化基准
+# 功能：对不同行数的预测结果，比较默认逐行 JSON（接口原有格式）、columnar JSON（orjson / 标准库）、
+#       msgpack 与 binary 编码的 CPU 耗时和响应体大小
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT_DIR)
+from api import serialization
+
+# 与示例模型一致的输出列
+DEFAULT_OUTPUTS = ["stress", "strain", "temperature", "life"]
+
+def encode_records(columns, matrix):
+    """接口默认格式：[{输出列: 值}, ...]，与 JSONResponse 相同的 json.dumps 参数"""
+    records = [dict(zip(columns, row)) for row in np.asarray(matrix).tolist()]
+    return json.dumps({"count": len(records), "predictions": records}, ensure_ascii=False,
+                      allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def encoders():
+    """返回 [(名称, 编码函数)]，未安装的库对应的格式跳过"""
+    result = [("json-records", encode_records)]
+    if serialization.orjson is not None:
+        result.append(("columnar-orjson", serialization.encode_columnar_json))
+    result.append(("columnar-stdlib", lambda c, m: serialization.encode_columnar_json(c, m, use_orjson=False)))
+    if serialization.msgpack is not None:
+        result.append(("msgpack", serialization.encode_msgpack))
+    result.append(("binary", serialization.encode_binary))
+    return result
+
+def time_encode(fn, columns, matrix, time_budget, max_repeat):
+    """
+    重复编码直到用完时间预算或达到最大次数
+
+    返回:
+        (最短单次耗时秒, 响应体字节数)
+    """
+    body = fn(columns, matrix)
+    best = float("inf")
+    start = time.perf_counter()
+    for _ in range(max_repeat):
+        t = time.process_time()
+        fn(columns, matrix)
+        best = min(best, time.process_time() - t)
+        if time.perf_counter() - start > time_budget:
+            break
+    return best, len(body)
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="预测结果序列化基准（默认 JSON / columnar / msgpack / binary）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/bench_serialization.py
+  python scripts/bench_serialization.py --rows 1,1000,100000 --columns 4
+        """
+    )
+    ap.add_argument("--rows", default="1,100,10000,100000", help="逗号分隔的结果行数")
+    ap.add_argument("--columns", type=int, default=len(DEFAULT_OUTPUTS), help="输出列数")
+    ap.add_argument("--time-budget", type=float, default=1.0, help="每个组合的计时预算（秒）")
+    ap.add_argument("--max-repeat", type=int, default=200, help="每个组合的最大重复次数")
+    ap.add_argument("--json-out", default=None, help="结果保存为 JSON 文件（可选）")
+    args = ap.parse_args()
+
+    columns = (DEFAULT_OUTPUTS + [f"out{i}" for i in range(len(DEFAULT_OUTPUTS), args.columns)])[:args.columns]
+    rng = np.random.default_rng(0)
+    results = []
+    for n in [int(float(r)) for r in args.rows.split(",") if r.strip()]:
+        matrix = rng.uniform(0, 20000, size=(n, len(columns)))
+        for name, fn in encoders():
+            cpu, size = time_encode(fn, columns, matrix, args.time_budget, args.max_repeat)
+            results.append({"rows": n, "format": name, "cpu_ms": cpu * 1000, "bytes": size})
+
+    print(f"\n=== 预测结果序列化（{len(columns)} 列，CPU 时间取最短） ===")
+    print(f"{'行数':>7s} {'格式':16s} {'CPUms':>10s} {'大小KB':>10s} {'相对默认':>8s}")
+    for r in results:
+        base = next(b for b in results if b["rows"] == r["rows"] and b["format"] == "json-records")
+        speedup = base["cpu_ms"] / r["cpu_ms"] if r["cpu_ms"] > 0 else float("inf")
+        print(f"{r['rows']:7d} {r['format']:16s} {r['cpu_ms']:10.3f} {r['bytes'] / 1024:10.1f} {speedup:7.1f}x")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.json_out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# bench_startup.py
+# 启动耗时基准
+# 功能：用 python -X importtime 分别测量 API（导入 api.main）、predict.py 与 inspect_and_train.py 的冷启动耗时，
+#       输出总耗时及按模块累计耗时排序的导入明细
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "scripts")
+
+# 名称 -> python 之后的命令行参数
+TARGETS = {
+    "api": ["-c", f"import sys; sys.path.insert(0, {ROOT_DIR!r}); import api.main"],
+    "predict": [os.path.join(SCRIPTS_DIR, "predict.py"), "--help"],
+    "inspect_and_train": [os.path.join(SCRIPTS_DIR, "inspect_and_train.py"), "--help"],
+}
+
+# 明细中展开显示其直接导入的模块（以 -c 导入的目标，顶层只有它自己）
+EXPAND = {"api": "api.main"}
+
+def parse_importtime(stderr):
+    """
+    解析 -X importtime 的输出
+
+    返回:
+        [(模块名, 自身耗时us, 累计耗时us, 嵌套层级), ...]
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2].rstrip()
+        level = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(parts[0]), int(parts[1]), level))
+    return rows
+
+def direct_children(rows, module):
+    """
+    返回指定模块直接导入的模块（-X importtime 中子模块先于父模块输出，层级比父模块深一级）
+    """
+    for i, (name, _, _, level) in enumerate(rows):
+        if name == module:
+            children = []
+            for row in reversed(rows[:i]):
+                if row[3] <= level:
+                    break
+                if row[3] == level + 1:
+                    children.append(row)
+            return children
+    return []
+
+def measure(name, repeat):
+    """
+    重复启动目标并记录耗时
+
+    返回:
+        结果字典（最短总耗时与最后一次的导入明细）
+    """
+    cmd = [sys.executable, "-X", "importtime"] + TARGETS[name]
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    walls = []
+    stderr = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+        walls.append(time.perf_counter() - start)
+        stderr = proc.stderr
+        if proc.returncode != 0:
+            raise RuntimeError(f"{name} 启动失败:\n{stderr[-2000:]}")
+    rows = parse_importtime(stderr)
+    min_level = min((level for *_, level in rows), default=0)
+    top = [r for r in rows if r[3] == min_level]
+    shown = direct_children(rows, EXPAND[name]) if name in EXPAND else top
+    return {
+        "target": name,
+        "wall_ms": min(walls) * 1000,
+        "import_ms": sum(r[2] for r in top) / 1000,
+        "top_imports": [{"module": m, "cumulative_ms": c / 1000, "self_ms": s / 1000}
+                        for m, s, c, _ in sorted(shown, key=lambda r: -r[2])],
+        "heavy_loaded": sorted({m.split(".")[0] for m, *_ in rows} & {"pandas", "sklearn", "scipy", "joblib", "jose"}),
+    }
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="启动耗时基准（python -X importtime 导入明细）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/bench_startup.py
+  python scripts/bench_startup.py --targets api --top 20
+        """
+    )
+    ap.add_argument("--targets", default=",".join(TARGETS), help="逗号分隔的目标：api,predict,inspect_and_train")
+    ap.add_argument("--repeat", type=int, default=3, help="每个目标的启动次数（取最短耗时）")
+    ap.add_argument("--top", type=int, default=10, help="每个目标显示累计耗时最高的前 N 个导入")
+    ap.add_argument("--json-out", default=None, help="结果保存为 JSON 文件（可选）")
+    args = ap.parse_args()
+
+    names = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in names if t not in TARGETS]
+    if unknown:
+        print(f"错误：未知目标: {unknown}")
+        sys.exit(1)
+
+    results = []
+    for name in names:
+        r = measure(name, args.repeat)
+        results.append(r)
+        print(f"\n=== {name}: 启动 {r['wall_ms']:.0f}ms，其中导入 {r['import_ms']:.0f}ms ===")
+        print(f"已加载的重量级依赖: {', '.join(r['heavy_loaded']) or '无'}")
+        print(f"{'模块':40s} {'累计ms':>9s} {'自身ms':>8s}")
+        for item in r["top_imports"][:args.top]:
+            print(f"{item['module']:40s} {item['cumulative_ms']:9.1f} {item['self_ms']:8.1f}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.json_out}")
+
+if __name__ == "__main__":
+    main()
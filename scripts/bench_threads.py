@@ -0,0 +1,136 @@
+# bench_threads.py
+# 预测并行策略基准
+# 功能：多个线程同时调用模型预测（模拟并发请求），对比模型保存时的 n_jobs（-1，全部核）、
+#       全部单线程与服务端并行策略（小批量单线程、大批量有上限的线程数）下的延迟、吞吐量、CPU 时间和上下文切换次数
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from predict import PARALLEL_MIN_ROWS, load_model, predict_with_threads, set_predict_n_jobs, use_per_call_n_jobs
+
+POLICIES = ("pickled", "single", "policy")
+
+def context_switches():
+    """返回进程累计的（主动, 被动）上下文切换次数，平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_nvcsw, usage.ru_nivcsw
+
+def make_predict_fn(model_path, policy, max_threads, min_rows):
+    """
+    按策略加载模型并返回预测函数
+
+    每种策略单独加载一份模型，互不影响。
+
+    返回:
+        (预测函数, 输入列名)
+    """
+    model_data = load_model(model_path)
+    model = model_data['model']
+    if policy == "pickled":
+        return model.predict, model_data['inputs']
+    if policy == "single":
+        set_predict_n_jobs(model, 1)
+        return model.predict, model_data['inputs']
+    use_per_call_n_jobs(model)
+    return (lambda X: predict_with_threads(model, X, max_threads, min_rows)), model_data['inputs']
+
+def run_case(predict_fn, X, concurrency, n_calls):
+    """
+    以指定并发调用预测 n_calls 次
+
+    返回:
+        结果字典
+    """
+    # 预热
+    predict_fn(X)
+
+    latencies = [0.0] * n_calls
+
+    def worker(i):
+        start = time.perf_counter()
+        predict_fn(X)
+        latencies[i] = time.perf_counter() - start
+
+    cs_start = context_switches()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(worker, range(n_calls)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    cs_end = context_switches()
+
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "rows_per_s": n_calls * len(X) / wall,
+        "cpu_ms_per_call": cpu / n_calls * 1000,
+        "ctx_switches_per_call": None if cs_start is None
+        else (sum(cs_end) - sum(cs_start)) / n_calls,
+    }
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="预测并行策略基准（模型保存时的 n_jobs / 全部单线程 / 服务端策略）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/bench_threads.py --model models/model.joblib --concurrency 1,8 --batch-sizes 1,100,10000
+        """
+    )
+    ap.add_argument("--model", default="models/model.joblib", help="模型文件路径")
+    ap.add_argument("--concurrency", default="1,8", help="逗号分隔的并发线程数")
+    ap.add_argument("--batch-sizes", default="1,100,10000", help="逗号分隔的每次预测行数")
+    ap.add_argument("--calls", type=int, default=40, help="每个组合的预测次数")
+    ap.add_argument("--max-threads", type=int, default=min(4, os.cpu_count() or 1),
+                    help="服务端策略的线程数上限（对应 PREDICT_MAX_THREADS）")
+    ap.add_argument("--min-rows", type=int, default=PARALLEL_MIN_ROWS,
+                    help="服务端策略并行的最小行数（对应 PREDICT_PARALLEL_MIN_ROWS）")
+    ap.add_argument("--json-out", default=None, help="结果保存为 JSON 文件（可选）")
+    args = ap.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    sizes = [int(float(s)) for s in args.batch_sizes.split(",") if s.strip()]
+    rng = np.random.default_rng(0)
+
+    results = []
+    for policy in POLICIES:
+        predict_fn, inputs = make_predict_fn(args.model, policy, args.max_threads, args.min_rows)
+        for size in sizes:
+            X = pd.DataFrame(rng.uniform(0.1, 3.0, size=(size, len(inputs))), columns=inputs)
+            for concurrency in levels:
+                r = run_case(predict_fn, X, concurrency, args.calls)
+                r.update({"policy": policy, "batch_size": size, "concurrency": concurrency})
+                results.append(r)
+
+    print(f"\n=== 预测并行策略对比（CPU 核数 {os.cpu_count()}，策略上限 {args.max_threads} 线程，"
+          f"≥{args.min_rows} 行并行） ===")
+    print(f"{'策略':8s} {'批量':>7s} {'并发':>4s} {'p50ms':>9s} {'p99ms':>9s} {'行/秒':>10s} "
+          f"{'CPUms/次':>9s} {'切换/次':>8s}")
+    for r in sorted(results, key=lambda r: (r["batch_size"], r["concurrency"], POLICIES.index(r["policy"]))):
+        cs = "-" if r["ctx_switches_per_call"] is None else f"{r['ctx_switches_per_call']:.1f}"
+        print(f"{r['policy']:8s} {r['batch_size']:7d} {r['concurrency']:4d} {r['p50_ms']:9.2f} "
+              f"{r['p99_ms']:9.2f} {r['rows_per_s']:10.0f} {r['cpu_ms_per_call']:9.2f} {cs:>8s}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"cpu_count": os.cpu_count(), "max_threads": args.max_threads,
+                       "min_rows": args.min_rows, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.json_out}")
+
+if __name__ == "__main__":
+    main()
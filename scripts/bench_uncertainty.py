@@ -0,0 +1,99 @@
+# bench_uncertainty.py
+# 预测不确定性基准
+# 功能：对比普通预测、批量逐树预测（predict_uncertainty）与在 Python 中逐棵调用树的 predict
+#       在不同批量大小下的耗时，给出不确定性模式相对普通预测的额外开销
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from predict import load_model, set_predict_n_jobs
+from uncertainty import DEFAULT_QUANTILES, parse_quantiles, predict_uncertainty
+
+def time_call(fn, time_budget, max_repeat):
+    """
+    重复调用直到用完时间预算或达到最大次数
+
+    返回:
+        最短单次耗时（秒）
+    """
+    fn()
+    best = float("inf")
+    start = time.perf_counter()
+    for _ in range(max_repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+        if time.perf_counter() - start > time_budget:
+            break
+    return best
+
+def naive_per_tree(model, X):
+    """逐棵调用树的 predict（对比基线，只支持 sklearn 森林）"""
+    X = np.asarray(X, dtype=np.float32)
+    return [np.stack([est.predict(X) for est in forest.estimators_]) for forest in model.estimators_]
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="预测不确定性基准（普通预测 / 批量逐树预测 / Python 逐树循环）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  python scripts/bench_uncertainty.py --model models/model.joblib --batch-sizes 1,100,10000
+        """
+    )
+    ap.add_argument("--model", default="models/model.joblib", help="模型文件路径")
+    ap.add_argument("--batch-sizes", default="1,100,10000", help="逗号分隔的每次预测行数")
+    ap.add_argument("--quantiles", default=",".join(str(q) for q in DEFAULT_QUANTILES), help="分位数，逗号分隔")
+    ap.add_argument("--n-jobs", type=int, default=1, help="预测并行作业数（写入模型的 n_jobs）")
+    ap.add_argument("--time-budget", type=float, default=2.0, help="每个组合的计时预算（秒）")
+    ap.add_argument("--max-repeat", type=int, default=50, help="每个组合的最大重复次数")
+    ap.add_argument("--no-naive", action="store_true", help="跳过 Python 逐树循环（树多时很慢）")
+    ap.add_argument("--json-out", default=None, help="结果保存为 JSON 文件（可选）")
+    args = ap.parse_args()
+
+    quantiles = parse_quantiles(args.quantiles)
+    model_data = load_model(args.model)
+    model = model_data['model']
+    inputs = model_data['inputs']
+    set_predict_n_jobs(model, args.n_jobs)
+    naive = not args.no_naive and all(hasattr(f, "estimators_") for f in getattr(model, "estimators_", [None]))
+
+    rng = np.random.default_rng(0)
+    results = []
+    for size in [int(float(s)) for s in args.batch_sizes.split(",") if s.strip()]:
+        X = pd.DataFrame(rng.uniform(0.1, 3.0, size=(size, len(inputs))), columns=inputs)
+        r = {
+            "batch_size": size,
+            "predict_ms": time_call(lambda: model.predict(X), args.time_budget, args.max_repeat) * 1000,
+            "uncertainty_ms": time_call(lambda: predict_uncertainty(model, X, quantiles),
+                                        args.time_budget, args.max_repeat) * 1000,
+            "naive_ms": None,
+        }
+        if naive:
+            r["naive_ms"] = time_call(lambda: naive_per_tree(model, X), args.time_budget, args.max_repeat) * 1000
+        r["overhead"] = r["uncertainty_ms"] / r["predict_ms"] - 1
+        results.append(r)
+
+    print(f"\n=== 不确定性模式开销（分位数 {list(quantiles)}，n_jobs={args.n_jobs}） ===")
+    print(f"{'批量':>7s} {'预测ms':>10s} {'不确定性ms':>12s} {'额外开销':>8s} {'逐树循环ms':>12s}")
+    for r in results:
+        naive_ms = "-" if r["naive_ms"] is None else f"{r['naive_ms']:.2f}"
+        print(f"{r['batch_size']:7d} {r['predict_ms']:10.2f} {r['uncertainty_ms']:12.2f} "
+              f"{r['overhead']:8.0%} {naive_ms:>12s}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"model": args.model, "quantiles": list(quantiles), "n_jobs": args.n_jobs,
+                       "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.json_out}")
+
+if __name__ == "__main__":
+    main()
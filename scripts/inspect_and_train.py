@@ -5,13 +5,31 @@
 import argparse
 import sys
 import os
+import glob
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.multioutput import MultiOutputRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_absolute_error
-import joblib
+# sklearn 与 joblib 只在训练、保存时导入，--help 与数据探索不需要加载它们
+
+from train_cache import TrainCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES
+from perf_utils import peak_rss_mb, format_mb, StageTimer
+from model_compression import compress_model, compression_report, default_profiles, count_trees
+from response_surface import DEFAULT_RESOLUTION, build_surface_report
+from surrogate import build_surrogate_report
+from model_manifest import write_manifest, data_digest, files_digest
+from model_backends import BACKENDS, DEFAULT_BACKEND, make_model, backend_report
+from out_of_core import (
+    DEFAULT_CHUNK_ROWS, write_memmap_dataset, fill_missing,
+    train_from_memmap, evaluate_memmap, remove_dataset,
+)
+
+# 预处理逻辑版本号，修改 simple_preprocess 的行为时递增，使旧缓存失效
+PREPROCESS_VERSION = 1
+
+# 启用压缩时从训练集中留出、只用于贪心选树的数据比例
+SELECTION_FRACTION = 0.2
 
 # 模糊匹配关键词：用于自动识别输入列
 FUZZY_INPUT_KEYS = [
@@ -19,6 +37,22 @@ FUZZY_INPUT_KEYS = [
     "load", "载荷", "载重", "payload"
 ]
 
+# 支持的数据文件扩展名（目录模式下按此筛选）
+DATA_FILE_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+# 从文件名解析载荷倍数时生成的特征列名
+LOAD_FACTOR_COLUMN = "文件载荷倍数"
+
+# 文件名中载荷倍数的匹配规则，依次尝试（如 "载荷0.2倍.csv" -> 0.2）
+LOAD_FACTOR_PATTERNS = [
+    r"([0-9]+(?:\.[0-9]+)?)\s*倍",
+    r"([0-9]+(?:\.[0-9]+)?)",
+]
+
+# 数据探索级别：none 不做探索；summary 只显示列信息与前几行；
+# full 额外计算描述统计与输入-输出相关性
+EXPLORE_LEVELS = ("none", "summary", "full")
+
 def load_data(path):
     """
     加载数据文件（支持CSV和Excel格式）
@@ -41,13 +75,172 @@ def load_data(path):
         except Exception:
             return pd.read_excel(path)
 
-def summarize_df(df, n_head=5):
+def resolve_data_paths(patterns):
+    """
+    将命令行给出的路径展开为数据文件列表
+    
+    参数:
+        patterns: 文件路径、目录或通配符列表
+    
+    返回:
+        去重后的文件路径列表（目录与通配符内部按文件名排序）
+    """
+    paths = []
+    for pat in patterns:
+        if os.path.isdir(pat):
+            names = sorted(
+                n for n in os.listdir(pat)
+                if n.lower().endswith(DATA_FILE_EXTENSIONS) and os.path.isfile(os.path.join(pat, n))
+            )
+            # 同名的 CSV 与 Excel 同时存在时只取 CSV（通常由 excel_to_csv.py 转换而来）
+            csv_stems = {os.path.splitext(n)[0] for n in names if n.lower().endswith(".csv")}
+            names = [
+                n for n in names
+                if n.lower().endswith(".csv") or os.path.splitext(n)[0] not in csv_stems
+            ]
+            paths.extend(os.path.join(pat, n) for n in names)
+        elif any(ch in pat for ch in "*?["):
+            paths.extend(sorted(p for p in glob.glob(pat) if os.path.isfile(p)))
+        else:
+            paths.append(pat)
+    return list(dict.fromkeys(paths))
+
+def load_factor_from_name(path):
+    """
+    从文件名中解析载荷倍数
+    
+    参数:
+        path: 文件路径
+    
+    返回:
+        载荷倍数，无法解析时返回 NaN
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for pattern in LOAD_FACTOR_PATTERNS:
+        match = re.search(pattern, stem)
+        if match:
+            return float(match.group(1))
+    return np.nan
+
+def load_file_for_training(path, columns=None):
+    """
+    加载单个数据文件（进程池工作函数）
+    
+    参数:
+        path: 文件路径
+        columns: 需要的列（指定时只保留这些列并完成数值化）
+    
+    返回:
+        (DataFrame, 耗时秒数)
+    """
+    start = time.perf_counter()
+    df = load_data(path)
+    if columns:
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"文件 {path} 缺少列: {missing}")
+        df = coerce_numeric(df[columns].copy())
+    return df, time.perf_counter() - start
+
+def align_schemas(frames, paths):
+    """
+    对齐多个数据文件的列：只保留所有文件共有的列，顺序以第一个文件为准
+    
+    参数:
+        frames: DataFrame 列表
+        paths: 对应的文件路径列表
+    
+    返回:
+        对齐后的 DataFrame 列表
+    """
+    common = [c for c in frames[0].columns if all(c in f.columns for f in frames[1:])]
+    if not common:
+        print("错误：多个数据文件之间没有共同的列，无法合并。")
+        sys.exit(1)
+    for df, path in zip(frames, paths):
+        dropped = [c for c in df.columns if c not in common]
+        if dropped:
+            print(f"警告：{os.path.basename(path)} 中的列 {dropped} 不是所有文件共有，已忽略")
+    return [df[common] for df in frames]
+
+def load_many(paths, columns=None, jobs=None, add_load_factor=False):
+    """
+    加载一个或多个数据文件并合并为一个 DataFrame
+    
+    多个文件时使用进程池并行加载，对齐列后纵向拼接，
+    并输出每个文件的加载耗时与峰值内存。
+    
+    参数:
+        paths: 文件路径列表
+        columns: 需要的列（指定时在工作进程内完成数值化）
+        jobs: 并行进程数（None 表示 CPU 核心数）
+        add_load_factor: 是否从文件名解析载荷倍数并作为一列加入
+    
+    返回:
+        合并后的 DataFrame
+    """
+    start = time.perf_counter()
+    if len(paths) == 1 or jobs == 1:
+        results = [load_file_for_training(p, columns) for p in paths]
+    else:
+        print(f"使用进程池并行加载 {len(paths)} 个文件...")
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            results = list(ex.map(load_file_for_training, paths, [columns] * len(paths)))
+    
+    frames = []
+    for path, (df, elapsed) in zip(paths, results):
+        print(f"  {os.path.basename(path)}: 行数={len(df)}, 列数={len(df.columns)}, 耗时={elapsed:.3f}秒")
+        frames.append(df)
+    
+    if len(frames) > 1:
+        frames = align_schemas(frames, paths)
+    
+    if add_load_factor:
+        for path, df in zip(paths, frames):
+            factor = load_factor_from_name(path)
+            if pd.isna(factor):
+                print(f"警告：无法从文件名解析载荷倍数: {os.path.basename(path)}")
+            df[LOAD_FACTOR_COLUMN] = factor
+    
+    combined = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    print(
+        f"加载完成：文件数={len(paths)}, 总耗时={time.perf_counter() - start:.3f}秒, "
+        f"峰值内存 主进程={format_mb(peak_rss_mb())} 工作进程={format_mb(peak_rss_mb(children=True))}"
+    )
+    return combined
+
+def iter_numeric_chunks(paths, inputs, outputs, chunk_rows=DEFAULT_CHUNK_ROWS, add_load_factor=False):
+    """
+    分块读取 CSV 文件并数值化选定的列（不填充缺失值）
+    
+    参数:
+        paths: CSV 文件路径列表
+        inputs: 输入列名列表
+        outputs: 输出列名列表
+        chunk_rows: 每块读取的行数
+        add_load_factor: 是否从文件名解析载荷倍数作为一列
+    
+    返回:
+        生成器，每次产出 行数 × (输入数+输出数) 的 float32 矩阵
+    """
+    columns = inputs + outputs
+    file_columns = [c for c in columns if not (add_load_factor and c == LOAD_FACTOR_COLUMN)]
+    for path in paths:
+        factor = load_factor_from_name(path) if add_load_factor else None
+        for chunk in pd.read_csv(path, usecols=file_columns, chunksize=chunk_rows):
+            chunk = coerce_numeric(chunk)
+            if add_load_factor:
+                chunk[LOAD_FACTOR_COLUMN] = factor
+            yield chunk[columns].to_numpy(dtype=np.float32)
+
+def summarize_df(df, n_head=5, stats=True):
     """
     展示数据框的基本信息
     
     参数:
         df: pandas DataFrame
         n_head: 显示前n行数据
+        stats: 是否计算数值列的描述统计（列很多时开销较大）
     """
     print("\n=== 列信息 ===")
     for i, c in enumerate(df.columns):
@@ -56,8 +249,9 @@ def summarize_df(df, n_head=5):
     print("\n=== 前几行数据 ===")
     print(df.head(n_head))
     
-    print("\n=== 数值列统计信息 ===")
-    print(df.describe().T)
+    if stats:
+        print("\n=== 数值列统计信息 ===")
+        print(df.describe().T)
 
 def fuzzy_candidates(df):
     """
@@ -98,6 +292,10 @@ def show_correlations(df, inputs, outputs):
         inputs: 输入列名列表
         outputs: 输出列名列表
     """
+    # 只取数值列，且只计算输入×输出块，不计算完整的相关性矩阵
+    numeric = set(df[inputs + outputs].select_dtypes(include=[np.number]).columns)
+    inputs = [c for c in inputs if c in numeric]
+    outputs = [c for c in outputs if c in numeric and c not in inputs]
     if not inputs or not outputs:
         return
     
@@ -106,10 +304,10 @@ def show_correlations(df, inputs, outputs):
         print("\n（数据太少，无法计算相关性）")
         return
     
-    corr = sub.corr()
     print("\n=== 输入-输出相关性分析 ===")
+    out_block = sub[outputs]
     for inp in inputs:
-        row = corr.loc[inp, outputs].sort_values(ascending=False)
+        row = out_block.corrwith(sub[inp]).sort_values(ascending=False)
         print(f"\n-- {inp} 与输出列的相关性 --")
         print(row)
 
@@ -220,20 +418,16 @@ def clean_numeric_value(value):
     except (ValueError, TypeError):
         return np.nan
 
-def simple_preprocess(df, inputs, outputs):
+def coerce_numeric(sub):
     """
-    简单数据预处理：数值化和缺失值填充
+    将各列转换为数值类型（就地修改）
     
     参数:
-        df: pandas DataFrame
-        inputs: 输入列名列表
-        outputs: 输出列名列表
+        sub: pandas DataFrame
     
     返回:
-        预处理后的DataFrame
+        数值化后的DataFrame
     """
-    sub = df[inputs + outputs].copy()
-    
     # 数值化转换（增强版：清理单位）
     for c in sub.columns:
         if sub[c].dtype == object:
@@ -242,6 +436,21 @@ def simple_preprocess(df, inputs, outputs):
         else:
             # 对于已经是数值类型的列，也尝试清理（以防万一）
             sub[c] = pd.to_numeric(sub[c], errors="coerce")
+    return sub
+
+def simple_preprocess(df, inputs, outputs):
+    """
+    简单数据预处理：数值化和缺失值填充
+    
+    参数:
+        df: pandas DataFrame
+        inputs: 输入列名列表
+        outputs: 输出列名列表
+    
+    返回:
+        预处理后的DataFrame
+    """
+    sub = coerce_numeric(df[inputs + outputs].copy())
     
     # 缺失值处理：用中位数填充
     for c in sub.columns:
@@ -255,7 +464,70 @@ def simple_preprocess(df, inputs, outputs):
     
     return sub
 
-def train_and_save(X, y, out_model_path="model.joblib"):
+def preprocess_config(add_load_factor=False):
+    """
+    返回影响预处理结果的配置，用作缓存键的一部分
+    
+    参数:
+        add_load_factor: 是否从文件名解析载荷倍数特征
+    
+    返回:
+        可 JSON 序列化的配置字典
+    """
+    return {
+        "version": PREPROCESS_VERSION,
+        "fill": "median",
+        "fuzzy_input_keys": FUZZY_INPUT_KEYS,
+        "load_factor": add_load_factor,
+    }
+
+def parse_column_list(text):
+    """解析逗号分隔的列名参数，未指定时返回None"""
+    if not text:
+        return None
+    return [s.strip() for s in text.split(",") if s.strip()]
+
+def split_data(X, y):
+    """
+    划分训练集和测试集（固定随机种子，训练与压缩评估使用同一划分）
+    
+    返回:
+        (X_train, X_test, y_train, y_test)
+    """
+    from sklearn.model_selection import train_test_split
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+def split_selection(X, y):
+    """
+    从 split_data 的训练集中再留出选树数据（固定随机种子）：模型不在选树数据上训练，
+    选树也不使用测试集，压缩后的测试集指标不偏乐观
+    
+    返回:
+        (X_fit, X_sel, y_fit, y_sel)
+    """
+    from sklearn.model_selection import train_test_split
+    X_train, _, y_train, _ = split_data(X, y)
+    return train_test_split(X_train, y_train, test_size=SELECTION_FRACTION, random_state=42)
+
+def score_model(model, X_test, y_test):
+    """
+    在测试集上计算各输出列的 R2 与 MAE
+    
+    返回:
+        {输出列: {"r2": ..., "mae": ...}}
+    """
+    from sklearn.metrics import r2_score, mean_absolute_error
+    
+    y_pred = np.asarray(model.predict(X_test)).reshape(len(X_test), -1)
+    return {
+        col: {
+            "r2": float(r2_score(y_test.iloc[:, i], y_pred[:, i])),
+            "mae": float(mean_absolute_error(y_test.iloc[:, i], y_pred[:, i])),
+        }
+        for i, col in enumerate(y_test.columns)
+    }
+
+def train_and_save(X, y, out_model_path="model.joblib", backend=DEFAULT_BACKEND, hold_out_selection=False):
     """
     训练多输出回归模型并保存
     
@@ -263,21 +535,26 @@ def train_and_save(X, y, out_model_path="model.joblib"):
         X: 输入特征DataFrame
         y: 输出目标DataFrame
         out_model_path: 模型保存路径
+        backend: 模型后端（见 model_backends.BACKENDS）
+        hold_out_selection: 是否从训练集中留出选树数据（随后压缩模型时使用，见 split_selection）
     
     返回:
-        训练好的模型
+        (训练好的模型, 测试集评估指标 {输出列: {"r2": ..., "mae": ...}})
     """
+    import joblib
+    
     # 划分训练集和测试集
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+    X_train, X_test, y_train, y_test = split_data(X, y)
+    if hold_out_selection:
+        X_train, X_sel, y_train, _ = split_selection(X, y)
     
-    # 创建随机森林多输出回归模型
-    base = RandomForestRegressor(n_estimators=200, n_jobs=-1, random_state=42)
-    model = MultiOutputRegressor(base)
+    # 创建多输出回归模型
+    model = make_model(backend)
     
-    print(f"\n开始训练模型...")
+    print(f"\n开始训练模型（后端: {backend}，{BACKENDS[backend]}）...")
     print(f"训练集样本数：{len(X_train)}")
+    if hold_out_selection:
+        print(f"选树集样本数：{len(X_sel)}")
     print(f"测试集样本数：{len(X_test)}")
     print(f"输入特征数：{X.shape[1]}")
     print(f"输出目标数：{y.shape[1]}")
@@ -287,18 +564,14 @@ def train_and_save(X, y, out_model_path="model.joblib"):
     
     # 评估模型
     print("=== 模型评估结果 ===")
-    y_pred = model.predict(X_test)
+    scores = score_model(model, X_test, y_test)
     
     if y.shape[1] == 1:
-        r2 = r2_score(y_test, y_pred)
-        mae = mean_absolute_error(y_test, y_pred)
-        print(f"R2 分数: {r2:.4f}")
-        print(f"平均绝对误差 (MAE): {mae:.4f}")
+        print(f"R2 分数: {scores[y.columns[0]]['r2']:.4f}")
+        print(f"平均绝对误差 (MAE): {scores[y.columns[0]]['mae']:.4f}")
     else:
-        for i, col in enumerate(y.columns):
-            r2 = r2_score(y_test.iloc[:, i], y_pred[:, i])
-            mae = mean_absolute_error(y_test.iloc[:, i], y_pred[:, i])
-            print(f"{col:20s} -> R2: {r2:.4f}  MAE: {mae:.4f}")
+        for col, s in scores.items():
+            print(f"{col:20s} -> R2: {s['r2']:.4f}  MAE: {s['mae']:.4f}")
     
     # 保存模型
     joblib.dump({
@@ -308,8 +581,307 @@ def train_and_save(X, y, out_model_path="model.joblib"):
     }, out_model_path)
     print(f"\n模型已保存到: {out_model_path}")
     
+    return model, scores
+
+def run_out_of_core(args, paths, req_inputs, req_outputs, timer):
+    """
+    超出内存的训练模式：分块读取 -> float32 内存映射矩阵 -> 分块填充 -> 在内存映射上训练
+    
+    参数:
+        args: 命令行参数
+        paths: 数据文件路径列表（仅支持 CSV）
+        req_inputs: 指定的输入列（None 表示自动识别）
+        req_outputs: 指定的输出列（None 表示自动识别）
+        timer: StageTimer
+    """
+    non_csv = [p for p in paths if not p.lower().endswith(".csv")]
+    if non_csv:
+        print(f"错误：分块训练模式只支持 CSV 文件，请先用 excel_to_csv.py 转换: {non_csv}")
+        sys.exit(1)
+    
+    # 只读取开头的少量行用于列识别
+    with timer.stage("列识别"):
+        head = pd.read_csv(paths[0], nrows=1000)
+        if args.load_factor_feature:
+            head[LOAD_FACTOR_COLUMN] = load_factor_from_name(paths[0])
+        cand_inputs, cand_outputs = fuzzy_candidates(head)
+        inputs = req_inputs if req_inputs else cand_inputs
+        outputs = req_outputs if req_outputs else cand_outputs
+        if args.load_factor_feature and LOAD_FACTOR_COLUMN not in inputs:
+            inputs = inputs + [LOAD_FACTOR_COLUMN]
+        outputs = [c for c in outputs if c != LOAD_FACTOR_COLUMN]
+    
+    if args.auto:
+        if not inputs or not outputs:
+            print("错误：自动模式但没有识别到输入列或输出列，请使用 --inputs/--outputs 指定。")
+            sys.exit(1)
+    else:
+        inputs, outputs = pick_columns_interactive(head, inputs, outputs)
+    
+    print("\n" + "="*60)
+    print("最终选定的输入列：", inputs)
+    print("最终选定的输出列：", outputs)
+    print("="*60)
+    
+    work_dir = args.work_dir or os.path.join(os.path.dirname(os.path.abspath(args.out_model)), ".ooc")
+    with timer.stage("写入内存映射"):
+        print(f"\n正在分块读取数据（每块 {args.chunk_rows} 行），写入: {work_dir}")
+        chunks = iter_numeric_chunks(paths, inputs, outputs, args.chunk_rows, args.load_factor_feature)
+        dataset = write_memmap_dataset(chunks, len(inputs), work_dir)
+        print(f"训练集样本数：{dataset['rows']['X_train']}")
+        print(f"测试集样本数：{dataset['rows']['X_test']}")
+    
+    try:
+        with timer.stage("填充缺失值"):
+            medians = fill_missing(dataset, args.chunk_rows)
+            for name, med in zip(inputs + outputs, np.concatenate([medians["X"], medians["y"]])):
+                print(f"列 '{name}' 中位数 {med:.4f}（用于填充缺失值）")
+        
+        with timer.stage("训练"):
+            print("\n开始训练模型（内存映射）...")
+            model = train_from_memmap(dataset, max_samples=args.max_samples)
+            print("训练完成！")
+        
+        with timer.stage("评估"):
+            scores = evaluate_memmap(model, dataset, outputs, args.chunk_rows)
+            rows = dataset['rows']['X_train'] + dataset['rows']['X_test']
+    finally:
+        if not args.keep_work_dir:
+            remove_dataset(dataset)
+    
+    with timer.stage("保存模型"):
+        import joblib
+        joblib.dump({
+            "model": model,
+            "inputs": inputs,
+            "outputs": outputs
+        }, args.out_model)
+        print(f"\n模型已保存到: {args.out_model}")
+    
+    surface = None
+    if args.surface:
+        with timer.stage("响应面"):
+            surface = surface_and_save(model, inputs, outputs, args.out_model, args.surface_resolution)
+    
+    surrogate = None
+    if args.surrogate:
+        with timer.stage("代理模型"):
+            surrogate = surrogate_and_save(model, inputs, outputs, args.out_model, surface=surface)
+    
+    with timer.stage("写入清单"):
+        bundle = {"model": model, "inputs": inputs, "outputs": outputs, "surface": surface,
+                  "surrogate": surrogate}
+        # 分块训练时数据不在内存中，训练数据摘要按源文件内容计算
+        data = {"hash": files_digest(paths), "rows": rows, "source": "files"}
+        print(f"\n模型清单已保存到: {write_manifest(args.out_model, bundle, data, scores)}")
+    
+    timer.report()
+    print("\n✓ 训练完成！")
+
+def parse_max_samples(text):
+    """解析 --max-samples：整数表示行数，小数表示比例"""
+    value = float(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError("--max-samples 必须大于0")
+    if value < 1 or "." in text:
+        return value
+    return int(value)
+
+def compress_and_save(model, X, y, out_model_path, settings, report=False):
+    """
+    训练后压缩模型并覆盖保存
+    
+    参数:
+        model: 训练好的多输出随机森林（指定 n_trees 时需以 hold_out_selection=True 训练，见 train_and_save）
+        X: 输入特征DataFrame
+        y: 输出目标DataFrame
+        out_model_path: 模型保存路径
+        settings: 压缩设置（n_trees、max_depth、float32、joblib_compress）
+        report: 是否输出各压缩设置的对比报告
+    
+    返回:
+        压缩后的模型
+    """
+    import joblib
+    
+    _, X_val, _, y_val = split_data(X, y)
+    _, X_sel, _, y_sel = split_selection(X, y)
+    bundle = {
+        "model": model,
+        "inputs": X.columns.tolist(),
+        "outputs": y.columns.tolist()
+    }
+    
+    if report:
+        profiles = default_profiles(len(model.estimators_[0].estimators_))
+        if settings:
+            profiles.append(("当前设置", settings))
+        compression_report(bundle, X_val, y_val, profiles)
+    
+    if not settings:
+        return model
+    
+    # 贪心选树使用训练时留出的选树数据，测试集留给清单中的评估指标
+    model = compress_model(
+        model, X_sel, y_sel,
+        n_trees=settings.get("n_trees"),
+        max_depth=settings.get("max_depth"),
+        float32=settings.get("float32", False),
+    )
+    bundle["model"] = model
+    bundle["compression"] = settings
+    joblib.dump(bundle, out_model_path, compress=settings.get("joblib_compress", 0))
+    print(f"\n压缩后的模型已保存到: {out_model_path}（树数={count_trees(model)}, "
+          f"大小={os.path.getsize(out_model_path) / 1024 / 1024:.2f}MB）")
     return model
 
+def compression_settings(args):
+    """从命令行参数提取压缩设置，未指定任何压缩选项时返回空字典"""
+    settings = {}
+    if args.compress_trees:
+        settings["n_trees"] = args.compress_trees
+    if args.compress_depth:
+        settings["max_depth"] = args.compress_depth
+    if args.compress_float32:
+        settings["float32"] = True
+    if args.joblib_compress:
+        settings["joblib_compress"] = args.joblib_compress
+    return settings
+
+def surface_and_save(model, inputs, outputs, out_model_path, resolution, compression=None):
+    """
+    为两输入模型构建响应面，与模型一起覆盖保存（模型文件增加 "surface" 字段）
+    
+    参数:
+        model: 训练（或压缩）后的模型
+        inputs: 输入列名列表
+        outputs: 输出列名列表
+        out_model_path: 模型保存路径
+        resolution: 每个输入方向的网格点数
+        compression: 压缩设置字典（可选），与 compress_and_save 保存的内容保持一致
+    
+    返回:
+        ResponseSurface，模型不是两输入时返回 None
+    """
+    if len(inputs) != 2:
+        print(f"\n警告：响应面只支持两个输入的模型（当前 {len(inputs)} 个），已跳过")
+        return None
+    surface = build_surface_report(model, list(inputs), list(outputs), resolution)
+    save_bundle(model, inputs, outputs, out_model_path, compression, surface=surface)
+    print(f"响应面已写入模型文件: {out_model_path}（大小={os.path.getsize(out_model_path) / 1024 / 1024:.2f}MB）")
+    return surface
+
+def surrogate_and_save(model, inputs, outputs, out_model_path, compression=None, surface=None,
+                       X=None, y=None):
+    """
+    蒸馏多项式代理模型，与模型一起覆盖保存（模型文件增加 "surrogate" 字段）
+    
+    参数:
+        model: 训练（或压缩）后的模型
+        inputs: 输入列名列表
+        outputs: 输出列名列表
+        out_model_path: 模型保存路径
+        compression: 压缩设置字典（可选），与 compress_and_save 保存的内容保持一致
+        surface: 已构建的响应面（可选），一并保存
+        X, y: 训练数据（可选）；给出时按输入的取值范围采样，并在测试集上比较代理模型与森林的 R2，
+              否则采样范围由树的分裂阈值确定
+    
+    返回:
+        PolynomialSurrogate，无法蒸馏时返回 None
+    """
+    lows = highs = X_test = y_test = None
+    if X is not None:
+        lows, highs = X.min().to_numpy(dtype=float), X.max().to_numpy(dtype=float)
+        _, X_test, _, y_test = split_data(X, y)
+    try:
+        surrogate = build_surrogate_report(model, list(inputs), list(outputs), lows, highs, X_test, y_test)
+    except ValueError as e:
+        print(f"\n警告：代理模型蒸馏失败，已跳过: {e}")
+        return None
+    save_bundle(model, inputs, outputs, out_model_path, compression, surface=surface, surrogate=surrogate)
+    print(f"代理模型已写入模型文件: {out_model_path}（大小={os.path.getsize(out_model_path) / 1024 / 1024:.2f}MB）")
+    return surrogate
+
+def save_bundle(model, inputs, outputs, out_model_path, compression=None, **extras):
+    """
+    覆盖保存模型包（model、inputs、outputs，以及压缩设置与响应面、代理模型等非空的附加字段）
+    """
+    import joblib
+    
+    bundle = {"model": model, "inputs": list(inputs), "outputs": list(outputs)}
+    if compression:
+        bundle["compression"] = compression
+    bundle.update({key: value for key, value in extras.items() if value is not None})
+    joblib.dump(bundle, out_model_path, compress=(compression or {}).get("joblib_compress", 0))
+
+def train_and_report(X, y, out_model_path, timer=None, compression=None, show_compression_report=False,
+                     surface_resolution=None, backend=DEFAULT_BACKEND, show_backend_report=False,
+                     distill=False):
+    """
+    训练并保存模型，然后展示示例预测
+    
+    参数:
+        X: 输入特征DataFrame
+        y: 输出目标DataFrame
+        out_model_path: 模型保存路径
+        timer: StageTimer（可选），用于记录并输出各阶段耗时
+        compression: 压缩设置字典（可选），见 compress_and_save
+        show_compression_report: 是否输出各压缩设置的对比报告
+        surface_resolution: 响应面网格点数（可选，仅两输入模型），见 surface_and_save
+        backend: 模型后端
+        show_backend_report: 是否先输出各后端的对比报告
+        distill: 是否蒸馏多项式代理模型，见 surrogate_and_save
+    """
+    timer = timer or StageTimer()
+    if show_backend_report:
+        with timer.stage("后端对比"):
+            X_train, X_test, y_train, y_test = split_data(X, y)
+            backend_report(list(BACKENDS), X_train, y_train, X_test, y_test)
+    
+    with timer.stage("训练与评估"):
+        # 只有贪心选树（--compress-trees）需要留出选树数据，限制深度与 float32 不需要
+        hold_out = bool(compression and compression.get("n_trees"))
+        model, scores = train_and_save(X, y, out_model_path, backend, hold_out_selection=hold_out)
+    
+    if compression or show_compression_report:
+        with timer.stage("模型压缩"):
+            model = compress_and_save(model, X, y, out_model_path, compression, show_compression_report)
+            if compression:
+                # 清单记录最终保存的模型在测试集上的指标（训练与选树都没有使用测试集）
+                _, X_test, _, y_test = split_data(X, y)
+                scores = score_model(model, X_test, y_test)
+    
+    surface = None
+    if surface_resolution:
+        with timer.stage("响应面"):
+            surface = surface_and_save(model, X.columns, y.columns, out_model_path, surface_resolution, compression)
+    
+    surrogate = None
+    if distill:
+        with timer.stage("代理模型"):
+            surrogate = surrogate_and_save(model, X.columns, y.columns, out_model_path, compression, surface, X, y)
+    
+    with timer.stage("写入清单"):
+        bundle = {"model": model, "inputs": X.columns.tolist(), "outputs": y.columns.tolist(),
+                  "compression": compression or None, "surface": surface, "surrogate": surrogate}
+        data = {"hash": data_digest(X, y), "rows": len(X), "source": "matrix"}
+        print(f"\n模型清单已保存到: {write_manifest(out_model_path, bundle, data, scores)}")
+    
+    # 示例预测
+    with timer.stage("示例预测"):
+        print("\n=== 示例预测（使用最后3条输入数据） ===")
+        sample = X.tail(3)
+        print("\n输入数据：")
+        print(sample)
+        
+        pred = model.predict(sample)
+        out_df = pd.DataFrame(pred, columns=y.columns, index=sample.index)
+        print("\n预测结果：")
+        print(out_df)
+    
+    timer.report()
+    print("\n✓ 训练完成！")
+
 def main():
     """主函数"""
     ap = argparse.ArgumentParser(
@@ -325,46 +897,142 @@ def main():
   
   3. 指定输入输出列：
      python inspect_and_train.py data.csv --inputs freq,load --outputs stress,strain
+  
+  4. 多文件训练（通配符或目录），并从文件名提取载荷倍数作为特征：
+     python inspect_and_train.py "data/train/载荷*.csv" --auto --load-factor-feature
         """
     )
     
-    ap.add_argument("path", help="数据文件路径 (csv/xlsx)")
+    ap.add_argument("path", nargs="+", help="数据文件路径 (csv/xlsx)，可为多个文件、目录或通配符")
     ap.add_argument("--inputs", help="逗号分隔的输入列名（优先于自动识别）", default=None)
     ap.add_argument("--outputs", help="逗号分隔的输出列名（优先于自动识别）", default=None)
     ap.add_argument("--out-model", help="保存模型路径", default="models/model.joblib")
     ap.add_argument("--auto", action="store_true", help="自动接受脚本识别的候选输入/输出（非交互）")
+    ap.add_argument("--cache-dir", help="预处理缓存目录", default=DEFAULT_CACHE_DIR)
+    ap.add_argument("--no-cache", action="store_true", help="禁用预处理缓存")
+    ap.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                    help="缓存总容量上限（MB），超出时淘汰最久未使用的条目")
+    ap.add_argument("--cache-max-entries", type=int, default=DEFAULT_MAX_ENTRIES,
+                    help="缓存条目数上限")
+    ap.add_argument("--jobs", type=int, default=None, help="多文件并行加载的进程数（默认CPU核心数）")
+    ap.add_argument("--load-factor-feature", action="store_true",
+                    help=f"从文件名解析载荷倍数（如 载荷0.2倍.csv），作为输入列 '{LOAD_FACTOR_COLUMN}'")
+    ap.add_argument("--explore", choices=EXPLORE_LEVELS, default=None,
+                    help="数据探索级别：none/summary/full（默认交互模式为 full，自动模式为 none）")
+    ap.add_argument("--compress-trees", type=int, default=None,
+                    help="训练后按验证集误差贪心挑选树，每个输出保留的树数量")
+    ap.add_argument("--compress-depth", type=int, default=None,
+                    help="训练后将树限制到指定深度（超出部分合并为叶节点）")
+    ap.add_argument("--compress-float32", action="store_true",
+                    help="训练后将森林转换为 float32 扁平数组存储（CompactForest）")
+    ap.add_argument("--joblib-compress", type=int, default=0, choices=range(10), metavar="0-9",
+                    help="压缩后保存模型时的 joblib 压缩级别（0 表示不压缩）")
+    ap.add_argument("--compress-report", action="store_true",
+                    help="输出多种压缩设置的大小、加载时间、延迟与 R2 对比")
+    ap.add_argument("--out-of-core", action="store_true",
+                    help="分块训练模式：数据分块写入 float32 内存映射文件后训练，适用于超出内存的数据集（仅CSV）")
+    ap.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="分块训练模式每块读取的行数")
+    ap.add_argument("--work-dir", default=None, help="分块训练模式的内存映射文件目录（默认模型目录下的 .ooc）")
+    ap.add_argument("--keep-work-dir", action="store_true", help="训练后保留内存映射文件")
+    ap.add_argument("--max-samples", type=parse_max_samples, default=None,
+                    help="每棵树的子采样规模：整数为行数，小数为比例（默认使用全部行）")
+    ap.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                    help="模型后端：" + "，".join(f"{k}={v}" for k, v in BACKENDS.items())
+                         + f"（默认 {DEFAULT_BACKEND}，取自环境变量 MODEL_BACKEND 或 config.py）")
+    ap.add_argument("--backend-report", action="store_true",
+                    help="训练前用同一划分对比各后端的训练耗时、预测延迟、模型大小与精度")
+    ap.add_argument("--surface", action="store_true",
+                    help="训练后为两输入模型预计算响应面（网格查表+双线性插值），随模型一起保存")
+    ap.add_argument("--surface-resolution", type=int, default=DEFAULT_RESOLUTION,
+                    help="响应面每个输入方向的网格点数")
+    ap.add_argument("--surrogate", action="store_true",
+                    help="训练后在输入范围内采样、用模型标注，蒸馏多项式代理模型并随模型保存（供 API 的 fast 模式使用）")
     
     args = ap.parse_args()
     
-    # 检查文件是否存在
-    if not os.path.exists(args.path):
-        print(f"错误：文件不存在: {args.path}")
+    if args.backend != "rf" and (compression_settings(args) or args.compress_report):
+        print("错误：模型压缩选项只支持 rf 后端")
+        sys.exit(1)
+    if args.backend != "rf" and args.out_of_core:
+        print("错误：分块训练模式只支持 rf 后端")
+        sys.exit(1)
+    
+    # 展开通配符与目录，并检查文件是否存在
+    paths = resolve_data_paths(args.path)
+    if not paths:
+        print(f"错误：没有匹配的数据文件: {args.path}")
         sys.exit(1)
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"错误：文件不存在: {path}")
+            sys.exit(1)
     
-    # 加载数据
-    print(f"正在加载数据文件: {args.path}")
-    df = load_data(args.path)
-    print(f"已加载数据，行数={len(df)}, 列数={len(df.columns)}")
+    req_inputs = parse_column_list(args.inputs)
+    req_outputs = parse_column_list(args.outputs)
     
-    # 展示数据概况
-    summarize_df(df)
+    # 预处理缓存
+    cache = None
+    if not args.no_cache:
+        cache = TrainCache(
+            args.cache_dir,
+            max_bytes=int(args.cache_max_mb * 1024 * 1024),
+            max_entries=args.cache_max_entries,
+        )
     
-    # 自动识别候选列
-    cand_inputs, cand_outputs = fuzzy_candidates(df)
+    explore = args.explore or ("none" if args.auto else "full")
+    timer = StageTimer()
     
-    # 显示相关性分析
-    show_correlations(df, cand_inputs, cand_outputs)
+    if args.out_of_core:
+        run_out_of_core(args, paths, req_inputs, req_outputs, timer)
+        return
     
-    # 确定最终使用的输入输出列
-    if args.inputs:
-        inputs = [s.strip() for s in args.inputs.split(",") if s.strip()]
-    else:
-        inputs = cand_inputs
+    # 自动模式下列选择完全由参数决定，可以直接查缓存，跳过解析
+    cache_key = None
+    if cache is not None and args.auto:
+        with timer.stage("读取缓存"):
+            cache_key = cache.make_key(paths, req_inputs, req_outputs,
+                                       preprocess_config(args.load_factor_feature))
+            hit = cache.get(cache_key)
+        if hit is not None:
+            X_arr, y_arr, meta = hit
+            print(f"命中预处理缓存 ({cache_key[:12]})，跳过数据解析与预处理")
+            X = pd.DataFrame(X_arr, columns=meta["inputs"])
+            y = pd.DataFrame(y_arr, columns=meta["outputs"])
+            print("输入列：", meta["inputs"])
+            print("输出列：", meta["outputs"])
+            train_and_report(X, y, args.out_model, timer,
+                             compression_settings(args), args.compress_report,
+                             args.surface_resolution if args.surface else None,
+                             args.backend, args.backend_report, args.surrogate)
+            return
     
-    if args.outputs:
-        outputs = [s.strip() for s in args.outputs.split(",") if s.strip()]
-    else:
-        outputs = cand_outputs
+    # 加载数据（列已明确指定时，数值化在加载进程内完成）
+    with timer.stage("加载数据"):
+        print(f"正在加载数据文件: {', '.join(paths)}")
+        preload_columns = None
+        if req_inputs and req_outputs:
+            preload_columns = [c for c in req_inputs + req_outputs if c != LOAD_FACTOR_COLUMN]
+        df = load_many(paths, preload_columns, jobs=args.jobs, add_load_factor=args.load_factor_feature)
+        print(f"已加载数据，行数={len(df)}, 列数={len(df.columns)}")
+    
+    # 展示数据概况
+    if explore != "none":
+        with timer.stage("数据概况"):
+            summarize_df(df, stats=(explore == "full"))
+    
+    # 自动识别候选列，确定最终使用的输入输出列
+    with timer.stage("列识别"):
+        cand_inputs, cand_outputs = fuzzy_candidates(df)
+        inputs = req_inputs if req_inputs else cand_inputs
+        outputs = req_outputs if req_outputs else cand_outputs
+        if args.load_factor_feature and LOAD_FACTOR_COLUMN not in inputs:
+            inputs = inputs + [LOAD_FACTOR_COLUMN]
+        outputs = [c for c in outputs if c != LOAD_FACTOR_COLUMN]
+    
+    # 显示相关性分析（仅计算选定的输入×输出块）
+    if explore == "full":
+        with timer.stage("相关性分析"):
+            show_correlations(df, inputs, outputs)
     
     if args.auto:
         # 自动模式：直接使用识别结果
@@ -384,26 +1052,29 @@ def main():
     print("="*60)
     
     # 数据预处理
-    print("\n正在进行数据预处理...")
-    sub = simple_preprocess(df, inputs, outputs)
-    X = sub[inputs]
-    y = sub[outputs]
-    
-    # 训练模型
-    model = train_and_save(X, y, args.out_model)
+    with timer.stage("数据预处理"):
+        print("\n正在进行数据预处理...")
+        sub = simple_preprocess(df, inputs, outputs)
+        X = sub[inputs]
+        y = sub[outputs]
     
-    # 示例预测
-    print("\n=== 示例预测（使用最后3条输入数据） ===")
-    sample = X.tail(3)
-    print("\n输入数据：")
-    print(sample)
-    
-    pred = model.predict(sample)
-    out_df = pd.DataFrame(pred, columns=y.columns, index=sample.index)
-    print("\n预测结果：")
-    print(out_df)
+    # 写入缓存（交互模式按最终选定的列作为键）
+    if cache is not None:
+        with timer.stage("写入缓存"):
+            if cache_key is None:
+                cache_key = cache.make_key(paths, inputs, outputs,
+                                           preprocess_config(args.load_factor_feature))
+            cache.put(cache_key, X.to_numpy(), y.to_numpy(), {
+                "inputs": inputs,
+                "outputs": outputs,
+                "source": [os.path.abspath(p) for p in paths],
+            })
+            print(f"预处理结果已写入缓存: {cache.cache_dir}")
     
-    print("\n✓ 训练完成！")
+    train_and_report(X, y, args.out_model, timer,
+                     compression_settings(args), args.compress_report,
+                     args.surface_resolution if args.surface else None,
+                     args.backend, args.backend_report, args.surrogate)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,142 @@
+# model_backends.py
+# 模型后端
+# 功能：按名称创建多输出回归模型，训练脚本通过 --backend 选择：
+#   - rf：每个输出一个随机森林（默认，200 棵不限深度的树）
+#   - hgb：每个输出一个直方图梯度提升模型（HistGradientBoostingRegressor），训练快、模型小
+#   - hgb-chain：直方图梯度提升回归链，后面的输出以前面输出的预测值作为额外输入
+# 所有后端保存的模型包格式相同（model、inputs、outputs），predict.py 与 API 可直接加载
+# 默认后端与梯度提升参数依次取自环境变量、仓库根目录的 config.py、本文件中的内置值
+
+import importlib.util
+import os
+import time
+
+import numpy as np
+
+# sklearn 在创建模型时导入
+
+# 可选后端与说明
+BACKENDS = {
+    "rf": "随机森林（每个输出一个）",
+    "hgb": "直方图梯度提升（每个输出一个）",
+    "hgb-chain": "直方图梯度提升回归链",
+}
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config.py")
+
+def _load_config():
+    """加载仓库根目录的 config.py（不存在时返回 None）"""
+    if not os.path.exists(CONFIG_PATH):
+        return None
+    spec = importlib.util.spec_from_file_location("predictflow_config", CONFIG_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _setting(name, default, cast):
+    """
+    读取配置项：环境变量优先，其次 config.py，最后使用内置默认值
+
+    参数:
+        name: 环境变量名与 config.py 中的变量名
+        default: 内置默认值
+        cast: 类型转换函数
+
+    返回:
+        配置值
+    """
+    if os.environ.get(name):
+        return cast(os.environ[name])
+    return cast(getattr(_config, name, default))
+
+_config = _load_config()
+
+DEFAULT_BACKEND = _setting("MODEL_BACKEND", "rf", str)
+if DEFAULT_BACKEND not in BACKENDS:
+    raise ValueError(f"MODEL_BACKEND 配置无效: {DEFAULT_BACKEND}，可选: {', '.join(BACKENDS)}")
+
+# 随机森林参数
+RF_N_ESTIMATORS = 200
+
+# 直方图梯度提升参数（样本数超过 1 万时自动启用早停）
+HGB_MAX_ITER = _setting("HGB_MAX_ITER", 200, int)
+HGB_LEARNING_RATE = _setting("HGB_LEARNING_RATE", 0.1, float)
+
+RANDOM_STATE = 42
+
+def make_model(backend=DEFAULT_BACKEND):
+    """
+    创建未训练的多输出回归模型
+
+    参数:
+        backend: 后端名称（见 BACKENDS）
+
+    返回:
+        sklearn 估计器，predict 返回 (样本数, 输出数) 的矩阵
+    """
+    from sklearn.multioutput import MultiOutputRegressor, RegressorChain
+
+    if backend == "rf":
+        from sklearn.ensemble import RandomForestRegressor
+        return MultiOutputRegressor(
+            RandomForestRegressor(n_estimators=RF_N_ESTIMATORS, n_jobs=-1, random_state=RANDOM_STATE))
+    if backend in ("hgb", "hgb-chain"):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        base = HistGradientBoostingRegressor(
+            max_iter=HGB_MAX_ITER, learning_rate=HGB_LEARNING_RATE, random_state=RANDOM_STATE)
+        if backend == "hgb":
+            return MultiOutputRegressor(base)
+        return RegressorChain(base, random_state=RANDOM_STATE)
+    raise ValueError(f"未知的模型后端: {backend}，可选: {', '.join(BACKENDS)}")
+
+def model_backend(model):
+    """根据已训练的模型推断后端名称（无法识别时返回 None）"""
+    first = getattr(model, "estimators_", [None])[0]
+    kind = type(first).__name__
+    if kind == "RandomForestRegressor":
+        return "rf"
+    if kind == "HistGradientBoostingRegressor":
+        return "hgb-chain" if type(model).__name__ == "RegressorChain" else "hgb"
+    return None
+
+def backend_report(backends, X_train, y_train, X_test, y_test, repeat=30):
+    """
+    用同一划分训练各后端，对比训练耗时、模型大小、加载时间、单条/批量预测延迟与测试集精度
+
+    参数:
+        backends: 后端名称列表
+        X_train, y_train: 训练集
+        X_test, y_test: 测试集
+        repeat: 单条预测延迟的重复次数
+
+    返回:
+        [(后端名称, 指标字典), ...]
+    """
+    from sklearn.metrics import mean_absolute_error
+    from model_compression import measure_bundle
+
+    results = []
+    for backend in backends:
+        print(f"正在训练后端 {backend}（{BACKENDS[backend]}）...")
+        model = make_model(backend)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+        bundle = {"model": model, "inputs": X_train.columns.tolist(), "outputs": y_train.columns.tolist()}
+        m = measure_bundle(bundle, X_test, y_test, repeat=repeat)
+        y_pred = np.asarray(model.predict(X_test)).reshape(len(X_test), -1)
+        m["fit_s"] = fit_s
+        m["mae"] = {col: float(mean_absolute_error(y_test.iloc[:, i], y_pred[:, i]))
+                    for i, col in enumerate(y_test.columns)}
+        results.append((backend, m))
+
+    print(f"\n=== 模型后端对比（训练集 {len(X_train)} 行，测试集 {len(X_test)} 行） ===")
+    print(f"{'后端':10s} {'训练s':>8s} {'树数':>6s} {'大小MB':>9s} {'加载s':>8s} {'单条ms':>8s} "
+          f"{'批量ms':>9s} {'平均R2':>8s}")
+    for backend, m in results:
+        print(f"{backend:10s} {m['fit_s']:8.2f} {m['trees']:6d} {m['size_mb']:9.2f} {m['load_s']:8.3f} "
+              f"{m['latency_ms']:8.2f} {m['batch_ms']:9.2f} {m['r2']:8.4f}")
+    print("各输出 MAE：")
+    for backend, m in results:
+        print(f"  {backend:10s} " + "  ".join(f"{col}={mae:.4g}" for col, mae in m["mae"].items()))
+    return results
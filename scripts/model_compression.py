@@ -0,0 +1,397 @@
+# model_compression.py
+# 模型压缩
+# 功能：训练后压缩随机森林模型，降低模型文件大小、加载时间与预测延迟
+#   - 贪心集成选择：按验证集误差逐棵挑选树，减少树的数量
+#   - 限制深度：将超过指定深度的子树合并为叶节点（节点值即该节点样本均值）
+#   - float32 存储：将所有树展开为扁平的 float32 数组，用 NumPy 批量遍历
+#   - joblib 压缩存储
+
+import copy
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# joblib 与 sklearn 只在测量与报告时导入：API 导入本模块（count_trees、CompactForest）时不加载 sklearn
+
+# sklearn 树结构中的叶节点与未定义特征标记
+TREE_LEAF = -1
+TREE_UNDEFINED = -2
+
+class CompactForest:
+    """
+    多输出随机森林的紧凑表示
+
+    所有输出的所有树的节点存放在同一组扁平数组中，阈值与叶节点值为 float32。
+    叶节点的左右子节点指向自身，因此遍历固定步数（最大深度）即可到达叶节点。
+    与 MultiOutputRegressor 一样，predict 返回 (样本数, 输出数) 的矩阵。
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, tree_output,
+                 n_outputs, n_features, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.tree_output = tree_output
+        self.n_outputs = n_outputs
+        self.n_features_in_ = n_features
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_multioutput(cls, model):
+        """
+        从 MultiOutputRegressor(RandomForestRegressor) 构建
+
+        参数:
+            model: 训练好的多输出随机森林
+
+        返回:
+            CompactForest
+        """
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        roots, tree_output = [], []
+        offset = 0
+        max_depth = 0
+        for o, forest in enumerate(model.estimators_):
+            for est in forest.estimators_:
+                tree = est.tree_
+                n = tree.node_count
+                is_leaf = tree.children_left == TREE_LEAF
+                own = np.arange(n) + offset
+                features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+                thresholds.append(_float32_threshold(np.where(is_leaf, 0.0, tree.threshold)))
+                lefts.append(np.where(is_leaf, own, tree.children_left + offset).astype(np.int32))
+                rights.append(np.where(is_leaf, own, tree.children_right + offset).astype(np.int32))
+                values.append(tree.value[:, 0, 0].astype(np.float32))
+                roots.append(offset)
+                tree_output.append(o)
+                max_depth = max(max_depth, tree.max_depth)
+                offset += n
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            tree_output=np.asarray(tree_output, dtype=np.int32),
+            n_outputs=len(model.estimators_),
+            n_features=model.estimators_[0].n_features_in_,
+            max_depth=max_depth,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def node_count(self):
+        return len(self.value)
+
+    def apply(self, X):
+        """
+        返回每棵树上每个样本所在的叶节点编号
+
+        参数:
+            X: 输入矩阵 (样本数, 特征数)
+
+        返回:
+            (树数, 样本数) 的叶节点编号矩阵
+        """
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[None, :]
+        node = np.repeat(self.roots[:, None], len(X), axis=1)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_trees(self, X, chunk_rows=4096):
+        """
+        返回每棵树的预测值
+
+        参数:
+            X: 输入矩阵
+            chunk_rows: 每批遍历的样本数（控制中间矩阵大小）
+
+        返回:
+            (树数, 样本数) 的 float32 矩阵
+        """
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty((self.n_trees, len(X)), dtype=np.float32)
+        for start in range(0, len(X), chunk_rows):
+            out[:, start:start + chunk_rows] = self.value[self.apply(X[start:start + chunk_rows])]
+        return out
+
+    def predict(self, X):
+        """
+        预测
+
+        参数:
+            X: 输入矩阵或 DataFrame（列顺序需与训练时一致）
+
+        返回:
+            (样本数, 输出数) 的 float64 矩阵
+        """
+        per_tree = self.predict_trees(X)
+        result = np.empty((per_tree.shape[1], self.n_outputs), dtype=np.float64)
+        for o in range(self.n_outputs):
+            result[:, o] = per_tree[self.tree_output == o].mean(axis=0)
+        return result
+
+def _float32_threshold(threshold):
+    """
+    将阈值转换为 float32，且保证不大于原阈值
+
+    sklearn 的阈值是两个相邻 float32 特征值的中点，向下取整到 float32 后
+    仍位于两者之间，使 X <= 阈值 的判断结果与原模型一致。
+    """
+    t32 = threshold.astype(np.float32)
+    too_big = t32.astype(np.float64) > threshold
+    t32[too_big] = np.nextafter(t32[too_big], np.float32(-np.inf))
+    return t32
+
+def greedy_select_trees(forest, X_val, y_val, n_trees):
+    """
+    贪心集成选择：每一步加入使验证集均方误差最小的树（不重复选择）
+
+    参数:
+        forest: RandomForestRegressor（就地修改）
+        X_val: 验证集输入
+        y_val: 验证集目标（一维）
+        n_trees: 保留的树数量
+
+    返回:
+        选中的树的下标列表
+    """
+    n_trees = min(n_trees, len(forest.estimators_))
+    X_val = np.asarray(X_val, dtype=np.float32)
+    y_val = np.asarray(y_val, dtype=np.float64)
+    preds = np.stack([est.predict(X_val) for est in forest.estimators_])
+    remaining = np.ones(len(preds), dtype=bool)
+    current = np.zeros(len(y_val))
+    selected = []
+    for k in range(n_trees):
+        candidates = np.flatnonzero(remaining)
+        mse = (((current + preds[candidates]) / (k + 1) - y_val) ** 2).mean(axis=1)
+        best = candidates[np.argmin(mse)]
+        selected.append(int(best))
+        remaining[best] = False
+        current += preds[best]
+    forest.estimators_ = [forest.estimators_[i] for i in selected]
+    forest.n_estimators = len(selected)
+    return selected
+
+def cap_tree_depth(estimator, max_depth):
+    """
+    将决策树限制到指定深度（就地修改）
+
+    深度达到上限的内部节点直接变为叶节点。sklearn 回归树的每个节点都保存了
+    落入该节点的样本均值，因此新叶节点的值等于原子树所有叶节点的加权平均。
+
+    参数:
+        estimator: DecisionTreeRegressor
+        max_depth: 最大深度
+    """
+    tree = estimator.tree_
+    if tree.max_depth <= max_depth:
+        return
+    state = tree.__getstate__()
+    nodes = state["nodes"]
+    left = nodes["left_child"]
+    right = nodes["right_child"]
+
+    # 按层遍历，找出保留的节点及其深度
+    depth = np.full(len(nodes), -1, dtype=np.int64)
+    depth[0] = 0
+    frontier = np.array([0])
+    while frontier.size:
+        expand = frontier[(left[frontier] != TREE_LEAF) & (depth[frontier] < max_depth)]
+        children = np.concatenate([left[expand], right[expand]])
+        depth[children] = np.concatenate([depth[expand], depth[expand]]) + 1
+        frontier = children
+    kept = np.flatnonzero(depth >= 0)
+
+    remap = np.full(len(nodes), TREE_LEAF, dtype=np.int64)
+    remap[kept] = np.arange(len(kept))
+    new_nodes = nodes[kept].copy()
+    cut = (depth[kept] == max_depth) & (new_nodes["left_child"] != TREE_LEAF)
+    new_nodes["left_child"] = np.where(new_nodes["left_child"] == TREE_LEAF, TREE_LEAF,
+                                       remap[new_nodes["left_child"]])
+    new_nodes["right_child"] = np.where(new_nodes["right_child"] == TREE_LEAF, TREE_LEAF,
+                                        remap[new_nodes["right_child"]])
+    new_nodes["left_child"][cut] = TREE_LEAF
+    new_nodes["right_child"][cut] = TREE_LEAF
+    new_nodes["feature"][cut] = TREE_UNDEFINED
+    new_nodes["threshold"][cut] = TREE_UNDEFINED
+
+    state = dict(state, nodes=new_nodes, values=state["values"][kept].copy(),
+                 node_count=len(kept), max_depth=max_depth)
+    new_tree = type(tree)(tree.n_features, tree.n_classes, tree.n_outputs)
+    new_tree.__setstate__(state)
+    estimator.tree_ = new_tree
+
+def compress_model(model, X_val=None, y_val=None, n_trees=None, max_depth=None, float32=False):
+    """
+    按设置压缩多输出随机森林（返回新模型，不修改原模型）
+
+    参数:
+        model: MultiOutputRegressor(RandomForestRegressor)
+        X_val: 贪心选树使用的验证集输入
+        y_val: 贪心选树使用的验证集目标（二维）
+        n_trees: 每个输出保留的树数量（None 表示不减少）
+        max_depth: 最大深度（None 表示不限制）
+        float32: 是否转换为 float32 的 CompactForest
+
+    返回:
+        压缩后的模型
+    """
+    model = copy.deepcopy(model)
+    y_val = None if y_val is None else np.asarray(y_val)
+    for o, forest in enumerate(model.estimators_):
+        if max_depth is not None:
+            for est in forest.estimators_:
+                cap_tree_depth(est, max_depth)
+        if n_trees is not None:
+            if X_val is None or y_val is None:
+                raise ValueError("贪心选树需要验证集")
+            greedy_select_trees(forest, X_val, y_val[:, o], n_trees)
+    if float32:
+        return CompactForest.from_multioutput(model)
+    return model
+
+def count_trees(model):
+    """统计模型中树的总数（随机森林为树的数量，梯度提升为迭代轮数 × 每轮的树数）"""
+    if isinstance(model, CompactForest):
+        return model.n_trees
+    total = 0
+    for est in model.estimators_:
+        if hasattr(est, "estimators_"):
+            total += len(est.estimators_)
+        elif hasattr(est, "n_iter_"):
+            total += est.n_iter_ * getattr(est, "n_trees_per_iteration_", 1)
+    return total
+
+def measure_bundle(bundle, X_eval, y_eval, joblib_compress=0, repeat=30):
+    """
+    测量模型包的文件大小、加载时间、预测延迟与精度
+
+    参数:
+        bundle: 模型包字典（含 model、inputs、outputs）
+        X_eval: 评估集输入 DataFrame
+        y_eval: 评估集目标 DataFrame
+        joblib_compress: joblib 压缩级别（0 表示不压缩）
+        repeat: 单条预测延迟的重复次数
+
+    返回:
+        指标字典
+    """
+    import joblib
+    from sklearn.metrics import r2_score
+
+    fd, path = tempfile.mkstemp(suffix=".joblib")
+    os.close(fd)
+    try:
+        joblib.dump(bundle, path, compress=joblib_compress)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        loaded = joblib.load(path)
+        load_time = time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+    model = loaded["model"]
+    X_arr = X_eval.to_numpy() if hasattr(X_eval, "to_numpy") else np.asarray(X_eval)
+    single = X_eval.iloc[:1] if hasattr(X_eval, "iloc") else X_arr[:1]
+    model.predict(single)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(single)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    y_pred = np.asarray(model.predict(X_eval)).reshape(len(X_arr), -1)
+    batch_time = time.perf_counter() - start
+
+    y_true = np.asarray(y_eval).reshape(len(X_arr), -1)
+    r2 = float(np.mean([r2_score(y_true[:, i], y_pred[:, i]) for i in range(y_true.shape[1])]))
+    return {
+        "size_mb": size / 1024 / 1024,
+        "load_s": load_time,
+        "latency_ms": float(np.median(latencies)) * 1000,
+        "batch_ms": batch_time * 1000,
+        "r2": r2,
+        "trees": count_trees(model),
+    }
+
+def default_profiles(n_estimators):
+    """
+    生成用于对比的压缩设置列表
+
+    参数:
+        n_estimators: 原模型每个输出的树数量
+
+    返回:
+        [(名称, 设置字典), ...]
+    """
+    quarter = max(1, n_estimators // 4)
+    half = max(1, n_estimators // 2)
+    return [
+        ("原始模型", {}),
+        ("joblib压缩", {"joblib_compress": 3}),
+        (f"选树{half}", {"n_trees": half}),
+        (f"选树{quarter}", {"n_trees": quarter}),
+        ("限深16", {"max_depth": 16}),
+        ("限深10", {"max_depth": 10}),
+        ("float32", {"float32": True}),
+        (f"选树{quarter}+限深16+float32+压缩",
+         {"n_trees": quarter, "max_depth": 16, "float32": True, "joblib_compress": 3}),
+    ]
+
+def compression_report(bundle, X_val, y_val, profiles):
+    """
+    对每种压缩设置测量大小、加载时间、延迟与 R2，并输出相对原始模型的变化
+
+    验证集前一半用于贪心选树，后一半用于评估，避免选树与评估使用同一批数据。
+
+    参数:
+        bundle: 原始模型包字典
+        X_val: 验证集输入 DataFrame
+        y_val: 验证集目标 DataFrame
+        profiles: [(名称, 设置字典), ...]
+
+    返回:
+        [(名称, 设置字典, 指标字典), ...]
+    """
+    half = max(1, len(X_val) // 2)
+    X_sel, y_sel = X_val.iloc[:half], y_val.iloc[:half]
+    X_eval, y_eval = X_val.iloc[half:], y_val.iloc[half:]
+    if len(X_eval) < 2:
+        X_eval, y_eval = X_val, y_val
+
+    results = []
+    for name, settings in profiles:
+        model = compress_model(
+            bundle["model"], X_sel, y_sel,
+            n_trees=settings.get("n_trees"),
+            max_depth=settings.get("max_depth"),
+            float32=settings.get("float32", False),
+        )
+        metrics = measure_bundle(dict(bundle, model=model), X_eval, y_eval,
+                                 joblib_compress=settings.get("joblib_compress", 0))
+        results.append((name, settings, metrics))
+
+    base = results[0][2]
+    print("\n=== 模型压缩对比 ===")
+    print(f"{'设置':32s} {'树数':>6s} {'大小MB':>9s} {'加载s':>8s} {'单条ms':>8s} {'批量ms':>9s} {'R2':>8s} {'ΔR2':>8s}")
+    for name, _, m in results:
+        print(
+            f"{name:32s} {m['trees']:6d} {m['size_mb']:9.2f} {m['load_s']:8.3f} "
+            f"{m['latency_ms']:8.2f} {m['batch_ms']:9.2f} {m['r2']:8.4f} {m['r2'] - base['r2']:+8.4f}"
+        )
+    return results
@@ -0,0 +1,239 @@
+# model_manifest.py
+# 模型清单
+# 功能：训练时在模型文件旁写入小体积的 JSON 清单（输入输出列、训练数据摘要、树的数量、文件大小与摘要、
+#       评估指标、创建时间），不反序列化模型即可列出、校验和选择模型；加载模型时核对清单与模型文件是否一致
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from train_cache import file_digest
+from model_compression import count_trees
+from model_backends import model_backend
+
+# 清单格式版本，修改字段含义时递增
+MANIFEST_VERSION = 1
+
+# 清单文件名：模型文件去掉扩展名后加该后缀（models/model.joblib -> models/model.manifest.json）
+MANIFEST_SUFFIX = ".manifest.json"
+
+def manifest_path(model_path):
+    """返回模型文件对应的清单路径"""
+    return os.path.splitext(model_path)[0] + MANIFEST_SUFFIX
+
+def data_digest(X, y):
+    """
+    计算训练数据（输入、输出矩阵及列名）的 SHA-256 摘要
+
+    参数:
+        X: 输入特征DataFrame
+        y: 输出目标DataFrame
+
+    返回:
+        十六进制摘要字符串
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([list(X.columns), list(y.columns)], ensure_ascii=False).encode("utf-8"))
+    for frame in (X, y):
+        h.update(np.ascontiguousarray(frame.to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+def files_digest(paths):
+    """计算多个数据文件内容的合并摘要（分块训练时数据不在内存中，按源文件计算）"""
+    h = hashlib.sha256()
+    for path in sorted(os.path.abspath(p) for p in paths):
+        h.update(file_digest(path).encode("ascii"))
+    return h.hexdigest()
+
+def build_manifest(model_path, bundle, data=None, scores=None):
+    """
+    根据已保存的模型文件与内存中的模型包生成清单
+
+    参数:
+        model_path: 模型文件路径（须已写入最终内容）
+        bundle: 模型包字典（model、inputs、outputs，可含 compression、surface、surrogate）
+        data: 训练数据描述（可选），如 {"hash": ..., "rows": ..., "source": "matrix"}
+        scores: 评估指标（可选），{输出列: {"r2": ..., "mae": ...}}
+
+    返回:
+        清单字典
+    """
+    model = bundle["model"]
+    return {
+        "manifest_version": MANIFEST_VERSION,
+        "model_file": os.path.basename(model_path),
+        "file_size": os.path.getsize(model_path),
+        "file_sha256": file_digest(model_path),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "inputs": list(bundle["inputs"]),
+        "outputs": list(bundle["outputs"]),
+        "model_type": type(model).__name__,
+        "backend": model_backend(model),
+        "n_trees": count_trees(model),
+        "compression": bundle.get("compression") or None,
+        "surface": bundle.get("surface") is not None,
+        "surrogate": bundle["surrogate"].summary() if bundle.get("surrogate") is not None else None,
+        "data": data,
+        "metrics": scores,
+    }
+
+def write_manifest(model_path, bundle, data=None, scores=None):
+    """
+    生成清单并写入模型文件旁（先写临时文件再替换，读取方不会看到写了一半的清单）
+
+    返回:
+        清单路径
+    """
+    manifest = build_manifest(model_path, bundle, data, scores)
+    path = manifest_path(model_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+def read_manifest(model_path):
+    """
+    读取模型文件对应的清单
+
+    返回:
+        清单字典，不存在时返回 None
+
+    异常:
+        ValueError: 清单不是有效的 JSON
+    """
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def verify_file(model_path, manifest, check_hash=True):
+    """
+    核对清单格式版本，以及模型文件与清单记录的大小、摘要
+
+    参数:
+        model_path: 模型文件路径
+        manifest: 清单字典
+        check_hash: 是否计算文件摘要（大小一致时才计算；需要读取整个模型文件）
+
+    返回:
+        不一致项的说明列表（为空表示一致）
+    """
+    version = manifest.get("manifest_version")
+    if not isinstance(version, int) or version > MANIFEST_VERSION:
+        return [f"清单格式版本 {version} 不受支持（支持 {MANIFEST_VERSION} 及以下）"]
+    if not os.path.exists(model_path):
+        return [f"模型文件不存在: {model_path}"]
+    size = os.path.getsize(model_path)
+    if size != manifest.get("file_size"):
+        return [f"文件大小不一致：清单 {manifest.get('file_size')} 字节，实际 {size} 字节"]
+    if check_hash and file_digest(model_path) != manifest.get("file_sha256"):
+        return ["文件 SHA-256 与清单不一致"]
+    return []
+
+def verify_bundle(manifest, bundle):
+    """
+    核对已加载的模型包与清单记录的输入输出列、树的数量
+
+    返回:
+        不一致项的说明列表（为空表示一致）
+    """
+    problems = []
+    for key in ("inputs", "outputs"):
+        if list(bundle[key]) != manifest.get(key):
+            problems.append(f"{key} 不一致：清单 {manifest.get(key)}，模型 {list(bundle[key])}")
+    n_trees = count_trees(bundle["model"])
+    if n_trees != manifest.get("n_trees"):
+        problems.append(f"树的数量不一致：清单 {manifest.get('n_trees')}，模型 {n_trees}")
+    return problems
+
+def list_models(model_dir, check_hash=False):
+    """
+    不反序列化模型，列出目录下的模型文件及其清单
+
+    参数:
+        model_dir: 模型目录
+        check_hash: 是否计算文件摘要核对
+
+    返回:
+        [{"path", "manifest", "problems"}, ...]，没有清单的模型 manifest 为 None
+    """
+    result = []
+    for path in sorted(glob.glob(os.path.join(model_dir, "*.joblib"))):
+        try:
+            manifest = read_manifest(path)
+        except ValueError as e:
+            result.append({"path": path, "manifest": None, "problems": [f"清单无法解析: {e}"]})
+            continue
+        if manifest is None:
+            problems = ["缺少清单"]
+        else:
+            problems = verify_file(path, manifest, check_hash)
+        result.append({"path": path, "manifest": manifest, "problems": problems})
+    return result
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="列出、校验模型清单，或为已有模型补写清单",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  1. 列出 models/ 下的模型（只读清单，不加载模型）：
+     python scripts/model_manifest.py models
+
+  2. 校验模型文件摘要与清单是否一致：
+     python scripts/model_manifest.py models --verify
+
+  3. 为没有清单的旧模型补写清单（需要加载模型）：
+     python scripts/model_manifest.py models/model.joblib --write
+        """
+    )
+    ap.add_argument("path", help="模型目录或模型文件路径")
+    ap.add_argument("--verify", action="store_true", help="计算文件 SHA-256 与清单核对")
+    ap.add_argument("--write", action="store_true", help="为没有清单的模型加载后补写清单（不含训练数据摘要与评估指标）")
+    args = ap.parse_args()
+
+    if args.write:
+        import joblib
+        paths = [args.path] if os.path.isfile(args.path) else sorted(glob.glob(os.path.join(args.path, "*.joblib")))
+        for path in paths:
+            if os.path.exists(manifest_path(path)):
+                print(f"已有清单，跳过: {path}")
+                continue
+            print(f"写入清单: {write_manifest(path, joblib.load(path))}")
+        return
+
+    model_dir = os.path.dirname(args.path) if os.path.isfile(args.path) else args.path
+    entries = list_models(model_dir, check_hash=args.verify)
+    if os.path.isfile(args.path):
+        entries = [e for e in entries if os.path.samefile(e["path"], args.path)]
+    if not entries:
+        print(f"没有找到模型文件: {args.path}")
+        sys.exit(1)
+
+    failed = False
+    for e in entries:
+        m = e["manifest"] or {}
+        status = "正常" if not e["problems"] else "；".join(e["problems"])
+        failed = failed or bool(e["problems"])
+        print(f"\n{e['path']}  [{status}]")
+        if m:
+            print(f"  创建时间: {m.get('created_at')}  大小: {m.get('file_size', 0) / 1024 / 1024:.2f}MB  "
+                  f"类型: {m.get('model_type')}  后端: {m.get('backend')}  树数: {m.get('n_trees')}")
+            print(f"  输入列: {m.get('inputs')}")
+            print(f"  输出列: {m.get('outputs')}")
+            for name, s in (m.get("metrics") or {}).items():
+                print(f"    {name:20s} R2: {s['r2']:.4f}  MAE: {s['mae']:.4f}")
+    if args.verify and failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
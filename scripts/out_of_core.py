@@ -0,0 +1,181 @@
+# out_of_core.py
+# 超出内存的数据集训练
+# 功能：将分块读取的数据写入 float32 内存映射矩阵，分块填充缺失值，
+#       并直接在内存映射矩阵上训练随机森林，控制峰值内存
+
+import os
+
+import numpy as np
+
+# 默认每块读取的行数
+DEFAULT_CHUNK_ROWS = 100000
+
+# 内存映射文件名
+_PARTS = ("X_train", "y_train", "X_test", "y_test")
+
+def write_memmap_dataset(chunks, n_inputs, work_dir, test_size=0.2, random_state=42):
+    """
+    将分块数据写入磁盘上的 float32 矩阵，同时随机划分训练集与测试集
+
+    参数:
+        chunks: 可迭代的数值矩阵（每块形状为 行数 × (输入数+输出数)，列顺序为输入在前）
+        n_inputs: 输入列数
+        work_dir: 内存映射文件所在目录
+        test_size: 测试集比例
+        random_state: 随机种子
+
+    返回:
+        数据集描述字典：{"work_dir", "n_inputs", "n_outputs", "rows": {部分名: 行数}}
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    rng = np.random.default_rng(random_state)
+    rows = {part: 0 for part in _PARTS}
+    n_outputs = None
+    files = {part: open(os.path.join(work_dir, f"{part}.f32"), "wb") for part in _PARTS}
+    try:
+        for block in chunks:
+            block = np.asarray(block, dtype=np.float32)
+            if block.size == 0:
+                continue
+            n_outputs = block.shape[1] - n_inputs
+            is_test = rng.random(len(block)) < test_size
+            for mask, suffix in ((~is_test, "train"), (is_test, "test")):
+                part = block[mask]
+                files[f"X_{suffix}"].write(np.ascontiguousarray(part[:, :n_inputs]).tobytes())
+                files[f"y_{suffix}"].write(np.ascontiguousarray(part[:, n_inputs:]).tobytes())
+                rows[f"X_{suffix}"] += len(part)
+                rows[f"y_{suffix}"] += len(part)
+    finally:
+        for f in files.values():
+            f.close()
+    if n_outputs is None or rows["X_train"] == 0:
+        raise ValueError("数据为空，无法训练")
+    return {"work_dir": work_dir, "n_inputs": n_inputs, "n_outputs": n_outputs, "rows": rows}
+
+def open_part(dataset, part, mode="r"):
+    """
+    以内存映射方式打开数据集的某一部分
+
+    参数:
+        dataset: write_memmap_dataset 返回的描述字典
+        part: X_train / y_train / X_test / y_test
+        mode: 打开模式（"r" 只读，"r+" 读写）
+
+    返回:
+        np.memmap，测试集为空时返回形状为 (0, 列数) 的数组
+    """
+    n_cols = dataset["n_inputs"] if part.startswith("X") else dataset["n_outputs"]
+    n_rows = dataset["rows"][part]
+    if n_rows == 0:
+        return np.empty((0, n_cols), dtype=np.float32)
+    path = os.path.join(dataset["work_dir"], f"{part}.f32")
+    return np.memmap(path, dtype=np.float32, mode=mode, shape=(n_rows, n_cols))
+
+def fill_missing(dataset, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    用训练集各列中位数就地填充所有部分的缺失值
+
+    中位数逐列计算，每次只有一列载入内存；填充按行分块进行。
+
+    参数:
+        dataset: write_memmap_dataset 返回的描述字典
+        chunk_rows: 每块处理的行数
+
+    返回:
+        {"X": 输入列中位数数组, "y": 输出列中位数数组}
+    """
+    medians = {}
+    for kind in ("X", "y"):
+        train = open_part(dataset, f"{kind}_train")
+        med = np.empty(train.shape[1], dtype=np.float32)
+        for j in range(train.shape[1]):
+            col = np.array(train[:, j])
+            value = np.nanmedian(col) if not np.isnan(col).all() else 0.0
+            med[j] = value
+        del train
+        medians[kind] = med
+        for suffix in ("train", "test"):
+            mm = open_part(dataset, f"{kind}_{suffix}", mode="r+")
+            for start in range(0, len(mm), chunk_rows):
+                block = mm[start:start + chunk_rows]
+                nan_rows, nan_cols = np.nonzero(np.isnan(block))
+                if len(nan_rows):
+                    block[nan_rows, nan_cols] = med[nan_cols]
+            if isinstance(mm, np.memmap):
+                mm.flush()
+            del mm
+    return medians
+
+def train_from_memmap(dataset, n_estimators=200, max_samples=None, n_jobs=-1, random_state=42):
+    """
+    直接在内存映射矩阵上训练多输出随机森林
+
+    参数:
+        dataset: write_memmap_dataset 返回的描述字典
+        n_estimators: 树的数量
+        max_samples: 每棵树的子采样规模（整数为行数，小数为比例，None 为全部行）
+        n_jobs: 并行作业数
+        random_state: 随机种子
+
+    返回:
+        训练好的模型
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.multioutput import MultiOutputRegressor
+
+    X_train = open_part(dataset, "X_train")
+    y_train = open_part(dataset, "y_train")
+    base = RandomForestRegressor(
+        n_estimators=n_estimators,
+        max_samples=max_samples,
+        n_jobs=n_jobs,
+        random_state=random_state,
+    )
+    model = MultiOutputRegressor(base)
+    model.fit(X_train, y_train)
+    return model
+
+def evaluate_memmap(model, dataset, output_names, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    分块预测测试集并输出各输出列的 R2 与 MAE
+
+    参数:
+        model: 训练好的模型
+        dataset: write_memmap_dataset 返回的描述字典
+        output_names: 输出列名列表
+        chunk_rows: 每块预测的行数
+
+    返回:
+        {输出列: {"r2": ..., "mae": ...}}，测试集太小时返回 None
+    """
+    from sklearn.metrics import r2_score, mean_absolute_error
+
+    X_test = open_part(dataset, "X_test")
+    y_test = open_part(dataset, "y_test")
+    print("\n=== 模型评估结果 ===")
+    if len(X_test) < 2:
+        print("（测试集样本太少，跳过评估）")
+        return None
+    y_pred = np.empty(y_test.shape, dtype=np.float32)
+    for start in range(0, len(X_test), chunk_rows):
+        y_pred[start:start + chunk_rows] = model.predict(X_test[start:start + chunk_rows])
+    scores = {}
+    for i, col in enumerate(output_names):
+        r2 = r2_score(y_test[:, i], y_pred[:, i])
+        mae = mean_absolute_error(y_test[:, i], y_pred[:, i])
+        print(f"{col:20s} -> R2: {r2:.4f}  MAE: {mae:.4f}")
+        scores[col] = {"r2": float(r2), "mae": float(mae)}
+    return scores
+
+def remove_dataset(dataset):
+    """删除数据集的内存映射文件"""
+    for part in _PARTS:
+        try:
+            os.remove(os.path.join(dataset["work_dir"], f"{part}.f32"))
+        except OSError:
+            pass
+    try:
+        os.rmdir(dataset["work_dir"])
+    except OSError:
+        # 目录非空（如用户指定了已有目录）时保留
+        pass
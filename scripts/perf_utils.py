@@ -0,0 +1,82 @@
+# perf_utils.py
+# 性能统计工具
+# 功能：提供峰值内存等运行时统计，供训练与基准脚本复用
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+def peak_rss_mb(children=False):
+    """
+    获取进程的峰值常驻内存（RSS）
+
+    参数:
+        children: True 时返回已结束子进程中的最大峰值（如进程池工作进程）
+
+    返回:
+        峰值内存（MB），平台不支持时返回 None
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows 没有 resource 模块
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    usage = resource.getrusage(who).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    if sys.platform == "darwin":
+        return usage / 1024 / 1024
+    return usage / 1024
+
+def current_rss_mb():
+    """
+    获取进程当前的常驻内存（RSS），仅支持 Linux
+
+    返回:
+        当前内存（MB），平台不支持时返回 None
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+def format_mb(value):
+    """格式化内存数值，None 显示为 '-'"""
+    return "-" if value is None else f"{value:.1f}MB"
+
+class StageTimer:
+    """
+    记录各阶段的耗时及阶段结束时的峰值内存
+
+    用法:
+        timer = StageTimer()
+        with timer.stage("加载数据"):
+            ...
+        timer.report()
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start, peak_rss_mb()))
+
+    def total(self):
+        return sum(elapsed for _, elapsed, _ in self.stages)
+
+    def report(self, title="各阶段耗时"):
+        """打印各阶段耗时及占比"""
+        total = self.total()
+        print(f"\n=== {title} ===")
+        for name, elapsed, peak in self.stages:
+            share = elapsed / total * 100 if total > 0 else 0.0
+            print(f"  {name:12s} {elapsed:8.3f}秒  {share:5.1f}%  峰值内存={format_mb(peak)}")
+        print(f"  {'合计':12s} {total:8.3f}秒  峰值内存={format_mb(peak_rss_mb())}")
@@ -3,33 +3,173 @@
 # 功能：加载训练好的模型，对新数据进行预测
 
 import argparse
+import csv
+import json
 import sys
 import os
-import pandas as pd
-import numpy as np
-import joblib
 
-def load_model(model_path):
+# pandas 与 joblib 在用到的函数内导入：--help、参数错误与加载压缩模型的交互式预测都不需要 pandas
+
+# 批量达到该行数才并行预测；更小的批量线程启动与同步开销大于收益
+PARALLEL_MIN_ROWS = 1000
+
+def load_model(model_path, check_hash=None):
     """
     加载训练好的模型
     
     参数:
         model_path: 模型文件路径
+        check_hash: 是否计算模型文件的 SHA-256 与清单核对（需要读取整个文件，大模型耗时数秒）；
+                    默认只核对清单版本与文件大小，环境变量 MODEL_VERIFY_HASH=1 时计算摘要
     
     返回:
-        包含模型、输入列名、输出列名的字典
+        包含模型、输入列名、输出列名的字典；manifest 为模型清单（没有清单时为 None），
+        manifest_problems 为与清单不一致的项（见 model_manifest.py）
     """
     if not os.path.exists(model_path):
         print(f"错误：模型文件不存在: {model_path}")
         sys.exit(1)
     
+    # 有清单时先核对清单版本与文件大小（可选摘要），再在加载后核对输入输出列与树的数量
+    from model_manifest import read_manifest, verify_file, verify_bundle
+    if check_hash is None:
+        check_hash = os.environ.get("MODEL_VERIFY_HASH", "0") == "1"
+    try:
+        manifest = read_manifest(model_path)
+    except ValueError as e:
+        print(f"警告：模型清单无法解析，跳过校验: {e}")
+        manifest = None
+    problems = verify_file(model_path, manifest, check_hash) if manifest else []
+    for problem in problems:
+        print(f"警告：模型与清单不一致：{problem}")
+    
+    import joblib
     model_data = joblib.load(model_path)
     print(f"已加载模型: {model_path}")
     print(f"输入列: {model_data['inputs']}")
     print(f"输出列: {model_data['outputs']}")
     
+    if manifest:
+        for problem in verify_bundle(manifest, model_data):
+            print(f"警告：模型与清单不一致：{problem}")
+            problems.append(problem)
+    model_data['manifest'] = manifest
+    model_data['manifest_problems'] = problems
+    
     return model_data
 
+def set_predict_n_jobs(model, n_jobs):
+    """
+    设置模型预测时的并行作业数
+
+    训练时的 n_jobs=-1 会随模型一起保存，预测时同样在所有核上启动线程；
+    该函数修改 MultiOutputRegressor 及其内部每个森林的 n_jobs。
+
+    参数:
+        model: 模型对象（不含 n_jobs 的模型，如 CompactForest，保持不变）
+        n_jobs: 并行作业数（1 为单线程，-1 为全部核）
+
+    返回:
+        是否修改了模型
+    """
+    changed = False
+    for est in [model] + list(getattr(model, 'estimators_', [])):
+        if hasattr(est, 'n_jobs'):
+            est.n_jobs = n_jobs
+            changed = True
+    return changed
+
+def use_per_call_n_jobs(model):
+    """
+    让森林的并行度由每次预测时的 joblib.parallel_config 决定（见 predict_with_threads）
+
+    森林的 n_jobs 置为 None（跟随当前线程的 parallel_config）；外层 MultiOutputRegressor
+    置为 1，按输出串行调用各森林，避免嵌套并行。
+
+    参数:
+        model: 模型对象（就地修改）
+    """
+    set_predict_n_jobs(model, None)
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = 1
+
+def choose_n_jobs(n_rows, max_threads, min_rows=PARALLEL_MIN_ROWS):
+    """
+    预测并行策略：小批量单线程，大批量使用有上限的线程数
+
+    参数:
+        n_rows: 本次预测的行数
+        max_threads: 线程数上限
+        min_rows: 达到该行数才并行
+
+    返回:
+        n_jobs
+    """
+    if max_threads <= 1 or n_rows < min_rows:
+        return 1
+    return max_threads
+
+def predict_with_threads(model, X, max_threads, min_rows=PARALLEL_MIN_ROWS):
+    """
+    按并行策略预测（模型需先经 use_per_call_n_jobs 处理）
+
+    parallel_config 只作用于当前线程，并发请求之间互不影响。
+
+    参数:
+        model: 模型对象
+        X: 输入数据
+        max_threads: 线程数上限
+        min_rows: 达到该行数才并行
+
+    返回:
+        预测结果
+    """
+    import joblib
+    with joblib.parallel_config(n_jobs=choose_n_jobs(len(X), max_threads, min_rows)):
+        return model.predict(X)
+
+def unique_rows(X):
+    """
+    输入行去重（按值哈希分组，-0.0 与 0.0 视为相同）
+
+    参数:
+        X: 输入DataFrame
+
+    返回:
+        (各不同输入首次出现的行号, 每行对应的不同输入序号)，不同输入按首次出现的顺序编号
+    """
+    import numpy as np
+
+    codes = X.groupby(list(X.columns), sort=False).ngroup().to_numpy()
+    _, first = np.unique(codes, return_index=True)
+    return first, codes
+
+def expand_rows(result, inverse):
+    """按行号数组展开预测结果：矩阵按行取，字典（如 predict_uncertainty 的结果）逐项展开"""
+    import numpy as np
+
+    if isinstance(result, dict):
+        return {key: expand_rows(value, inverse) for key, value in result.items()}
+    return np.asarray(result)[inverse]
+
+def predict_unique(predict, X):
+    """
+    只预测不同的输入行，再按原顺序广播回全部行，结果与逐行预测相同
+
+    参数:
+        predict: 预测函数，接受输入DataFrame，返回预测矩阵或 predict_uncertainty 形式的字典
+        X: 输入DataFrame
+
+    返回:
+        (预测结果, 不同输入行数)
+    """
+    if len(X) < 2:
+        return predict(X), len(X)
+    first, inverse = unique_rows(X)
+    if len(first) == len(X):
+        return predict(X), len(X)
+    return expand_rows(predict(X.iloc[first]), inverse), len(first)
+
 def prepare_input_data(data, expected_inputs):
     """
     准备输入数据，确保列顺序和名称正确
@@ -41,6 +181,8 @@ def prepare_input_data(data, expected_inputs):
     返回:
         准备好的输入DataFrame
     """
+    import pandas as pd
+    
     # 如果是字典或列表，转换为DataFrame
     if isinstance(data, dict):
         df = pd.DataFrame([data])
@@ -76,7 +218,33 @@ def prepare_input_data(data, expected_inputs):
     
     return df
 
-def predict_from_file(model_path, input_file, output_file=None):
+def read_input_file(source, filename=None):
+    """
+    读取输入数据文件（CSV/Excel）
+    
+    参数:
+        source: 文件路径或文件对象
+        filename: 文件名（source 为文件对象时用于判断格式）
+    
+    返回:
+        输入DataFrame
+    """
+    import pandas as pd
+    
+    name = (filename or str(source)).lower()
+    if name.endswith('.csv'):
+        return pd.read_csv(source)
+    elif name.endswith(('.xls', '.xlsx')):
+        return pd.read_excel(source)
+    else:
+        try:
+            return pd.read_csv(source)
+        except:
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            return pd.read_excel(source)
+
+def predict_from_file(model_path, input_file, output_file=None, quantiles=None, dedup=True):
     """
     从文件读取数据并预测
     
@@ -84,10 +252,15 @@ def predict_from_file(model_path, input_file, output_file=None):
         model_path: 模型文件路径
         input_file: 输入数据文件路径 (CSV/Excel)
         output_file: 输出结果文件路径（可选）
+        quantiles: 不确定性模式的分位数序列（可选）；指定时每个输出额外输出各树预测的
+                   标准差（列名后缀 _std）与分位数（后缀 _q5、_q95 等）
+        dedup: 只预测不同的输入行，再按原顺序广播回全部行（默认开启）
     
     返回:
         预测结果DataFrame
     """
+    import pandas as pd
+    
     # 加载模型
     model_data = load_model(model_path)
     model = model_data['model']
@@ -96,15 +269,7 @@ def predict_from_file(model_path, input_file, output_file=None):
     
     # 读取输入数据
     print(f"\n正在读取输入文件: {input_file}")
-    if input_file.lower().endswith('.csv'):
-        input_df = pd.read_csv(input_file)
-    elif input_file.lower().endswith(('.xls', '.xlsx')):
-        input_df = pd.read_excel(input_file)
-    else:
-        try:
-            input_df = pd.read_csv(input_file)
-        except:
-            input_df = pd.read_excel(input_file)
+    input_df = read_input_file(input_file)
     
     print(f"读取到 {len(input_df)} 条数据")
     
@@ -116,10 +281,31 @@ def predict_from_file(model_path, input_file, output_file=None):
     
     # 预测
     print("\n正在进行预测...")
-    predictions = model.predict(X)
+    if quantiles is None:
+        predict = model.predict
+    else:
+        from uncertainty import predict_uncertainty, supports_uncertainty
+        if not supports_uncertainty(model):
+            print("错误：当前模型不支持不确定性模式（需要随机森林模型）")
+            sys.exit(1)
+        predict = lambda rows: predict_uncertainty(model, rows, quantiles)
+    if dedup:
+        result, n_unique = predict_unique(predict, X)
+        print(f"不同输入 {n_unique} 行，共 {len(X)} 行（重复率 {1 - n_unique / max(len(X), 1):.1%}）")
+    else:
+        result = predict(X)
+    if quantiles is None:
+        predictions = result
+        extra = {}
+    else:
+        from uncertainty import uncertainty_columns
+        predictions = result["mean"]
+        extra = uncertainty_columns(outputs, result)
     
     # 构建结果DataFrame
     result_df = pd.DataFrame(predictions, columns=outputs, index=X.index)
+    if extra:
+        result_df = pd.concat([result_df, pd.DataFrame(extra, index=X.index)], axis=1)
     
     # 合并原始输入和预测结果
     full_result = pd.concat([X, result_df], axis=1)
@@ -139,6 +325,198 @@ def predict_from_file(model_path, input_file, output_file=None):
     
     return full_result
 
+def predict_via_daemon(socket_path, model_path, input_file, output_file=None):
+    """
+    客户端模式：把 CSV 的行发送给预测守护进程（见 predict_daemon.py），不在本进程导入 pandas/sklearn
+
+    参数:
+        socket_path: 守护进程的套接字路径
+        model_path: 模型文件路径（由守护进程加载并常驻）
+        input_file: 输入 CSV 文件路径
+        output_file: 输出 CSV 文件路径（可选），列为模型输入列与输出列，与 predict_from_file 一致
+
+    返回:
+        守护进程的响应字典（inputs、outputs、rows、predictions）
+    """
+    import time
+    from predict_daemon import DaemonClient
+    
+    if not input_file.lower().endswith('.csv') or (output_file and not output_file.lower().endswith('.csv')):
+        print("错误：客户端模式只支持 CSV 输入输出")
+        sys.exit(1)
+    with open(input_file, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        rows = [row for row in reader if row]
+    
+    start = time.perf_counter()
+    try:
+        client = DaemonClient(socket_path)
+    except OSError as e:
+        print(f"错误：无法连接预测守护进程 {socket_path}（{e}）")
+        print("请先启动：python scripts/predict_daemon.py --model <模型路径> &")
+        sys.exit(1)
+    try:
+        response = client.predict(rows, columns, model_path)
+    except RuntimeError as e:
+        print(f"错误：守护进程预测失败：{e}")
+        sys.exit(1)
+    finally:
+        client.close()
+    print(f"通过守护进程预测 {len(rows)} 行，耗时 {(time.perf_counter() - start) * 1000:.1f}ms"
+          f"（模型版本 {response['version']}）")
+    
+    if output_file:
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(response['inputs'] + response['outputs'])
+            for values, predictions in zip(response['rows'], response['predictions']):
+                writer.writerow(values + predictions)
+        print(f"预测结果已保存到: {output_file}")
+    else:
+        for values, predictions in list(zip(response['rows'], response['predictions']))[:5]:
+            print(dict(zip(response['inputs'] + response['outputs'], values + predictions)))
+    return response
+
+def parse_stream_row(line, fmt, header):
+    """
+    解析流式输入的一行
+
+    参数:
+        line: 去掉换行符的一行文本
+        fmt: ndjson 或 csv
+        header: CSV 的列名列表
+
+    返回:
+        {列名: 值} 字典
+    """
+    if fmt == "ndjson":
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("每行必须是 JSON 对象")
+        return record
+    values = next(csv.reader([line]))
+    if len(values) != len(header):
+        raise ValueError(f"列数 {len(values)} 与表头 {len(header)} 不一致")
+    return dict(zip(header, values))
+
+def predict_stream(model_path, source=None, sink=None, batch_size=256, batch_timeout=0.05, fmt="auto"):
+    """
+    流式管道模式：从 source（默认标准输入）逐行读取 NDJSON 或带表头的 CSV，
+    按行数或等待时间组成小批量，每批一次向量化预测，结果以 NDJSON 写入 sink（默认标准输出）并立即刷新
+
+    每个输入行输出一行：原始字段加各输出列；该行无法解析或缺少输入列时输出原始字段加 "error"，
+    整批预测出错时该批每行都输出 "error"，后续批次照常处理；输出行与输入行一一对应、顺序一致。加载信息与统计输出到标准错误，不混入结果。
+
+    参数:
+        model_path: 模型文件路径
+        source: 输入流
+        sink: 输出流
+        batch_size: 每批最多行数
+        batch_timeout: 批内第一行到达后最多等待的秒数，超时即预测已到达的行
+        fmt: ndjson、csv 或 auto（首个非空行以 { 开头为 NDJSON，否则为 CSV 表头）
+
+    返回:
+        (输出行数, 批次数)
+    """
+    import contextlib
+    import queue
+    import threading
+    import time
+    import numpy as np
+    
+    source = source or sys.stdin
+    sink = sink or sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        model_data = load_model(model_path)
+    model = model_data['model']
+    inputs = model_data['inputs']
+    outputs = model_data['outputs']
+    
+    # 后台线程读取输入，主线程按行数或超时切分批次
+    lines = queue.Queue(maxsize=batch_size * 4)
+    eof = object()
+    
+    def reader():
+        for line in source:
+            lines.put(line)
+        lines.put(eof)
+    
+    threading.Thread(target=reader, daemon=True).start()
+    
+    def flush(batch):
+        # batch: [(原始字段, 输入值列表或 None, 错误信息或 None)]
+        valid = [i for i, (_, values, _) in enumerate(batch) if values is not None]
+        results = {}
+        batch_error = None
+        if valid:
+            try:
+                X = np.array([batch[i][1] for i in valid], dtype=np.float64)
+                if hasattr(model, 'feature_names_in_'):
+                    import pandas as pd
+                    X = pd.DataFrame(X, columns=inputs)
+                predictions = np.asarray(model.predict(X), dtype=np.float64).reshape(len(valid), -1).tolist()
+                results = dict(zip(valid, predictions))
+            except Exception as e:
+                # 整批预测失败时该批每行输出错误，管道继续处理后续批次
+                batch_error = f"预测失败: {type(e).__name__}: {e}"
+                print(f"警告：{len(valid)} 行的批次{batch_error}", file=sys.stderr)
+        out = []
+        for i, (record, values, error) in enumerate(batch):
+            record = dict(record)
+            if i in results:
+                record.update(zip(outputs, results[i]))
+            else:
+                record["error"] = error if values is None else batch_error
+            out.append(json.dumps(record, ensure_ascii=False))
+        sink.write("\n".join(out) + "\n")
+        sink.flush()
+    
+    header = None
+    batch = []
+    deadline = None
+    n_rows = n_batches = 0
+    start = time.perf_counter()
+    while True:
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            line = lines.get(timeout=timeout)
+        except queue.Empty:
+            line = None
+        if line is not None and line is not eof:
+            line = line.rstrip("\r\n")
+            if line.strip():
+                if fmt == "auto":
+                    fmt = "ndjson" if line.lstrip().startswith("{") else "csv"
+                if fmt == "csv" and header is None:
+                    header = next(csv.reader([line]))
+                    continue
+                try:
+                    record = parse_stream_row(line, fmt, header)
+                except ValueError as e:
+                    batch.append(({"line": line}, None, f"无法解析: {e}"))
+                else:
+                    try:
+                        batch.append((record, [float(record[name]) for name in inputs], None))
+                    except KeyError as e:
+                        batch.append((record, None, f"缺少输入列: {e.args[0]}"))
+                    except (TypeError, ValueError) as e:
+                        batch.append((record, None, f"输入值无效: {e}"))
+                if deadline is None:
+                    deadline = time.monotonic() + batch_timeout
+        if batch and (line is None or line is eof or len(batch) >= batch_size):
+            flush(batch)
+            n_rows += len(batch)
+            n_batches += 1
+            batch = []
+            deadline = None
+        if line is eof:
+            break
+    
+    elapsed = time.perf_counter() - start
+    print(f"流式预测完成：{n_rows} 行，{n_batches} 批，耗时 {elapsed:.2f} 秒", file=sys.stderr)
+    return n_rows, n_batches
+
 def predict_interactive(model_path):
     """
     交互式预测模式
@@ -175,8 +553,12 @@ def predict_interactive(model_path):
         if len(input_data) != len(inputs):
             continue
         
-        # 准备数据并预测
-        X = pd.DataFrame([input_data])
+        # 准备数据并预测（以 DataFrame 训练的模型按列名输入；压缩模型直接用数组，不必导入 pandas）
+        if hasattr(model, 'feature_names_in_'):
+            import pandas as pd
+            X = pd.DataFrame([input_data])
+        else:
+            X = [[input_data[inp] for inp in inputs]]
         predictions = model.predict(X)
         
         print("\n预测结果:")
@@ -199,6 +581,15 @@ def main():
   
   3. 从文件预测（不保存结果）：
      python predict.py --model model.joblib --input new_data.csv
+  
+  4. 从文件预测并输出各树预测的标准差与 5%/95% 分位数：
+     python predict.py --model model.joblib --input new_data.csv --uncertainty --quantiles 0.05,0.95
+  
+  5. 通过常驻的预测守护进程预测（先启动 predict_daemon.py，每次调用只需毫秒级）：
+     python predict.py --model model.joblib --input new_data.csv --output predictions.csv --socket
+  
+  6. 流式管道模式（NDJSON 或 CSV 从标准输入读入，NDJSON 结果写到标准输出）：
+     cat rows.ndjson | python predict.py --model model.joblib --stream > predictions.ndjson
         """
     )
     
@@ -206,15 +597,45 @@ def main():
     ap.add_argument("--input", help="输入数据文件路径 (csv/xlsx)")
     ap.add_argument("--output", help="输出预测结果文件路径 (csv/xlsx)")
     ap.add_argument("--interactive", action="store_true", help="交互式预测模式")
+    ap.add_argument("--uncertainty", action="store_true",
+                    help="不确定性模式：额外输出各树预测的标准差与分位数（仅文件预测）")
+    ap.add_argument("--quantiles", default="0.05,0.95", help="不确定性模式的分位数，逗号分隔")
+    ap.add_argument("--no-dedup", action="store_true",
+                    help="文件预测时不对重复的输入行去重（默认只预测不同的输入行，再广播回全部行）")
+    ap.add_argument("--stream", action="store_true",
+                    help="流式管道模式：从标准输入读取 NDJSON 或带表头的 CSV，按小批量预测，结果以 NDJSON 写到标准输出")
+    ap.add_argument("--stream-format", choices=["auto", "ndjson", "csv"], default="auto",
+                    help="流式输入格式（auto 按首行判断）")
+    ap.add_argument("--batch-size", type=int, default=256, help="流式模式每批最多行数")
+    ap.add_argument("--batch-timeout", type=float, default=50, help="流式模式批内第一行到达后最多等待的毫秒数")
+    ap.add_argument("--socket", nargs="?", const="", default=None,
+                    help="客户端模式：通过预测守护进程预测（仅 CSV 文件预测），可指定套接字路径")
     
     args = ap.parse_args()
     
-    if args.interactive:
+    if args.stream:
+        predict_stream(args.model, batch_size=max(1, args.batch_size), batch_timeout=args.batch_timeout / 1000,
+                       fmt=args.stream_format)
+    elif args.socket is not None:
+        if not args.input or args.interactive or args.uncertainty:
+            print("错误：客户端模式只支持 --input 文件预测（不支持 --interactive 与 --uncertainty）")
+            sys.exit(1)
+        from predict_daemon import DEFAULT_SOCKET
+        predict_via_daemon(args.socket or DEFAULT_SOCKET, args.model, args.input, args.output)
+    elif args.interactive:
         # 交互式预测
         predict_interactive(args.model)
     elif args.input:
         # 从文件预测
-        predict_from_file(args.model, args.input, args.output)
+        quantiles = None
+        if args.uncertainty:
+            from uncertainty import parse_quantiles
+            try:
+                quantiles = parse_quantiles(args.quantiles)
+            except ValueError as e:
+                print(f"错误：{e}")
+                sys.exit(1)
+        predict_from_file(args.model, args.input, args.output, quantiles, dedup=not args.no_dedup)
     else:
         print("错误：请指定 --input 文件或使用 --interactive 模式")
         sys.exit(1)
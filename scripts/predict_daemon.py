@@ -0,0 +1,321 @@
+# predict_daemon.py
+# 预测守护进程
+# 功能：常驻内存保存已加载的模型，在 Unix 域套接字上接收预测请求，避免每次调用 predict.py
+#       都重新导入 pandas/sklearn 并反序列化模型；模型文件变化（大小或修改时间）后在下一次请求时重新加载。
+# 协议：每行一个 JSON 请求，每行一个 JSON 响应，同一连接可连续发送多个请求
+#   请求 {"op": "predict", "model": 模型路径（可选）, "columns": [列名]（可选）, "rows": [[值, ...], ...]}
+#        （不给 columns 时按模型输入列顺序；rows 也可以是 [{列名: 值}, ...]）
+#   响应 {"ok": true, "model": 路径, "version": 版本, "inputs": [...], "outputs": [...],
+#        "rows": [[整理后的输入值]], "predictions": [[预测值]]}，出错时 {"ok": false, "error": 说明}
+#   {"op": "ping"} 返回已加载的模型列表
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+# 默认套接字路径（每个用户一个）
+DEFAULT_SOCKET = os.environ.get("PREDICTFLOW_SOCKET") or os.path.join(
+    tempfile.gettempdir(), f"predictflow-{os.getuid()}.sock")
+
+# 单个请求行的最大字节数
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+def file_version(path):
+    """模型文件的版本标识（大小与修改时间），文件变化后不同"""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+class ModelStore:
+    """
+    已加载模型的缓存
+
+    每次取模型时比较文件版本，变化后重新加载；新文件加载失败（如仍在写入）时继续使用旧模型，
+    下一次请求再重试。反序列化在每个模型各自的锁内进行，不阻塞其他模型的请求；
+    某个模型重新加载期间，该模型的其他请求继续使用旧版本。
+    """
+
+    def __init__(self, max_threads=1):
+        self.max_threads = max_threads
+        self._models = {}
+        self._path_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """
+        返回 (版本, 模型字典)
+
+        异常:
+            FileNotFoundError: 模型文件不存在且没有已加载的旧版本
+            RuntimeError: 模型加载失败且没有已加载的旧版本
+        """
+        path = os.path.abspath(path)
+        cached = self._models.get(path)
+        try:
+            version = file_version(path)
+        except FileNotFoundError:
+            if cached is None:
+                raise FileNotFoundError(f"模型文件不存在: {path}")
+            return cached
+        if cached is not None and cached[0] == version:
+            return cached
+        with self._lock:
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+        # 其他线程正在加载该模型：有旧版本时直接使用旧版本，否则等待加载完成
+        if not path_lock.acquire(blocking=cached is None):
+            return cached
+        try:
+            cached = self._models.get(path)
+            if cached is not None and cached[0] == version:
+                return cached
+            try:
+                entry = (version, self._load(path))
+            except Exception as e:
+                if cached is None:
+                    raise
+                print(f"警告：重新加载模型失败，继续使用旧版本: {path}: {e}", flush=True)
+                return cached
+            print(f"{'重新' if cached else ''}加载模型: {path}（版本 {version}）", flush=True)
+            with self._lock:
+                self._models[path] = entry
+            return entry
+        finally:
+            path_lock.release()
+
+    def _load(self, path):
+        from predict import load_model, use_per_call_n_jobs
+        try:
+            data = load_model(path)
+        except SystemExit:
+            # load_model 面向命令行，失败时调用 sys.exit；守护进程中转为普通异常返回给客户端
+            raise RuntimeError(f"无法加载模型: {path}")
+        use_per_call_n_jobs(data['model'])
+        return data
+
+    def loaded(self):
+        with self._lock:
+            return {path: version for path, (version, _) in self._models.items()}
+
+def predict_rows(model_data, rows, columns=None, max_threads=1):
+    """
+    预测一批行
+
+    参数:
+        model_data: load_model 返回的模型字典
+        rows: [[值, ...], ...] 或 [{列名: 值}, ...]
+        columns: rows 为列表时的列名（默认为模型输入列顺序）
+        max_threads: 预测线程数上限
+
+    返回:
+        (整理后的输入矩阵, 预测矩阵)，均为嵌套列表
+    """
+    import numpy as np
+    import pandas as pd
+    from predict import prepare_input_data, predict_with_threads
+
+    inputs = model_data['inputs']
+    if rows and isinstance(rows[0], dict):
+        df = pd.DataFrame(rows)
+    else:
+        df = pd.DataFrame(rows, columns=columns or inputs)
+    X = prepare_input_data(df, inputs)
+    predictions = predict_with_threads(model_data['model'], X, max_threads)
+    return X.to_numpy(dtype=float).tolist(), np.asarray(predictions, dtype=float).tolist()
+
+class PredictHandler(socketserver.StreamRequestHandler):
+    """逐行读取 JSON 请求并返回 JSON 响应"""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES)
+            if not line:
+                return
+            if len(line) >= MAX_REQUEST_BYTES and not line.endswith(b"\n"):
+                # 超长的请求行无法与响应对应，返回一个错误后关闭连接
+                self.send({"ok": False, "error": f"请求超过 {MAX_REQUEST_BYTES} 字节，连接已关闭"})
+                return
+            if not line.strip():
+                continue
+            try:
+                response = self.server.dispatch(json.loads(line))
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.send(response)
+
+    def send(self, response):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+class PredictServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, store, default_model=None):
+        self.store = store
+        self.default_model = default_model
+        super().__init__(socket_path, PredictHandler)
+
+    def dispatch(self, request):
+        op = request.get("op", "predict")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "models": self.store.loaded()}
+        if op != "predict":
+            return {"ok": False, "error": f"未知的操作: {op}"}
+        path = request.get("model") or self.default_model
+        if not path:
+            return {"ok": False, "error": "未指定模型，且守护进程没有默认模型"}
+        version, data = self.store.get(path)
+        rows, predictions = predict_rows(data, request.get("rows") or [], request.get("columns"),
+                                         self.store.max_threads)
+        return {
+            "ok": True,
+            "model": os.path.abspath(path),
+            "version": version,
+            "inputs": data['inputs'],
+            "outputs": data['outputs'],
+            "rows": rows,
+            "predictions": predictions,
+        }
+
+class DaemonClient:
+    """
+    守护进程客户端（只用标准库，不导入 pandas/sklearn）
+
+    同一客户端对象复用一个连接，可连续发送多个请求。
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=60.0):
+        self.socket_path = socket_path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+        self.file = self.sock.makefile("rb")
+
+    def request(self, payload):
+        """
+        发送请求并返回响应字典
+
+        异常:
+            RuntimeError: 守护进程返回错误或关闭连接
+        """
+        self.sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+        line = self.file.readline(MAX_REQUEST_BYTES)
+        if not line:
+            raise RuntimeError("守护进程关闭了连接")
+        if not line.endswith(b"\n"):
+            # 响应超长或被截断，连接上剩余的数据无法再与请求对应
+            self.close()
+            if len(line) >= MAX_REQUEST_BYTES:
+                raise RuntimeError(f"守护进程的响应超过 {MAX_REQUEST_BYTES} 字节，连接已关闭")
+            raise RuntimeError("守护进程在响应中途关闭了连接")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "未知错误"))
+        return response
+
+    def predict(self, rows, columns=None, model=None):
+        """预测一批行，参数与返回值见模块说明"""
+        payload = {"op": "predict", "rows": rows}
+        if columns is not None:
+            payload["columns"] = list(columns)
+        if model is not None:
+            payload["model"] = os.path.abspath(model)
+        return self.request(payload)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+def remove_stale_socket(socket_path):
+    """
+    删除无人监听的旧套接字文件
+
+    异常:
+        RuntimeError: 已有守护进程在该路径上监听
+    """
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"已有守护进程在监听: {socket_path}")
+
+def main():
+    """主函数"""
+    ap = argparse.ArgumentParser(
+        description="预测守护进程：常驻内存保存模型，在 Unix 域套接字上提供预测",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+使用示例:
+  1. 启动守护进程并预先加载默认模型：
+     python scripts/predict_daemon.py --model models/model.joblib &
+
+  2. 通过守护进程预测（predict.py 客户端模式，不导入 pandas/sklearn）：
+     python scripts/predict.py --model models/model.joblib --input new_data.csv --output out.csv --socket
+
+  3. 检查守护进程状态：
+     python scripts/predict_daemon.py --ping
+
+默认套接字: {DEFAULT_SOCKET}（可用环境变量 PREDICTFLOW_SOCKET 修改）
+        """
+    )
+    ap.add_argument("--model", action="append", default=[],
+                    help="启动时预先加载的模型（可重复，第一个为请求未指定模型时的默认模型）")
+    ap.add_argument("--socket", default=DEFAULT_SOCKET, help="套接字路径")
+    ap.add_argument("--max-threads", type=int, default=min(4, os.cpu_count() or 1),
+                    help="单个请求预测的线程数上限（行数少于 1000 时单线程）")
+    ap.add_argument("--ping", action="store_true", help="检查守护进程是否在运行并列出已加载的模型")
+    args = ap.parse_args()
+
+    if args.ping:
+        try:
+            client = DaemonClient(args.socket, timeout=5)
+            info = client.request({"op": "ping"})
+        except (OSError, RuntimeError) as e:
+            print(f"守护进程未运行: {args.socket}（{e}）")
+            sys.exit(1)
+        print(f"守护进程运行中: pid={info['pid']}  套接字: {args.socket}")
+        for path, version in info["models"].items():
+            print(f"  {path}  版本 {version}")
+        return
+
+    store = ModelStore(args.max_threads)
+    for path in args.model:
+        store.get(path)
+    try:
+        remove_stale_socket(args.socket)
+    except RuntimeError as e:
+        print(f"错误：{e}")
+        sys.exit(1)
+
+    old_umask = os.umask(0o177)  # 套接字只允许当前用户访问
+    try:
+        server = PredictServer(args.socket, store, args.model[0] if args.model else None)
+    finally:
+        os.umask(old_umask)
+
+    import signal
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"预测守护进程已启动: {args.socket}（pid={os.getpid()}）", flush=True)
+    start = time.time()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        print(f"预测守护进程已退出（运行 {time.time() - start:.0f} 秒）", flush=True)
+
+if __name__ == "__main__":
+    main()
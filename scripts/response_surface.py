@@ -0,0 +1,386 @@
+# response_surface.py
+# 预计算响应面
+# 功能：对只有两个输入的模型，在规则网格上预先计算模型预测值（float32 数组），
+#       预测时用双线性插值查表，每行耗时与树的数量无关；
+#       网格外或插值误差上界超过容差的行回退到完整模型
+
+import time
+
+import numpy as np
+
+# 默认每个输入方向的网格点数
+DEFAULT_RESOLUTION = 128
+
+# 默认容差：插值误差上界不超过该输出在网格上取值范围的 1%
+DEFAULT_TOLERANCE = 0.01
+
+# 由分裂阈值确定网格范围时，两端各向外扩展范围的比例
+RANGE_MARGIN = 0.01
+
+def threshold_ranges(model, n_features):
+    """
+    根据树的分裂阈值确定每个输入的取值范围
+
+    超出所有阈值之外，树模型的预测不再随该输入变化，因此把查询点截断到该范围是精确的。
+
+    参数:
+        model: MultiOutputRegressor(RandomForestRegressor)、直方图梯度提升后端或 CompactForest
+        n_features: 输入个数
+
+    返回:
+        (lows, highs)，无法从模型中读取阈值时返回 None
+    """
+    if hasattr(model, "feature") and hasattr(model, "threshold"):
+        pairs = [(model.feature, model.threshold)]
+    elif hasattr(model, "estimators_"):
+        pairs = []
+        for est in model.estimators_:
+            if hasattr(est, "_predictors"):
+                # 直方图梯度提升：只取分裂节点（回归链中编号超出输入个数的特征是前面输出的预测值）
+                for predictors in est._predictors:
+                    for predictor in predictors:
+                        nodes = predictor.nodes[~predictor.nodes["is_leaf"].astype(bool)]
+                        pairs.append((nodes["feature_idx"], nodes["num_threshold"]))
+            else:
+                pairs += [(tree.tree_.feature, tree.tree_.threshold) for tree in getattr(est, "estimators_", [])]
+    else:
+        return None
+    if not pairs:
+        return None
+    feature = np.concatenate([p[0] for p in pairs])
+    threshold = np.concatenate([p[1] for p in pairs]).astype(np.float64)
+    lows = np.zeros(n_features)
+    highs = np.ones(n_features)
+    for f in range(n_features):
+        t = threshold[feature == f]
+        if len(t):
+            lo, hi = float(t.min()), float(t.max())
+            margin = max(hi - lo, 1e-9) * RANGE_MARGIN
+            lows[f], highs[f] = lo - margin, hi + margin
+    return lows, highs
+
+def _model_predict(model, inputs, X):
+    """以与训练时一致的形式（有列名时用 DataFrame）调用模型预测"""
+    if hasattr(model, "feature_names_in_"):
+        import pandas as pd
+        X = pd.DataFrame(X, columns=inputs)
+    return np.asarray(model.predict(X), dtype=np.float64).reshape(len(X), -1)
+
+def _predict_chunks(model, inputs, X, chunk_rows):
+    parts = [_model_predict(model, inputs, X[start:start + chunk_rows])
+             for start in range(0, len(X), chunk_rows)]
+    return np.concatenate(parts)
+
+def _iter_trees(model):
+    """
+    逐棵读取树结构
+
+    返回:
+        (每个输出的常数项, [(输出下标, 权重, 额外特征, feature, threshold, left, right, is_leaf, value), ...])，
+        节点编号从 0（根节点）开始；模型的预测 = 常数项 + Σ 权重 × 所在叶节点的值。
+        额外特征为回归链中编号 2, 3, ... 的特征对应的（前面已预测的）输出下标。
+        无法读取树结构时返回 None
+    """
+    trees = []
+    if hasattr(model, "feature") and hasattr(model, "roots"):
+        # CompactForest：所有树的节点在同一组扁平数组中，叶节点的子节点指向自身
+        ends = np.append(model.roots[1:], model.node_count)
+        counts = np.bincount(model.tree_output, minlength=model.n_outputs)
+        for root, end, o in zip(model.roots, ends, model.tree_output):
+            own = np.arange(end - root)
+            left = model.left[root:end] - root
+            trees.append((int(o), 1.0 / counts[o], [], model.feature[root:end], model.threshold[root:end],
+                          left, model.right[root:end] - root, left == own, model.value[root:end]))
+        return np.zeros(model.n_outputs), trees
+    if not hasattr(model, "estimators_"):
+        return None
+    # 回归链的第 k 个模型预测第 order_[k] 个输出，以前 k 个模型的预测值作为额外特征
+    chain = hasattr(model, "order_")
+    order = [int(o) for o in getattr(model, "order_", range(len(model.estimators_)))]
+    offset = np.zeros(len(model.estimators_))
+    for k, (o, est) in enumerate(zip(order, model.estimators_)):
+        extra = order[:k] if chain else []
+        if hasattr(est, "_predictors"):
+            # 直方图梯度提升：预测 = 基线 + 各轮树的叶节点值之和（只支持恒等链接的损失）
+            if est.loss not in ("squared_error", "absolute_error", "quantile"):
+                return None
+            offset[o] = float(np.ravel(est._baseline_prediction)[0])
+            for predictors in est._predictors:
+                for predictor in predictors:
+                    n = predictor.nodes
+                    trees.append((o, 1.0, extra, n["feature_idx"], n["num_threshold"], n["left"], n["right"],
+                                  n["is_leaf"].astype(bool), n["value"]))
+        elif hasattr(est, "estimators_") and hasattr(est.estimators_[0], "tree_"):
+            # 随机森林：预测为各树的平均值
+            for tree in est.estimators_:
+                t = tree.tree_
+                trees.append((o, 1.0 / len(est.estimators_), extra, t.feature, t.threshold, t.children_left,
+                              t.children_right, t.children_left == -1, t.value[:, 0, 0]))
+        else:
+            return None
+    return offset, trees
+
+def _leaf_boxes(feature, threshold, left, right, is_leaf, n_features=2):
+    """
+    求每个叶节点在前 n_features 个输入上的区域 (lo, hi]
+
+    编号不小于 n_features 的特征不限制区域。
+
+    返回:
+        (叶节点编号, 下界 (叶节点数, n_features), 上界 (叶节点数, n_features))
+    """
+    node = np.array([0])
+    lo = np.full((1, n_features), -np.inf)
+    hi = np.full((1, n_features), np.inf)
+    leaves, leaf_lo, leaf_hi = [], [], []
+    while len(node):
+        leaf = is_leaf[node]
+        leaves.append(node[leaf])
+        leaf_lo.append(lo[leaf])
+        leaf_hi.append(hi[leaf])
+        node, lo, hi = node[~leaf], lo[~leaf], hi[~leaf]
+        f = feature[node].astype(np.int64)
+        t = threshold[node].astype(np.float64)
+        rows = np.flatnonzero(f < n_features)
+        # 左子节点 x <= t，右子节点 x > t
+        lo_left, hi_left = lo.copy(), hi.copy()
+        hi_left[rows, f[rows]] = np.minimum(hi_left[rows, f[rows]], t[rows])
+        lo_right, hi_right = lo, hi.copy()
+        lo_right[rows, f[rows]] = np.maximum(lo_right[rows, f[rows]], t[rows])
+        node = np.concatenate([left[node], right[node]]).astype(np.int64)
+        lo = np.concatenate([lo_left, lo_right])
+        hi = np.concatenate([hi_left, hi_right])
+    return np.concatenate(leaves), np.concatenate(leaf_lo), np.concatenate(leaf_hi)
+
+def cell_bounds(model, axes, n_outputs):
+    """
+    求树模型在每个网格单元内预测值的下界与上界
+
+    每棵树在单元内的取值范围是与单元相交的叶节点值的最小值与最大值，
+    按预测公式（常数项 + Σ 权重 × 叶节点值）累加得到模型在单元内的界，对单元内任意点都成立。
+    回归链中以前面输出的预测值为特征的分裂，按该输出在单元内的界判断是否相交。
+    单元边界向外放宽一点，覆盖树模型内部把输入转换为 float32 比较时的舍入。
+
+    参数:
+        model: 树模型（见 threshold_ranges）
+        axes: 两个输入方向的网格节点坐标
+        n_outputs: 输出数
+
+    返回:
+        (下界, 上界)，形状均为 (n0 - 1, n1 - 1, 输出数)；无法读取树结构时返回 None
+    """
+    found = _iter_trees(model)
+    if found is None:
+        return None
+    offset, trees = found
+    n0, n1 = len(axes[0]) - 1, len(axes[1]) - 1
+    pads = [1e-6 * max(abs(a[0]), abs(a[-1]), a[-1] - a[0]) for a in axes]
+    lower = np.tile(offset, (n0 * n1, 1))
+    upper = lower.copy()
+    for o, weight, extra, feature, threshold, left, right, is_leaf, value in trees:
+        leaves, lo, hi = _leaf_boxes(feature, threshold, left, right, is_leaf, 2 + len(extra))
+        # 与叶节点区域 (lo, hi] 相交的单元 k 满足 lo < 单元上边界 且 hi >= 单元下边界
+        start = [np.searchsorted(a[1:] + pad, lo[:, i], side="right") for i, (a, pad) in enumerate(zip(axes, pads))]
+        end = [np.searchsorted(a[:-1] - pad, hi[:, i], side="right") for i, (a, pad) in enumerate(zip(axes, pads))]
+        width = np.maximum(end[1] - start[1], 0)
+        count = np.maximum(end[0] - start[0], 0) * width
+        # 展开为 (叶节点, 单元) 对
+        owner = np.repeat(np.arange(len(leaves)), count)
+        rank = np.arange(len(owner)) - np.repeat(np.cumsum(count) - count, count)
+        cell = (start[0][owner] + rank // width[owner]) * n1 + start[1][owner] + rank % width[owner]
+        for d, prev in enumerate(extra):
+            # 前面输出的预测值在单元内介于其下界与上界之间
+            pad = 1e-6 * np.maximum(np.abs(lower[cell, prev]), np.abs(upper[cell, prev]))
+            keep = (lo[owner, 2 + d] < upper[cell, prev] + pad) & (hi[owner, 2 + d] >= lower[cell, prev] - pad)
+            owner, cell = owner[keep], cell[keep]
+        leaf_value = np.asarray(value, dtype=np.float64)[leaves][owner]
+        tree_min = np.full(n0 * n1, np.inf)
+        tree_max = np.full(n0 * n1, -np.inf)
+        np.minimum.at(tree_min, cell, leaf_value)
+        np.maximum.at(tree_max, cell, leaf_value)
+        lower[:, o] += weight * tree_min
+        upper[:, o] += weight * tree_max
+    shape = (n0, n1, n_outputs)
+    return lower.reshape(shape), upper.reshape(shape)
+
+class ResponseSurface:
+    """
+    两输入模型的预计算响应面
+
+    values 为网格节点上的模型预测值，形状 (n0, n1, 输出数)，float32；
+    cell_error 为每个网格单元内插值结果与模型预测之差绝对值的上界（由与单元相交的叶节点值求得，对单元内任意点成立）；
+    scale 为每个输出在网格上的取值范围，容差按该范围的比例计算。
+    clamp 为 True 时（网格范围由分裂阈值确定）网格外的点截断到边界，结果与模型一致；
+    否则网格外的点回退到模型。
+    """
+
+    def __init__(self, inputs, lows, highs, values, cell_error, clamp):
+        self.inputs = list(inputs)
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float32)
+        self.cell_error = np.asarray(cell_error, dtype=np.float32)
+        self.clamp = bool(clamp)
+        self.shape = np.array(self.values.shape[:2])
+        self.steps = (self.highs - self.lows) / (self.shape - 1)
+        self.scale = np.maximum(
+            self.values.max(axis=(0, 1)).astype(np.float64) - self.values.min(axis=(0, 1)), 1e-12)
+
+    @classmethod
+    def build(cls, model, inputs, resolution=DEFAULT_RESOLUTION, lows=None, highs=None, chunk_rows=65536):
+        """
+        在网格节点上计算模型预测，并由树结构求每个单元的插值误差上界，构建响应面
+
+        参数:
+            model: 模型对象
+            inputs: 输入列名（必须为两个）
+            resolution: 每个输入方向的网格点数
+            lows, highs: 网格范围（默认由树的分裂阈值确定）
+            chunk_rows: 每次调用模型预测的行数
+
+        返回:
+            ResponseSurface
+        """
+        if len(inputs) != 2:
+            raise ValueError(f"响应面只支持两个输入的模型，当前输入数: {len(inputs)}")
+        clamp = lows is None or highs is None
+        if clamp:
+            ranges = threshold_ranges(model, 2)
+            if ranges is None:
+                raise ValueError("无法从模型读取分裂阈值，请指定网格范围")
+            lows, highs = ranges
+        lows = np.asarray(lows, dtype=np.float64)
+        highs = np.asarray(highs, dtype=np.float64)
+
+        axes = [np.linspace(lows[i], highs[i], resolution) for i in range(2)]
+        nodes = np.stack(np.meshgrid(axes[0], axes[1], indexing="ij"), axis=-1).reshape(-1, 2)
+        values = _predict_chunks(model, inputs, nodes, chunk_rows).reshape(resolution, resolution, -1)
+
+        # 单元内的插值结果介于四个角点（float32）值之间，模型预测介于单元内的下界与上界之间，
+        # 两者之差的绝对值不超过 max(上界 - 角点最小值, 角点最大值 - 下界)
+        bounds = cell_bounds(model, axes, values.shape[2])
+        if bounds is None:
+            raise ValueError("无法读取模型的树结构，不能给出插值误差上界")
+        lower, upper = bounds
+        v = values.astype(np.float32).astype(np.float64)
+        corners = np.stack([v[:-1, :-1], v[1:, :-1], v[:-1, 1:], v[1:, 1:]])
+        cell_error = np.maximum(upper - corners.min(axis=0), corners.max(axis=0) - lower)
+        # 为浮点累加顺序不同留出余量，并在转换为 float32 时向上取整
+        cell_error = cell_error + 1e-9 * np.maximum(np.abs(lower), np.abs(upper))
+        error32 = cell_error.astype(np.float32)
+        rounded_down = error32.astype(np.float64) < cell_error
+        error32[rounded_down] = np.nextafter(error32[rounded_down], np.float32(np.inf))
+        cell_error = error32
+
+        return cls(inputs, lows, highs, values, cell_error, clamp)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.cell_error.nbytes
+
+    def interpolate(self, X):
+        """
+        双线性插值查表
+
+        参数:
+            X: (样本数, 2) 的输入矩阵，列顺序与 inputs 一致
+
+        返回:
+            (预测矩阵, 是否在网格内的布尔数组, 每行所在单元的误差上界)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        t = (X - self.lows) / self.steps
+        inside = np.all((t >= 0) & (t <= self.shape - 1), axis=1)
+        t = np.clip(t, 0, self.shape - 1)
+        i = np.minimum(t.astype(np.int64), self.shape - 2)
+        f = t - i
+        i0, i1 = i[:, 0], i[:, 1]
+        f0, f1 = f[:, :1], f[:, 1:]
+        v = self.values
+        result = ((v[i0, i1] * (1 - f1) + v[i0, i1 + 1] * f1) * (1 - f0)
+                  + (v[i0 + 1, i1] * (1 - f1) + v[i0 + 1, i1 + 1] * f1) * f0)
+        return result.astype(np.float64), inside, self.cell_error[i0, i1]
+
+    def predict(self, X, fallback=None, tolerance=DEFAULT_TOLERANCE):
+        """
+        查表预测，不满足条件的行回退到完整模型
+
+        参数:
+            X: (样本数, 2) 的输入矩阵
+            fallback: 回退函数，接收布尔掩码，返回 X 中对应行的模型预测（None 表示不回退）
+            tolerance: 容差（相对各输出取值范围的比例）
+
+        返回:
+            (预测矩阵, 查表命中的布尔数组)
+        """
+        X = np.asarray(X, dtype=np.float64)
+        result, inside, error = self.interpolate(X)
+        hit = np.all(error <= tolerance * self.scale, axis=1) & np.all(np.isfinite(X), axis=1)
+        if not self.clamp:
+            hit &= inside
+        if fallback is not None and not hit.all():
+            result[~hit] = np.asarray(fallback(~hit), dtype=np.float64).reshape(int((~hit).sum()), -1)
+        return result, hit
+
+    def coverage(self, tolerance=DEFAULT_TOLERANCE):
+        """误差上界不超过容差的网格单元比例"""
+        return float(np.all(self.cell_error <= tolerance * self.scale, axis=2).mean())
+
+    def summary(self, tolerance=DEFAULT_TOLERANCE):
+        """返回描述响应面的字典（网格大小、范围、内存、误差与容差覆盖率）"""
+        return {
+            "inputs": self.inputs,
+            "resolution": [int(n) for n in self.shape],
+            "lows": self.lows.tolist(),
+            "highs": self.highs.tolist(),
+            "clamp": self.clamp,
+            "kb": self.nbytes / 1024,
+            "max_relative_error": (self.cell_error.max(axis=(0, 1)) / self.scale).tolist(),
+            "coverage": self.coverage(tolerance),
+        }
+
+def build_surface_report(model, inputs, outputs, resolution=DEFAULT_RESOLUTION, tolerance=DEFAULT_TOLERANCE,
+                         n_check=2000, seed=0):
+    """
+    构建响应面并输出构建耗时、内存、误差与单行查表/模型预测耗时对比
+
+    返回:
+        ResponseSurface
+    """
+    start = time.perf_counter()
+    surface = ResponseSurface.build(model, inputs, resolution)
+    build_s = time.perf_counter() - start
+    info = surface.summary(tolerance)
+
+    # 在随机点上比较查表与模型的实际误差
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(surface.lows, surface.highs, size=(n_check, 2))
+    exact = _predict_chunks(model, inputs, X, 65536)
+    approx, hit = surface.predict(X, tolerance=tolerance)
+    rel = np.abs(approx - exact)[hit] / surface.scale
+
+    row = X[:1]
+    surface.predict(row)
+    start = time.perf_counter()
+    for _ in range(1000):
+        surface.predict(row)
+    lookup_us = (time.perf_counter() - start) / 1000 * 1e6
+    _model_predict(model, inputs, row)
+    start = time.perf_counter()
+    for _ in range(5):
+        _model_predict(model, inputs, row)
+    model_us = (time.perf_counter() - start) / 5 * 1e6
+
+    print(f"\n=== 响应面（{info['resolution'][0]}×{info['resolution'][1]} 网格） ===")
+    print(f"构建耗时 {build_s:.2f}秒，大小 {info['kb']:.0f}KB")
+    for name, lo, hi in zip(inputs, info["lows"], info["highs"]):
+        print(f"  {name}: [{lo:.4g}, {hi:.4g}]")
+    print(f"容差 {tolerance:.2%}：{info['coverage']:.1%} 的网格单元可直接查表，"
+          f"随机点命中率 {hit.mean():.1%}")
+    worst = rel.max(axis=0) if len(rel) else np.zeros(len(outputs))
+    for name, err in zip(outputs, worst):
+        print(f"  {name:20s} 命中点最大相对误差 {err:.3%}")
+    if np.any(worst > tolerance):
+        raise RuntimeError(f"响应面命中点的最大相对误差 {worst.max():.3%} 超过容差 {tolerance:.2%}，误差上界有误")
+    print(f"单行预测：查表 {lookup_us:.1f}us，模型 {model_us:.1f}us（{model_us / lookup_us:.0f}x）")
+    return surface
@@ -0,0 +1,235 @@
+# surrogate.py
+# 蒸馏代理模型
+# 功能：在输入范围内均匀采样，用训练好的森林标注，再拟合一个多项式代理模型；
+#       预测只需少量 NumPy 运算，单行耗时为微秒级，适合实时控制回路。
+#       代理模型与其保真度指标一起保存在模型文件的 "surrogate" 字段中
+
+import time
+from math import comb
+
+import numpy as np
+
+from response_surface import threshold_ranges, _predict_chunks
+
+# 候选多项式次数（按留出样本上的误差自动选择）
+DEFAULT_DEGREES = tuple(range(1, 9))
+
+# 多项式项数上限：项数决定单行预测耗时，超过该值的次数不参与选择
+MAX_TERMS = 120
+
+# 默认采样点数，其中 HOLDOUT_FRACTION 留作保真度评估
+DEFAULT_SAMPLES = 20000
+HOLDOUT_FRACTION = 0.2
+
+def total_degree_exponents(n_features, degree):
+    """
+    返回总次数不超过 degree 的全部单项式指数
+
+    返回:
+        (项数, 输入数) 的整数矩阵，第一行为常数项
+    """
+    exponents = [()]
+    for _ in range(n_features):
+        exponents = [e + (k,) for e in exponents for k in range(degree + 1)]
+    exponents = [e for e in exponents if sum(e) <= degree]
+    exponents.sort(key=lambda e: (sum(e), [-k for k in e]))
+    return np.array(exponents, dtype=np.int64).reshape(len(exponents), n_features)
+
+def n_terms(n_features, degree):
+    """总次数不超过 degree 的单项式个数"""
+    return comb(n_features + degree, degree)
+
+class PolynomialSurrogate:
+    """
+    多项式代理模型
+
+    输入线性缩放到 [-1, 1] 后截断（超出采样范围时与树模型一样保持边界处的值，避免多项式外推发散），
+    预测值为各单项式与 coef 的乘积之和。
+    fidelity 为拟合时在留出样本上相对森林的误差指标，见 fit。
+    """
+
+    def __init__(self, inputs, outputs, lows, highs, exponents, coef, fidelity=None):
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.exponents = np.asarray(exponents, dtype=np.int64)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.fidelity = fidelity or {}
+        self.degree = int(self.exponents.sum(axis=1).max())
+        # 预先计算缩放系数与单项式在幂次表中的位置，预测时只需少量 NumPy 调用
+        half = np.maximum((self.highs - self.lows) / 2, 1e-12)
+        self._scale = 1 / half
+        self._offset = (self.highs + self.lows) / 2 / half
+        self._powers = np.arange(self.degree + 1, dtype=np.float64)
+        self._index = np.arange(len(self.inputs)) * (self.degree + 1) + self.exponents
+
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+    def __setstate__(self, state):
+        self.__init__(state["inputs"], state["outputs"], state["lows"], state["highs"],
+                      state["exponents"], state["coef"], state["fidelity"])
+
+    @property
+    def nbytes(self):
+        return self.coef.nbytes + self.exponents.nbytes
+
+    def features(self, X):
+        """(样本数, 输入数) -> (样本数, 项数) 的单项式矩阵"""
+        t = X * self._scale - self._offset
+        np.minimum(t, 1.0, out=t)
+        np.maximum(t, -1.0, out=t)
+        powers = np.power(t[:, :, None], self._powers).reshape(len(t), -1)
+        return np.multiply.reduce(powers[:, self._index], axis=2)
+
+    def predict(self, X):
+        """
+        预测
+
+        参数:
+            X: (样本数, 输入数) 的输入矩阵（或 DataFrame），列顺序与 inputs 一致
+
+        返回:
+            (样本数, 输出数) 的 float64 矩阵
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.inputs))
+        return self.features(X) @ self.coef
+
+    @classmethod
+    def fit(cls, model, inputs, outputs, lows=None, highs=None, degrees=DEFAULT_DEGREES,
+            n_samples=DEFAULT_SAMPLES, seed=0, chunk_rows=65536):
+        """
+        在输入范围内均匀采样，用模型标注后拟合多项式，按留出样本上的误差选择次数
+
+        参数:
+            model: 已训练的模型（教师）
+            inputs: 输入列名
+            outputs: 输出列名
+            lows, highs: 采样范围（默认由树的分裂阈值确定）
+            degrees: 候选次数，项数超过 MAX_TERMS 的次数跳过
+            n_samples: 采样点数
+            seed: 随机种子
+
+        返回:
+            PolynomialSurrogate，fidelity 含所选次数、项数、各输出留出样本 R2 与
+            最大/99 分位相对误差（相对该输出在样本上的取值范围）
+        """
+        if lows is None or highs is None:
+            ranges = threshold_ranges(model, len(inputs))
+            if ranges is None:
+                raise ValueError("无法从模型读取分裂阈值，请指定采样范围")
+            lows, highs = ranges
+        lows = np.asarray(lows, dtype=np.float64)
+        highs = np.asarray(highs, dtype=np.float64)
+        candidates = [d for d in degrees if n_terms(len(inputs), d) <= MAX_TERMS]
+        if not candidates:
+            raise ValueError(f"{len(inputs)} 个输入时没有项数不超过 {MAX_TERMS} 的候选次数")
+
+        rng = np.random.default_rng(seed)
+        X = rng.uniform(lows, highs, size=(n_samples, len(inputs)))
+        start = time.perf_counter()
+        y = _predict_chunks(model, list(inputs), X, chunk_rows)
+        label_s = time.perf_counter() - start
+        n_holdout = max(1, int(n_samples * HOLDOUT_FRACTION))
+        X_fit, y_fit, X_hold, y_hold = X[n_holdout:], y[n_holdout:], X[:n_holdout], y[:n_holdout]
+        scale = np.maximum(y.max(axis=0) - y.min(axis=0), 1e-12)
+
+        best = None
+        for degree in candidates:
+            exponents = total_degree_exponents(len(inputs), degree)
+            candidate = cls(inputs, outputs, lows, highs, exponents, np.zeros((len(exponents), y.shape[1])))
+            candidate.coef = np.linalg.lstsq(candidate.features(X_fit), y_fit, rcond=None)[0]
+            error = np.abs(candidate.predict(X_hold) - y_hold) / scale
+            rmse = float(np.sqrt((error ** 2).mean()))
+            if best is None or rmse < best[0]:
+                best = (rmse, candidate, error)
+
+        _, surrogate, error = best
+        residual = ((surrogate.predict(X_hold) - y_hold) ** 2).sum(axis=0)
+        total = np.maximum(((y_hold - y_hold.mean(axis=0)) ** 2).sum(axis=0), 1e-12)
+        surrogate.fidelity = {
+            "degree": surrogate.degree,
+            "terms": len(surrogate.exponents),
+            "samples": n_samples,
+            "label_s": label_s,
+            "r2": {name: float(v) for name, v in zip(outputs, 1 - residual / total)},
+            "max_relative_error": {name: float(v) for name, v in zip(outputs, error.max(axis=0))},
+            "p99_relative_error": {name: float(v) for name, v in zip(outputs, np.quantile(error, 0.99, axis=0))},
+        }
+        return surrogate
+
+    def summary(self):
+        """返回描述代理模型的字典（次数、项数、范围、大小与保真度指标）"""
+        return {
+            "kind": "polynomial",
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+            "degree": self.degree,
+            "terms": len(self.exponents),
+            "lows": self.lows.tolist(),
+            "highs": self.highs.tolist(),
+            "kb": self.nbytes / 1024,
+            "fidelity": self.fidelity,
+        }
+
+def build_surrogate_report(model, inputs, outputs, lows=None, highs=None, X_test=None, y_test=None,
+                           degrees=DEFAULT_DEGREES, n_samples=DEFAULT_SAMPLES):
+    """
+    蒸馏代理模型并输出保真度、测试集精度与单行预测耗时对比
+
+    参数:
+        model: 已训练的模型
+        inputs, outputs: 输入、输出列名
+        lows, highs: 采样范围（可选，默认由树的分裂阈值确定）
+        X_test, y_test: 测试集（可选），给出时额外计算代理模型与森林在真实数据上的 R2
+        degrees: 候选多项式次数
+        n_samples: 采样点数
+
+    返回:
+        PolynomialSurrogate（fidelity 中增加 test_r2、latency_us）
+    """
+    from response_surface import _model_predict
+
+    start = time.perf_counter()
+    surrogate = PolynomialSurrogate.fit(model, inputs, outputs, lows, highs, degrees, n_samples)
+    fit_s = time.perf_counter() - start
+    fidelity = surrogate.fidelity
+
+    if X_test is not None and y_test is not None:
+        from sklearn.metrics import r2_score
+        y_true = np.asarray(y_test, dtype=np.float64)
+        approx = surrogate.predict(X_test)
+        exact = _model_predict(model, list(inputs), np.asarray(X_test, dtype=np.float64))
+        fidelity["test_r2"] = {name: float(r2_score(y_true[:, i], approx[:, i])) for i, name in enumerate(outputs)}
+        fidelity["model_test_r2"] = {name: float(r2_score(y_true[:, i], exact[:, i]))
+                                     for i, name in enumerate(outputs)}
+
+    row = np.asarray(surrogate.lows + surrogate.highs, dtype=np.float64).reshape(1, -1) / 2
+    surrogate.predict(row)
+    start = time.perf_counter()
+    for _ in range(2000):
+        surrogate.predict(row)
+    fidelity["latency_us"] = (time.perf_counter() - start) / 2000 * 1e6
+    _model_predict(model, list(inputs), row)
+    start = time.perf_counter()
+    for _ in range(5):
+        _model_predict(model, list(inputs), row)
+    model_us = (time.perf_counter() - start) / 5 * 1e6
+
+    print(f"\n=== 代理模型（{len(inputs)} 输入，{fidelity['degree']} 次多项式，{fidelity['terms']} 项） ===")
+    print(f"采样 {fidelity['samples']} 点，标注 {fidelity['label_s']:.2f}秒，拟合合计 {fit_s:.2f}秒，"
+          f"大小 {surrogate.nbytes / 1024:.1f}KB")
+    for name, lo, hi in zip(inputs, surrogate.lows, surrogate.highs):
+        print(f"  {name}: [{lo:.4g}, {hi:.4g}]")
+    print("相对森林的保真度（留出采样点，误差相对各输出取值范围）：")
+    for name in outputs:
+        line = (f"  {name:20s} R2: {fidelity['r2'][name]:.4f}  "
+                f"最大误差 {fidelity['max_relative_error'][name]:.3%}  "
+                f"P99 误差 {fidelity['p99_relative_error'][name]:.3%}")
+        if "test_r2" in fidelity:
+            line += f"  测试集 R2: {fidelity['test_r2'][name]:.4f}（森林 {fidelity['model_test_r2'][name]:.4f}）"
+        print(line)
+    print(f"单行预测：代理模型 {fidelity['latency_us']:.1f}us，模型 {model_us:.1f}us"
+          f"（{model_us / fidelity['latency_us']:.0f}x）")
+    return surrogate
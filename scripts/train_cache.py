@@ -0,0 +1,175 @@
+# train_cache.py
+# 训练数据缓存
+# 功能：按（文件内容哈希、输入/输出列、预处理配置）缓存预处理后的数值矩阵，
+#       重复训练时跳过 CSV/Excel 解析与预处理
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+# 默认缓存目录与容量限制
+DEFAULT_CACHE_DIR = os.path.join("data", "cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 32
+
+# 缓存文件格式版本，修改存储结构时递增
+CACHE_FORMAT_VERSION = 1
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    计算文件内容的 SHA-256 摘要
+
+    参数:
+        path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    返回:
+        十六进制摘要字符串
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+class TrainCache:
+    """
+    预处理结果的磁盘缓存
+
+    每个条目是一个 .npz 文件，包含 X、y 两个 float64 矩阵以及 JSON 元数据
+    （输入列、输出列、来源文件等）。命中时刷新文件修改时间，
+    超出容量或条目数限制时按最久未使用的顺序淘汰。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    def make_key(self, path, inputs, outputs, config):
+        """
+        生成缓存键
+
+        参数:
+            path: 数据文件路径（或多个文件路径的列表，顺序有意义）
+            inputs: 输入列名列表（None 表示自动识别）
+            outputs: 输出列名列表（None 表示自动识别）
+            config: 预处理配置字典（需可 JSON 序列化）
+
+        返回:
+            缓存键字符串
+        """
+        paths = [path] if isinstance(path, str) else list(path)
+        payload = json.dumps({
+            "format": CACHE_FORMAT_VERSION,
+            "files": [file_digest(p) for p in paths],
+            "inputs": list(inputs) if inputs else None,
+            "outputs": list(outputs) if outputs else None,
+            "config": config,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key):
+        """
+        读取缓存条目
+
+        返回:
+            (X, y, meta) 或 None（未命中或条目损坏）
+        """
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                X = data["X"]
+                y = data["y"]
+                meta = json.loads(str(data["meta"]))
+        except Exception:
+            # 条目损坏时直接丢弃，按未命中处理
+            self._remove(path)
+            return None
+        # 刷新访问时间，用于 LRU 淘汰
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return X, y, meta
+
+    def put(self, key, X, y, meta):
+        """
+        写入缓存条目并按需淘汰旧条目
+
+        参数:
+            key: 缓存键
+            X: 输入矩阵
+            y: 输出矩阵
+            meta: 元数据字典（需包含 inputs、outputs）
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta = dict(meta, created=time.time())
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # 先写临时文件再原子替换，避免并发训练读到半写入的条目
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                X=np.ascontiguousarray(X, dtype=np.float64),
+                y=np.ascontiguousarray(y, dtype=np.float64),
+                meta=np.array(json.dumps(meta, ensure_ascii=False)),
+            )
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """按最久未使用顺序淘汰条目，直到满足容量与条目数限制"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        # entries 按访问时间从旧到新排列
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            path, size, _ = entries.pop(0)
+            self._remove(path)
+            total -= size
+
+    def entries(self):
+        """
+        列出缓存条目
+
+        返回:
+            [(路径, 字节数, 修改时间), ...]，按修改时间升序
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        result = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            result.append((path, st.st_size, st.st_mtime))
+        result.sort(key=lambda e: e[2])
+        return result
+
+    def clear(self):
+        """清空缓存"""
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
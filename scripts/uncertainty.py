@@ -0,0 +1,117 @@
+# uncertainty.py
+# 预测不确定性
+# 功能：一次批量遍历取得森林中每棵树的预测值，计算均值、标准差与分位数，
+#       用于在点预测旁给出各树预测的离散范围
+
+import weakref
+
+import numpy as np
+
+# 默认分位数（5% 与 95%，即 90% 的树的预测落在该区间内）
+DEFAULT_QUANTILES = (0.05, 0.95)
+
+# 每个 sklearn 森林的（叶节点值扁平数组, 每棵树的节点偏移），森林被释放时自动清除
+_leaf_tables = weakref.WeakKeyDictionary()
+
+def parse_quantiles(text):
+    """
+    解析逗号分隔的分位数，如 "0.05,0.95"
+
+    返回:
+        分位数元组（升序）
+    """
+    values = sorted({float(q) for q in str(text).split(",") if q.strip()})
+    if any(q < 0 or q > 1 for q in values):
+        raise ValueError(f"分位数必须在 0 到 1 之间: {text}")
+    return tuple(values)
+
+def quantile_label(q):
+    """分位数的列名后缀，如 0.05 -> q5、0.975 -> q97.5"""
+    return f"q{q * 100:g}"
+
+def _leaf_table(forest):
+    """返回森林所有树叶节点值的扁平数组与每棵树的节点偏移（按森林缓存）"""
+    table = _leaf_tables.get(forest)
+    if table is None:
+        values = [est.tree_.value[:, 0, 0] for est in forest.estimators_]
+        offsets = np.cumsum([0] + [len(v) for v in values[:-1]])
+        table = (np.concatenate(values), offsets)
+        _leaf_tables[forest] = table
+    return table
+
+def supports_uncertainty(model):
+    """模型是否支持逐树预测（随机森林与 CompactForest 支持，梯度提升等后端不支持）"""
+    if hasattr(model, "predict_trees"):
+        return True
+    forests = getattr(model, "estimators_", None)
+    return bool(forests) and all(hasattr(f, "apply") and hasattr(f, "estimators_") for f in forests)
+
+def per_tree_predictions(model, X):
+    """
+    取得每个输出上每棵树的预测值
+
+    sklearn 森林用 apply 一次遍历所有树得到叶节点编号（与 predict 相同的 joblib 并行），
+    再从扁平的叶节点值数组中一次取值；CompactForest 直接批量遍历扁平数组。
+
+    参数:
+        model: MultiOutputRegressor(RandomForestRegressor) 或 CompactForest
+        X: 输入数据（列顺序与训练时一致）
+
+    返回:
+        列表，第 o 个元素为第 o 个输出的 (树数, 样本数) 矩阵
+    """
+    if hasattr(model, "predict_trees"):
+        per_tree = model.predict_trees(X)
+        return [per_tree[model.tree_output == o] for o in range(model.n_outputs)]
+    if not hasattr(model, "estimators_"):
+        raise ValueError(f"模型不支持逐树预测: {type(model).__name__}")
+    result = []
+    for forest in model.estimators_:
+        if not hasattr(forest, "apply"):
+            raise ValueError(f"模型不支持逐树预测: {type(forest).__name__}")
+        values, offsets = _leaf_table(forest)
+        leaves = forest.apply(X)  # (样本数, 树数)
+        result.append(values[(leaves + offsets).T])
+    return result
+
+def predict_uncertainty(model, X, quantiles=DEFAULT_QUANTILES):
+    """
+    预测均值、各树预测的标准差与分位数
+
+    均值与模型 predict 的结果一致；标准差与分位数反映各树预测的离散程度，
+    并非经过校准的预测区间。
+
+    参数:
+        model: 模型对象
+        X: 输入数据
+        quantiles: 分位数序列
+
+    返回:
+        字典：mean、std 为 (样本数, 输出数) 矩阵，quantiles 为 {分位数: (样本数, 输出数) 矩阵}
+    """
+    per_output = per_tree_predictions(model, X)
+    mean = np.stack([p.mean(axis=0) for p in per_output], axis=1).astype(np.float64)
+    std = np.stack([p.std(axis=0) for p in per_output], axis=1).astype(np.float64)
+    result = {"mean": mean, "std": std, "quantiles": {}}
+    if quantiles:
+        qs = np.stack([np.quantile(p, quantiles, axis=0) for p in per_output], axis=2)
+        result["quantiles"] = {q: qs[i].astype(np.float64) for i, q in enumerate(quantiles)}
+    return result
+
+def uncertainty_columns(outputs, result):
+    """
+    将 predict_uncertainty 的结果展开为列：{输出_std: 数组, 输出_q5: 数组, ...}
+
+    参数:
+        outputs: 输出列名列表
+        result: predict_uncertainty 的返回值
+
+    返回:
+        按列名排列的字典（每个输出依次为 std 与各分位数）
+    """
+    columns = {}
+    for i, name in enumerate(outputs):
+        columns[f"{name}_std"] = result["std"][:, i]
+        for q, values in result["quantiles"].items():
+            columns[f"{name}_{quantile_label(q)}"] = values[:, i]
+    return columns
@@ -0,0 +1,58 @@
+# test_admission.py
+# 准入通道由服务端签发的凭据确定：只有前端页面登录签发的 token 可以使用交互式通道的预留名额；
+# 脚本登录得到的 token 与 API Key 客户端（即使发送 X-Request-Priority: interactive）都属于 batch 通道
+
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import api.main as main
+from api.admission import AdmissionController
+from api.auth_cache import ApiKeyStore
+
+API_KEY = "test-batch-key"
+
+@pytest.fixture
+def client(monkeypatch):
+    # 不限速；并发上限 2，其中 1 个名额留给交互式通道，batch 通道最多 1 个
+    admission = AdmissionController(rate=0, max_concurrent=2, interactive_reserve=1)
+    monkeypatch.setattr(main, "admission", admission)
+    monkeypatch.setattr(main, "api_keys", ApiKeyStore({"script": API_KEY}))
+    # 不进入 TestClient 上下文，不触发启动时的模型加载；通过准入的请求因模型未加载返回 500
+    yield TestClient(main.app), admission
+
+def occupy_batch_lane(admission):
+    admission.acquire("other-script", "batch")
+
+def predict(c, headers):
+    return c.post("/api/predict", json={"load": 1.0, "frequency": 1.0}, headers=headers)
+
+def login(c, **extra):
+    r = c.post("/api/login", json={"username": "admin", "password": main.USERS["admin"], **extra})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['token']}"}
+
+def test_api_key_with_interactive_header_stays_in_batch_lane(client):
+    c, admission = client
+    occupy_batch_lane(admission)
+    r = predict(c, {"X-API-Key": API_KEY, "X-Request-Priority": "interactive"})
+    assert r.status_code == 429
+    assert admission.in_flight("interactive") == 0
+
+def test_script_login_stays_in_batch_lane(client):
+    c, admission = client
+    occupy_batch_lane(admission)
+    r = predict(c, {**login(c), "X-Request-Priority": "interactive"})
+    assert r.status_code == 429
+
+def test_web_login_uses_interactive_reserve(client):
+    c, admission = client
+    occupy_batch_lane(admission)
+    r = predict(c, login(c, client="web"))
+    # 通过准入（模型未加载），而不是 429
+    assert r.status_code == 500
+    assert admission.in_flight("interactive") == 0